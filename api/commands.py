@@ -10,6 +10,9 @@ from werkzeug.exceptions import NotFound
 
 from configs import dify_config
 from constants.languages import languages
+from core.helper.model_provider_cache import ProviderConfigurationsCache
+from core.rag.datasource.keyword.jieba.jieba_keyword_postings import POSTINGS_DATA_SOURCE_TYPE, JiebaKeywordPostings
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_cache import JiebaKeywordTableCache
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.index_processor.constant.built_in_field import BuiltInField
@@ -17,11 +20,19 @@ from core.rag.models.document import Document
 from events.app_event import app_was_created
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
+from extensions.ext_storage import storage
 from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DatasetMetadata, DatasetMetadataBinding, DocumentSegment
+from models.dataset import (
+    Dataset,
+    DatasetCollectionBinding,
+    DatasetKeywordTable,
+    DatasetMetadata,
+    DatasetMetadataBinding,
+    DocumentSegment,
+)
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -132,6 +143,7 @@ def reset_encrypt_key_pair():
         db.session.query(Provider).filter(Provider.provider_type == "custom", Provider.tenant_id == tenant.id).delete()
         db.session.query(ProviderModel).filter(ProviderModel.tenant_id == tenant.id).delete()
         db.session.commit()
+        ProviderConfigurationsCache(tenant_id=tenant.id).delete()
 
         click.echo(
             click.style(
@@ -609,6 +621,59 @@ def old_metadata_migration():
     click.echo(click.style("Old metadata migration completed.", fg="green"))
 
 
+@click.command("migrate-keyword-table-to-postings", help="Migrate jieba keyword tables to per-keyword postings.")
+@click.option("--dataset-id", default=None, help="Only migrate the keyword table of this dataset.")
+def migrate_keyword_table_to_postings(dataset_id: Optional[str] = None):
+    """
+    Migrate legacy jieba keyword tables (single JSON document in database or storage) to per-keyword postings.
+    """
+    click.echo(click.style("Starting keyword table migration.", fg="green"))
+
+    query = db.session.query(DatasetKeywordTable.id).filter(
+        DatasetKeywordTable.data_source_type != POSTINGS_DATA_SOURCE_TYPE
+    )
+    if dataset_id:
+        query = query.filter(DatasetKeywordTable.dataset_id == dataset_id)
+    keyword_table_ids = [keyword_table_id for (keyword_table_id,) in query.all()]
+
+    migrated_count = 0
+    for keyword_table_id in keyword_table_ids:
+        dataset_keyword_table = db.session.query(DatasetKeywordTable).filter_by(id=keyword_table_id).first()
+        if not dataset_keyword_table:
+            continue
+        try:
+            lock_name = "keyword_indexing_lock_{}".format(dataset_keyword_table.dataset_id)
+            with redis_client.lock(lock_name, timeout=600):
+                legacy_data_source_type = dataset_keyword_table.data_source_type
+                keyword_table_dict = dataset_keyword_table.keyword_table_dict
+                keyword_table = keyword_table_dict["__data__"]["table"] if keyword_table_dict else {}
+                JiebaKeywordPostings(dataset_keyword_table.dataset_id).replace_table(keyword_table)
+
+                dataset_keyword_table.data_source_type = POSTINGS_DATA_SOURCE_TYPE
+                dataset_keyword_table.keyword_table = ""
+                db.session.commit()
+                JiebaKeywordTableCache.invalidate(dataset_keyword_table.dataset_id)
+
+                if legacy_data_source_type != "database":
+                    dataset = db.session.query(Dataset).filter_by(id=dataset_keyword_table.dataset_id).first()
+                    if dataset:
+                        file_key = "keyword_files/" + dataset.tenant_id + "/" + dataset.id + ".txt"
+                        if storage.exists(file_key):
+                            storage.delete(file_key)
+            migrated_count += 1
+            click.echo("Migrated keyword table of dataset {}".format(dataset_keyword_table.dataset_id))
+        except Exception:
+            db.session.rollback()
+            click.echo(
+                click.style(
+                    "Failed to migrate keyword table of dataset {}".format(dataset_keyword_table.dataset_id), fg="red"
+                )
+            )
+            logging.exception(f"Failed to migrate keyword table, dataset_id: {dataset_keyword_table.dataset_id}")
+
+    click.echo(click.style(f"Keyword table migration completed, {migrated_count} tables migrated.", fg="green"))
+
+
 @click.command("create-tenant", help="Create account and tenant.")
 @click.option("--email", prompt=True, help="Tenant account email.")
 @click.option("--name", prompt=True, help="Workspace name.")
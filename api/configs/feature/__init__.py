@@ -5,6 +5,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -47,6 +48,22 @@ class SecurityConfig(BaseSettings):
         default=None,
     )
 
+    TENANT_PRIVATE_KEY_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds a parsed tenant private key is kept in process, 0 to parse it on every decryption",
+        default=120,
+    )
+
+    DECRYPTED_TOKEN_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of decrypted credentials kept in process, keyed by tenant and ciphertext,"
+        " 0 to disable",
+        default=2000,
+    )
+
+    DECRYPTED_TOKEN_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds a decrypted credential is kept in process",
+        default=300,
+    )
+
 
 class AppExecutionConfig(BaseSettings):
     """
@@ -65,6 +82,29 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of requests per app per day",
         default=5000,
     )
+    APP_STOP_FLAG_CHECK_INTERVAL: NonNegativeFloat = Field(
+        description="Minimum interval in seconds between reads of a task's stopped flag in redis,"
+        " stop requests are pushed to running tasks over redis pub/sub in between",
+        default=1.0,
+    )
+    APP_STOP_SIGNAL_PUBSUB_ENABLED: bool = Field(
+        description="Push stop requests to running tasks over redis pub/sub",
+        default=True,
+    )
+    CONVERSATION_HISTORY_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of conversation messages whose prepared history prompt messages are kept in"
+        " process, 0 to disable",
+        default=2000,
+    )
+    CONVERSATION_HISTORY_CACHE_MAX_TEXT_SIZE: NonNegativeInt = Field(
+        description="Maximum total number of characters of the queries and answers kept in the conversation history"
+        " cache of each process, 0 for no limit",
+        default=4000000,
+    )
+    CONVERSATION_HISTORY_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds the prepared history prompt messages of a message are kept in process",
+        default=600,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -175,6 +215,21 @@ class PluginConfig(BaseSettings):
         default=15728640 * 12,
     )
 
+    PLUGIN_DAEMON_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of keep-alive connections to the plugin daemon pooled per process",
+        default=100,
+    )
+
+    PLUGIN_DAEMON_CONNECT_TIMEOUT: PositiveFloat = Field(
+        description="Connection timeout in seconds for plugin daemon requests",
+        default=10.0,
+    )
+
+    PLUGIN_DAEMON_READ_TIMEOUT: PositiveFloat = Field(
+        description="Read timeout in seconds for plugin daemon requests, the longest wait for the next streamed chunk",
+        default=600.0,
+    )
+
 
 class MarketplaceConfig(BaseSettings):
     """
@@ -451,6 +506,57 @@ class ModelLoadBalanceConfig(BaseSettings):
     )
 
 
+class ModelProviderCacheConfig(BaseSettings):
+    """
+    Configuration for the in-process caches of model provider configurations
+    """
+
+    PROVIDER_CONFIGURATIONS_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of tenants whose provider configurations are kept in process, 0 to disable",
+        default=200,
+    )
+
+    PROVIDER_CONFIGURATIONS_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds the provider configurations of a tenant are kept in process,"
+        " writes to them invalidate the cache earlier",
+        default=600,
+    )
+
+    PLUGIN_MODEL_PROVIDERS_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of tenants whose plugin model provider declarations are kept in process,"
+        " 0 to disable",
+        default=200,
+    )
+
+    PLUGIN_MODEL_SCHEMAS_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of plugin model schemas kept in process, 0 to disable",
+        default=5000,
+    )
+
+    PLUGIN_MODEL_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds plugin model provider declarations and schemas are kept in process,"
+        " installing, upgrading or uninstalling a plugin invalidates them earlier",
+        default=300,
+    )
+
+
+class ModelTokenCountConfig(BaseSettings):
+    """
+    Configuration for counting model tokens locally
+    """
+
+    MODEL_LOCAL_TOKEN_COUNT_PROVIDERS: str = Field(
+        description="Comma-separated list of model providers, e.g. 'langgenius/openai/openai', whose LLM and text"
+        " embedding token counts are estimated with local tiktoken encoders instead of asking the plugin,"
+        " '*' for every provider",
+        default="",
+    )
+
+    @property
+    def MODEL_LOCAL_TOKEN_COUNT_PROVIDERS_SET(self) -> set[str]:
+        return {item.strip() for item in self.MODEL_LOCAL_TOKEN_COUNT_PROVIDERS.split(",") if item.strip() != ""}
+
+
 class BillingConfig(BaseSettings):
     """
     Configuration for platform billing features
@@ -498,6 +604,25 @@ class WorkflowConfig(BaseSettings):
         default=3,
     )
 
+    WORKFLOW_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled workflow graphs cached per process, 0 disables the cache",
+        default=256,
+    )
+
+    WORKFLOW_GRAPH_CACHE_TTL: PositiveInt = Field(
+        description="Time-to-live in seconds of a compiled workflow graph in the process cache",
+        default=3600,
+    )
+    WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD: NonNegativeInt = Field(
+        description="Length in characters above which workflow run and node execution inputs, outputs and process data"
+        " are saved compressed to the storage instead of the database (0 to disable)",
+        default=0,
+    )
+    WORKFLOW_PAYLOAD_PREVIEW_LENGTH: NonNegativeInt = Field(
+        description="Length in characters of the preview kept in the database for an offloaded workflow payload",
+        default=1000,
+    )
+
     MAX_VARIABLE_SIZE: PositiveInt = Field(
         description="Maximum size in bytes for a single variable in workflows. Default to 200 KB.",
         default=200 * 1024,
@@ -514,6 +639,33 @@ class WorkflowNodeExecutionConfig(BaseSettings):
         default=100,
     )
 
+    GRAPH_ENGINE_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of worker threads shared by all workflow runs of the process"
+        " for parallel branches and parallel iterations",
+        default=100,
+    )
+
+    GRAPH_ENGINE_RUN_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of parallel branches a single workflow run executes concurrently",
+        default=10,
+    )
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED: bool = Field(
+        description="Buffer the node execution records of a workflow run and write them in bulk in the background",
+        default=True,
+    )
+    WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL: NonNegativeFloat = Field(
+        description="Seconds since the last write after which the next node execution change of a run triggers a write",
+        default=1.0,
+    )
+    WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE: PositiveInt = Field(
+        description="Number of buffered node execution records of a run that triggers a write",
+        default=100,
+    )
+    WORKFLOW_NODE_EXECUTION_WRITER_WORKERS: PositiveInt = Field(
+        description="Number of background threads writing buffered node execution records",
+        default=4,
+    )
+
 
 class AuthConfig(BaseSettings):
     """
@@ -662,10 +814,29 @@ class RagEtlConfig(BaseSettings):
 
     KEYWORD_DATA_SOURCE_TYPE: str = Field(
         description="Data source type for keyword extraction"
-        " ('database' or other supported types), default to 'database'",
+        " ('database', 'postings' for incremental per-keyword storage, or other supported types),"
+        " default to 'database'",
         default="database",
     )
 
+    KEYWORD_TABLE_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of parsed dataset keyword tables cached per process for keyword search,"
+        " 0 to disable",
+        default=32,
+    )
+
+    KEYWORD_TABLE_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds a parsed dataset keyword table stays in the per-process cache",
+        default=3600,
+    )
+
+    WEIGHT_RERANK_REUSE_INDEXED_KEYWORDS: bool = Field(
+        description="Whether weighted rerank reuses the segment keywords extracted at indexing time"
+        " instead of extracting keywords from every candidate on each query, only when every candidate has them."
+        " Indexed keywords are capped at the dataset's keyword number and may be edited, so scores change",
+        default=False,
+    )
+
     UNSTRUCTURED_API_URL: Optional[str] = Field(
         description="API URL for Unstructured.io service",
         default=None,
@@ -744,6 +915,65 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    DATASET_SEGMENT_INSERT_BATCH_SIZE: PositiveInt = Field(
+        description="Number of segments of a document looked up, inserted and committed per batch during indexing",
+        default=500,
+    )
+
+    EMBEDDING_CACHE_QUERY_BATCH_SIZE: PositiveInt = Field(
+        description="Maximum number of text hashes looked up or inserted per query against the embedding cache table",
+        default=1000,
+    )
+
+    EMBEDDING_CACHE_STORAGE_FORMAT: Literal["float32", "float16", "int8"] = Field(
+        description="Encoding for cached embeddings in the embeddings table and the redis query cache,"
+        " 'float16' and 'int8' trade a small precision loss for 2-4x smaller payloads than 'float32'",
+        default="float32",
+    )
+
+    QUERY_EMBEDDING_LOCAL_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of query embeddings kept in the in-process cache in front of redis, 0 to disable",
+        default=1000,
+    )
+
+    QUERY_EMBEDDING_LOCAL_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds a query embedding stays in the in-process cache",
+        default=300,
+    )
+
+    TEXT_SPLITTER_LOCAL_TOKEN_COUNT_ENABLED: bool = Field(
+        description="Count the tokens of document splits with the local GPT-2 encoder, calibrated against the embedding"
+        " model, instead of asking the embedding model for every split",
+        default=True,
+    )
+
+    TEXT_SPLITTER_TOKEN_CALIBRATION_SAMPLE_SIZE: NonNegativeInt = Field(
+        description="Number of splits counted by the embedding model to calibrate the local token counts of a document,"
+        " 0 to use the GPT-2 counts as they are",
+        default=20,
+    )
+
+    INDEXING_PIPELINE_ENABLED: bool = Field(
+        description="Split, save and embed documents in overlapping batches instead of splitting the whole document"
+        " before any embedding starts",
+        default=False,
+    )
+
+    INDEXING_PIPELINE_BATCH_SIZE: PositiveInt = Field(
+        description="Number of chunks saved and embedded per batch by the indexing pipeline",
+        default=100,
+    )
+
+    INDEXING_PIPELINE_MAX_WORKERS: PositiveInt = Field(
+        description="Number of batches of a document embedded and upserted concurrently by the indexing pipeline",
+        default=10,
+    )
+
+    INDEXING_PIPELINE_MAX_PENDING_BATCHES: PositiveInt = Field(
+        description="Maximum number of split batches waiting for or in embedding, splitting pauses beyond it",
+        default=20,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -867,6 +1097,8 @@ class FeatureConfig(
     LoggingConfig,
     MailConfig,
     ModelLoadBalanceConfig,
+    ModelProviderCacheConfig,
+    ModelTokenCountConfig,
     ModerationConfig,
     MultiModalTransferConfig,
     PositionConfig,
@@ -82,6 +82,22 @@ class VectorStoreConfig(BaseSettings):
         default=False,
     )
 
+    VECTOR_CLIENT_POOL_ENABLED: bool = Field(
+        description="Reuse vector database clients and connection pools across Vector instances"
+        " with the same connection config.",
+        default=True,
+    )
+
+    VECTOR_CLIENT_POOL_IDLE_TIMEOUT: NonNegativeInt = Field(
+        description="Seconds after which an unused pooled vector database client is evicted, 0 disables eviction.",
+        default=600,
+    )
+
+    VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL: NonNegativeInt = Field(
+        description="Minimum seconds between health checks of a pooled vector database client, 0 checks on every use.",
+        default=60,
+    )
+
 
 class KeywordStoreConfig(BaseSettings):
     KEYWORD_STORE: str = Field(
@@ -170,8 +186,15 @@ class DatabaseConfig(BaseSettings):
     )
 
     RETRIEVAL_SERVICE_EXECUTORS: NonNegativeInt = Field(
-        description="Number of processes for the retrieval service, default to CPU cores.",
-        default=os.cpu_count(),
+        description="Number of worker threads of the retrieval executor shared by all retrievals of a process,"
+        " default to 4 times the CPU cores.",
+        default=(os.cpu_count() or 1) * 4,
+    )
+
+    RETRIEVAL_SERVICE_TENANT_MAX_CONCURRENCY: NonNegativeInt = Field(
+        description="Maximum number of retrieval tasks a single tenant can have in flight on the shared retrieval"
+        " executor, 0 for no limit.",
+        default=8,
     )
 
     @computed_field
@@ -7,6 +7,7 @@ from typing import Any, Optional
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
+from core.app.apps.task_stop_signal import TaskStopSignal
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
@@ -24,6 +25,11 @@ class PublishFrom(Enum):
     TASK_PIPELINE = 2
 
 
+class _QueueSignal(Enum):
+    # wakes up the listener as soon as the stop signal of the task arrives
+    STOPPED = 1
+
+
 class AppQueueManager:
     def __init__(self, task_id: str, user_id: str, invoke_from: InvokeFrom) -> None:
         if not user_id:
@@ -38,9 +44,11 @@ class AppQueueManager:
             AppQueueManager._generate_task_belong_cache_key(self._task_id), 1800, f"{user_prefix}-{self._user_id}"
         )
 
-        q: queue.Queue[WorkflowQueueMessage | MessageQueueMessage | None] = queue.Queue()
+        q: queue.Queue[WorkflowQueueMessage | MessageQueueMessage | _QueueSignal | None] = queue.Queue()
 
         self._q = q
+        self._stop_event = TaskStopSignal.register(self._task_id, on_stop=lambda: q.put(_QueueSignal.STOPPED))
+        self._stop_checked_at = 0.0
 
     def listen(self):
         """
@@ -56,6 +64,8 @@ class AppQueueManager:
                 message = self._q.get(timeout=1)
                 if message is None:
                     break
+                if message is _QueueSignal.STOPPED:
+                    continue
 
                 yield message
             except queue.Empty:
@@ -125,15 +135,26 @@ class AppQueueManager:
 
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        TaskStopSignal.publish(task_id)
 
     def _is_stopped(self) -> bool:
         """
-        Check if task is stopped
+        Check if task is stopped, the stopped flag in redis is only read every APP_STOP_FLAG_CHECK_INTERVAL seconds
+        in case the pushed stop signal was missed
         :return:
         """
+        if self._stop_event.is_set():
+            return True
+
+        now = time.monotonic()
+        if now - self._stop_checked_at < dify_config.APP_STOP_FLAG_CHECK_INTERVAL:
+            return False
+        self._stop_checked_at = now
+
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
+            self._stop_event.set()
             return True
 
         return False
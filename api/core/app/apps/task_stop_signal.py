@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any, Optional
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class _StopEvent(threading.Event):
+    """
+    Event that also runs the callbacks of its holders when it is set, e.g. to wake up a thread blocked on a queue
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.callbacks: list[Callable[[], None]] = []
+
+    def set(self) -> None:
+        super().set()
+        for callback in list(self.callbacks):
+            try:
+                callback()
+            except Exception:
+                logger.warning("Stop signal callback failed", exc_info=True)
+
+
+class TaskStopSignal:
+    """
+    Process-local stop signals of the generate tasks running in this process.
+    Stop requests are pushed to every process over redis pub/sub, so checking whether a task is stopped is a local
+    event lookup instead of a redis GET for every streamed chunk.
+    """
+
+    CHANNEL = "generate_task_stopped"
+
+    _events: "weakref.WeakValueDictionary[str, _StopEvent]" = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+    _listener: Optional[Any] = None
+
+    @classmethod
+    def register(cls, task_id: str, on_stop: Optional[Callable[[], None]] = None) -> threading.Event:
+        """
+        Return the stop event of the task, it stays registered as long as the caller holds it.
+        `on_stop` is called, from the thread that receives the signal, when the task is stopped.
+        """
+        cls._ensure_listener()
+        with cls._lock:
+            event = cls._events.get(task_id)
+            if event is None:
+                event = _StopEvent()
+                cls._events[task_id] = event
+            if on_stop is not None:
+                event.callbacks.append(on_stop)
+            return event
+
+    @classmethod
+    def publish(cls, task_id: str) -> None:
+        """
+        Signal the stop to the task, wherever it runs
+        """
+        cls._set(task_id)
+        if not dify_config.APP_STOP_SIGNAL_PUBSUB_ENABLED:
+            return
+        try:
+            redis_client.publish(cls.CHANNEL, task_id)
+        except Exception:
+            # the stopped flag in redis is still picked up by the fallback check
+            logger.warning(f"Failed to publish stop signal of task {task_id}", exc_info=True)
+
+    @classmethod
+    def _set(cls, task_id: str) -> None:
+        with cls._lock:
+            event = cls._events.get(task_id)
+        if event is not None:
+            event.set()
+
+    @classmethod
+    def _handle_message(cls, message: dict) -> None:
+        data = message.get("data")
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        if isinstance(data, str):
+            cls._set(data)
+
+    @classmethod
+    def _handle_listener_error(cls, e: BaseException, pubsub: Any, thread: Any) -> None:
+        # the pubsub reconnects and subscribes again on the next read
+        logger.warning(f"Stop signal listener error: {e}")
+        time.sleep(1)
+
+    @classmethod
+    def _ensure_listener(cls) -> None:
+        if cls._listener is not None or not dify_config.APP_STOP_SIGNAL_PUBSUB_ENABLED:
+            return
+        with cls._lock:
+            if cls._listener is not None:
+                return
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{cls.CHANNEL: cls._handle_message})
+                cls._listener = pubsub.run_in_thread(
+                    sleep_time=1, daemon=True, exception_handler=cls._handle_listener_error
+                )
+            except Exception:
+                # fall back to checking the stopped flag in redis only
+                logger.warning("Failed to start the stop signal listener", exc_info=True)
+                cls._listener = False
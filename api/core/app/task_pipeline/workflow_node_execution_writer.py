@@ -0,0 +1,150 @@
+import concurrent.futures
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+from sqlalchemy import Engine, insert, inspect, update
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from core.workflow.payload_storage import PAYLOAD_COLUMNS, WorkflowPayloadStorage
+from extensions.ext_database import db
+from models.workflow import WorkflowNodeExecution
+
+logger = logging.getLogger(__name__)
+
+_COLUMN_KEYS = tuple(column.key for column in inspect(WorkflowNodeExecution).column_attrs)
+
+
+class WorkflowNodeExecutionWriter:
+    """
+    Write-behind persistence of the node executions of one workflow run.
+    Saved node executions are never attached to a session, the changed ones are written in bulk by a shared
+    background pool every WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL seconds or WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE
+    changes, and the run flushes and waits for them before it finishes.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._dirty: dict[str, WorkflowNodeExecution] = {}
+        self._versions: dict[str, int] = {}
+        self._pending: list[Future] = []
+        self._last_flush_at = time.monotonic()
+
+        # guarded by _write_lock, the background writes of a run may finish in any order
+        self._write_lock = threading.Lock()
+        self._persisted_versions: dict[str, int] = {}
+        self._failed_rows: dict[str, tuple[int, dict[str, Any]]] = {}
+        # offloaded payloads by (row id, column), a snapshot with the same payload reuses its stored pointer
+        self._offloaded_payloads: dict[tuple[str, str], Optional[str]] = {}
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=dify_config.WORKFLOW_NODE_EXECUTION_WRITER_WORKERS,
+                        thread_name_prefix="node_execution_writer",
+                    )
+        return cls._executor
+
+    def save(self, workflow_node_execution: WorkflowNodeExecution) -> None:
+        """
+        Mark the node execution as changed, it is written on the next flush
+        """
+        self._dirty[workflow_node_execution.id] = workflow_node_execution
+        if not dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED:
+            self.flush(wait=True)
+        elif (
+            len(self._dirty) >= dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE
+            or time.monotonic() - self._last_flush_at >= dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self, wait: bool = False) -> None:
+        """
+        Write the changed node executions
+        :param wait: write in the calling thread after the pending background writes, raising on failure
+        """
+        self._last_flush_at = time.monotonic()
+        rows = self._take_snapshot()
+        if not wait:
+            if rows:
+                self._pending = [future for future in self._pending if not future.done()]
+                self._pending.append(self._get_executor().submit(self._write_in_background, db.engine, rows))
+            return
+
+        concurrent.futures.wait(self._pending)
+        self._pending = []
+        with self._write_lock:
+            rows = [*self._failed_rows.values(), *rows]
+            self._failed_rows = {}
+        if rows:
+            self._write(db.engine, rows)
+
+    def _take_snapshot(self) -> list[tuple[int, dict[str, Any]]]:
+        rows = []
+        for row_id, workflow_node_execution in self._dirty.items():
+            version = self._versions.get(row_id, 0) + 1
+            self._versions[row_id] = version
+            # unset columns are left to their server defaults
+            row = {key: value for key in _COLUMN_KEYS if (value := getattr(workflow_node_execution, key)) is not None}
+            rows.append((version, row))
+        self._dirty = {}
+        return rows
+
+    def _write_in_background(self, engine: Engine, rows: list[tuple[int, dict[str, Any]]]) -> None:
+        try:
+            self._write(engine, rows)
+        except Exception:
+            logger.exception("Failed to write workflow node executions, retrying when the run finishes")
+            with self._write_lock:
+                for version, row in rows:
+                    failed = self._failed_rows.get(row["id"])
+                    if not failed or failed[0] < version:
+                        self._failed_rows[row["id"]] = (version, row)
+
+    def _write(self, engine: Engine, rows: list[tuple[int, dict[str, Any]]]) -> None:
+        # every snapshot holds the whole row, only the latest one of each node execution is written
+        latest: dict[str, tuple[int, dict[str, Any]]] = {}
+        for version, row in rows:
+            if version > latest.get(row["id"], (0, {}))[0]:
+                latest[row["id"]] = (version, row)
+
+        with self._write_lock:
+            inserts: list[dict[str, Any]] = []
+            updates: list[dict[str, Any]] = []
+            for row_id, (version, row) in latest.items():
+                persisted_version = self._persisted_versions.get(row_id)
+                if persisted_version is None:
+                    inserts.append(row)
+                elif persisted_version < version:
+                    updates.append(row)
+
+            if not inserts and not updates:
+                return
+            for row in inserts + updates:
+                for column in PAYLOAD_COLUMNS:
+                    if column in row:
+                        row[column] = WorkflowPayloadStorage.offload(
+                            row["tenant_id"],
+                            row["id"],
+                            column,
+                            row[column],
+                            stored=self._offloaded_payloads.get((row["id"], column)),
+                        )
+                        if WorkflowPayloadStorage.is_offloaded(row[column]):
+                            self._offloaded_payloads[(row["id"], column)] = row[column]
+            with Session(engine) as session:
+                if inserts:
+                    session.execute(insert(WorkflowNodeExecution), inserts)
+                if updates:
+                    session.execute(update(WorkflowNodeExecution), updates)
+                session.commit()
+            for row in inserts + updates:
+                self._persisted_versions[row["id"]] = latest[row["id"]][0]
@@ -1,7 +1,15 @@
 import base64
+import hashlib
 
+from configs import dify_config
+from core.helper.lru_cache import TTLLRUCache
 from libs import rsa
 
+# decrypted credentials keyed by tenant and ciphertext, a changed credential is a new ciphertext
+_decrypted_token_cache = TTLLRUCache(
+    capacity=dify_config.DECRYPTED_TOKEN_CACHE_SIZE, ttl=dify_config.DECRYPTED_TOKEN_CACHE_TTL
+)
+
 
 def obfuscated_token(token: str):
     if not token:
@@ -21,14 +29,32 @@ def encrypt_token(tenant_id: str, token: str):
     return base64.b64encode(encrypted_token).decode()
 
 
+def _get_decrypted_token_cache_key(tenant_id: str, token: str) -> tuple[str, str]:
+    return tenant_id, hashlib.sha256(token.encode()).hexdigest()
+
+
 def decrypt_token(tenant_id: str, token: str):
-    return rsa.decrypt(base64.b64decode(token), tenant_id)
+    cache_key = _get_decrypted_token_cache_key(tenant_id, token)
+    decrypted_token = _decrypted_token_cache.get(cache_key)
+    if decrypted_token is None:
+        decrypted_token = rsa.decrypt(base64.b64decode(token), tenant_id)
+        _decrypted_token_cache.put(cache_key, decrypted_token)
+    return decrypted_token
 
 
 def batch_decrypt_token(tenant_id: str, tokens: list[str]):
-    rsa_key, cipher_rsa = rsa.get_decrypt_decoding(tenant_id)
-
-    return [rsa.decrypt_token_with_decoding(base64.b64decode(token), rsa_key, cipher_rsa) for token in tokens]
+    decrypted_tokens = []
+    decoding = None
+    for token in tokens:
+        cache_key = _get_decrypted_token_cache_key(tenant_id, token)
+        decrypted_token = _decrypted_token_cache.get(cache_key)
+        if decrypted_token is None:
+            if decoding is None:
+                decoding = rsa.get_decrypt_decoding(tenant_id)
+            decrypted_token = rsa.decrypt_token_with_decoding(base64.b64decode(token), *decoding)
+            _decrypted_token_cache.put(cache_key, decrypted_token)
+        decrypted_tokens.append(decrypted_token)
+    return decrypted_tokens
 
 
 def get_decrypt_decoding(tenant_id: str):
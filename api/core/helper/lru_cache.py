@@ -1,5 +1,8 @@
+import threading
+import time
 from collections import OrderedDict
-from typing import Any
+from collections.abc import Callable
+from typing import Any, Optional
 
 
 class LRUCache:
@@ -20,3 +23,83 @@ class LRUCache:
         self.cache[key] = value
         if len(self.cache) > self.capacity:
             self.cache.popitem(last=False)  # pop the first item
+
+
+class TTLLRUCache:
+    """
+    Thread-safe LRU cache whose entries also expire `ttl` seconds after being written.
+    With `weigh` and `max_weight`, e.g. the size of the values, the least recently used entries are also evicted
+    while the total weight of the entries is over `max_weight`.
+    Keeps hit/miss counters so callers can expose the effectiveness of the cache.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        ttl: float,
+        max_weight: int = 0,
+        weigh: Optional[Callable[[Any], int]] = None,
+    ):
+        self.cache: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            item = self.cache.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        if self.capacity <= 0:
+            return
+        weighed = self.weigh is not None and self.max_weight > 0
+        if weighed and self._weigh(value) > self.max_weight:
+            # would evict everything else and still not fit
+            self.delete(key)
+            return
+        with self._lock:
+            if key in self.cache:
+                self._pop(key)
+            self.cache[key] = (time.monotonic() + self.ttl, value)
+            self.weight += self._weigh(value)
+            while len(self.cache) > self.capacity or (weighed and self.weight > self.max_weight):
+                self._pop(next(iter(self.cache)))
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            if key in self.cache:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.cache.clear()
+            self.weight = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self.cache), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
+
+    def _weigh(self, value: Any) -> int:
+        return self.weigh(value) if self.weigh is not None else 0
+
+    def _pop(self, key: Any) -> None:
+        _, value = self.cache.pop(key)
+        self.weight -= self._weigh(value)
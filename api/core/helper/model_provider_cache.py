@@ -1,10 +1,21 @@
+import hashlib
 import json
+import logging
 from enum import Enum
 from json import JSONDecodeError
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, cast
 
+from configs import dify_config
+from core.helper.lru_cache import TTLLRUCache
 from extensions.ext_redis import redis_client
 
+if TYPE_CHECKING:
+    from core.entities.provider_configuration import ProviderConfigurations
+    from core.model_runtime.entities.model_entities import AIModelEntity
+    from core.plugin.entities.plugin_daemon import PluginModelProviderEntity
+
+logger = logging.getLogger(__name__)
+
 
 class ProviderCredentialsCacheType(Enum):
     PROVIDER = "provider"
@@ -50,3 +61,178 @@ class ProviderCredentialsCache:
         :return:
         """
         redis_client.delete(self.cache_key)
+
+
+class ProviderConfigurationsCache:
+    """
+    Process-local cache of the provider configurations of a tenant.
+    Writes to the provider, provider model, model setting, preferred provider and load balancing records of the tenant
+    bump its version in redis, a cached entry is only used while it was built for the current version.
+    Quota deductions do not bump it, the quota usage of a cached entry is read live when it is used.
+    """
+
+    _cache = TTLLRUCache(
+        capacity=dify_config.PROVIDER_CONFIGURATIONS_CACHE_SIZE, ttl=dify_config.PROVIDER_CONFIGURATIONS_CACHE_TTL
+    )
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.version_key = f"provider_configurations_version:tenant_id:{tenant_id}"
+
+    def get_version(self) -> Optional[str]:
+        """
+        Get the current configurations version of the tenant, None when it cannot be read.
+
+        :return:
+        """
+        if not dify_config.PROVIDER_CONFIGURATIONS_CACHE_SIZE:
+            return None
+        return _get_version(self.version_key)
+
+    def get(self, version: str) -> Optional["ProviderConfigurations"]:
+        """
+        Get cached provider configurations built for the version.
+
+        :param version: current configurations version
+        :return:
+        """
+        cached = self._cache.get(self.tenant_id)
+        if cached is None or cached[0] != version:
+            return None
+        return cast("ProviderConfigurations", cached[1])
+
+    def set(self, version: str, provider_configurations: "ProviderConfigurations") -> None:
+        """
+        Cache provider configurations built for the version.
+
+        :param version: configurations version read before the configurations were built
+        :param provider_configurations: provider configurations
+        :return:
+        """
+        self._cache.put(self.tenant_id, (version, provider_configurations))
+
+    def delete(self) -> None:
+        """
+        Invalidate cached provider configurations of the tenant in every process.
+
+        :return:
+        """
+        self._cache.delete(self.tenant_id)
+        redis_client.incr(self.version_key)
+
+
+class PluginModelCache:
+    """
+    Process-local cache of the model provider declarations and model schemas the plugin daemon serves to a tenant.
+    Installing, upgrading or uninstalling a plugin bumps the plugin version of the tenant in redis, cached entries are
+    only used while they were fetched for the current version.
+    """
+
+    _providers_cache = TTLLRUCache(
+        capacity=dify_config.PLUGIN_MODEL_PROVIDERS_CACHE_SIZE, ttl=dify_config.PLUGIN_MODEL_CACHE_TTL
+    )
+    _schemas_cache = TTLLRUCache(
+        capacity=dify_config.PLUGIN_MODEL_SCHEMAS_CACHE_SIZE, ttl=dify_config.PLUGIN_MODEL_CACHE_TTL
+    )
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.version_key = f"plugin_models_version:tenant_id:{tenant_id}"
+
+    def get_version(self) -> Optional[str]:
+        """
+        Get the current plugin version of the tenant, None when it cannot be read.
+
+        :return:
+        """
+        return _get_version(self.version_key)
+
+    def get_providers(self, version: str) -> Optional[list["PluginModelProviderEntity"]]:
+        """
+        Get cached plugin model providers fetched for the version.
+
+        :param version: current plugin version
+        :return:
+        """
+        cached = self._providers_cache.get(self.tenant_id)
+        if cached is None or cached[0] != version:
+            return None
+        return cast(list["PluginModelProviderEntity"], cached[1])
+
+    def set_providers(self, version: str, providers: list["PluginModelProviderEntity"]) -> None:
+        """
+        Cache plugin model providers fetched for the version.
+
+        :param version: plugin version read before the providers were fetched
+        :param providers: plugin model providers
+        :return:
+        """
+        self._providers_cache.put(self.tenant_id, (version, providers))
+
+    @staticmethod
+    def get_schema_key(plugin_id: str, provider: str, model_type: str, model: str, credentials: Optional[dict]) -> str:
+        """
+        Get the cache key of a model schema, credentials are part of it as a fingerprint.
+
+        :return:
+        """
+        fingerprint = hashlib.sha256(
+            json.dumps(credentials or {}, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{plugin_id}:{provider}:{model_type}:{model}:{fingerprint}"
+
+    def get_schema(self, version: str, schema_key: str) -> Optional["AIModelEntity"]:
+        """
+        Get a cached model schema fetched for the version.
+
+        :param version: current plugin version
+        :param schema_key: key from get_schema_key
+        :return:
+        """
+        cached = self._schemas_cache.get((self.tenant_id, schema_key))
+        if cached is None or cached[0] != version:
+            return None
+        return cast("AIModelEntity", cached[1])
+
+    def set_schema(self, version: str, schema_key: str, schema: "AIModelEntity") -> None:
+        """
+        Cache a model schema fetched for the version.
+
+        :param version: plugin version read before the schema was fetched
+        :param schema_key: key from get_schema_key
+        :param schema: model schema
+        :return:
+        """
+        self._schemas_cache.put((self.tenant_id, schema_key), (version, schema))
+
+    def delete(self) -> None:
+        """
+        Invalidate the cached plugin model providers and schemas of the tenant in every process,
+        along with the provider configurations built from them.
+
+        :return:
+        """
+        self._providers_cache.delete(self.tenant_id)
+        redis_client.incr(self.version_key)
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).delete()
+
+    def delete_for_finished_task(self, task_id: str) -> None:
+        """
+        Invalidate the cached plugin model providers and schemas of the tenant once for a finished plugin
+        installation task, fetching the task again does not invalidate them again.
+
+        :param task_id: installation task id
+        :return:
+        """
+        marker_key = f"plugin_models_invalidated:tenant_id:{self.tenant_id}:task_id:{task_id}"
+        if redis_client.set(marker_key, 1, ex=86400, nx=True):
+            self.delete()
+
+
+def _get_version(version_key: str) -> Optional[str]:
+    try:
+        version = redis_client.get(version_key)
+    except Exception:
+        logger.warning(f"Failed to get cache version {version_key}", exc_info=True)
+        return None
+    return version.decode("utf-8") if version else "0"
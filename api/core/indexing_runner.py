@@ -38,6 +38,7 @@ from libs import helper
 from models.dataset import ChildChunk, Dataset, DatasetProcessRule, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import UploadFile
+from services.entities.knowledge_entities.knowledge_entities import ParentMode, Rule
 from services.feature_service import FeatureService
 
 
@@ -66,6 +67,10 @@ class IndexingRunner:
                     raise ValueError("no process rule found")
                 index_type = dataset_document.doc_form
                 index_processor = IndexProcessorFactory(index_type).init_index_processor()
+                if self._can_run_pipeline(dataset_document, processing_rule.to_dict()):
+                    self._run_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict())
+                    continue
+
                 # extract
                 text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
@@ -113,6 +118,18 @@ class IndexingRunner:
                 dataset_id=dataset.id, document_id=dataset_document.id
             ).all()
 
+            index_type = dataset_document.doc_form
+            index_processor = IndexProcessorFactory(index_type).init_index_processor()
+
+            # the batches the indexing pipeline loaded before it stopped are already in the index
+            completed_node_ids = [
+                document_segment.index_node_id
+                for document_segment in document_segments
+                if document_segment.status == "completed"
+            ]
+            if completed_node_ids:
+                index_processor.clean(dataset, completed_node_ids, with_keywords=True)
+
             for document_segment in document_segments:
                 db.session.delete(document_segment)
                 if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
@@ -128,8 +145,10 @@ class IndexingRunner:
             if not processing_rule:
                 raise ValueError("no process rule found")
 
-            index_type = dataset_document.doc_form
-            index_processor = IndexProcessorFactory(index_type).init_index_processor()
+            if self._can_run_pipeline(dataset_document, processing_rule.to_dict()):
+                self._run_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict())
+                return
+
             # extract
             text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
@@ -687,6 +706,17 @@ class IndexingRunner:
         doc_language: str,
         process_rule: dict,
     ) -> list[Document]:
+        documents = index_processor.transform(
+            text_docs,
+            embedding_model_instance=self._get_transform_embedding_model_instance(dataset),
+            process_rule=process_rule,
+            tenant_id=dataset.tenant_id,
+            doc_language=doc_language,
+        )
+
+        return documents
+
+    def _get_transform_embedding_model_instance(self, dataset: Dataset) -> Optional[ModelInstance]:
         # get embedding model instance
         embedding_model_instance = None
         if dataset.indexing_technique == "high_quality":
@@ -702,16 +732,7 @@ class IndexingRunner:
                     tenant_id=dataset.tenant_id,
                     model_type=ModelType.TEXT_EMBEDDING,
                 )
-
-        documents = index_processor.transform(
-            text_docs,
-            embedding_model_instance=embedding_model_instance,
-            process_rule=process_rule,
-            tenant_id=dataset.tenant_id,
-            doc_language=doc_language,
-        )
-
-        return documents
+        return embedding_model_instance
 
     def _load_segments(self, dataset, dataset_document, documents):
         # save node to document segment
@@ -743,6 +764,203 @@ class IndexingRunner:
         )
         pass
 
+    @staticmethod
+    def _can_run_pipeline(dataset_document: DatasetDocument, process_rule: dict) -> bool:
+        """
+        Whether the document can be indexed by the pipeline, a full-doc parent chunk needs every page before it is split
+        """
+        if not dify_config.INDEXING_PIPELINE_ENABLED:
+            return False
+        if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX and process_rule.get("rules"):
+            return Rule(**process_rule["rules"]).parent_mode != ParentMode.FULL_DOC
+        return True
+
+    def _run_pipeline(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+    ) -> None:
+        """
+        Index the document in batches of INDEXING_PIPELINE_BATCH_SIZE chunks.
+        The extracted pages are split and saved batch by batch while a bounded pool embeds and loads the saved
+        batches, splitting waits once INDEXING_PIPELINE_MAX_PENDING_BATCHES batches are not loaded yet. Every batch
+        marks its segments completed when it is loaded, so once the document is in indexing status a resumed run
+        only loads the batches that did not finish.
+        """
+        flask_app = current_app._get_current_object()  # type: ignore
+        metrics = IndexingPipelineMetrics(dataset_document.id)
+
+        extract_start_at = time.perf_counter()
+        text_docs = self._extract(index_processor, dataset_document, process_rule)
+        metrics.extract.add(time.perf_counter() - extract_start_at, len(text_docs))
+
+        transform_embedding_model_instance = self._get_transform_embedding_model_instance(dataset)
+        embedding_model_instance = None
+        if dataset.indexing_technique == "high_quality":
+            embedding_model_instance = self.model_manager.get_model_instance(
+                tenant_id=dataset.tenant_id,
+                provider=dataset.embedding_model_provider,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=dataset.embedding_model,
+            )
+        doc_store = DatasetDocumentStore(
+            dataset=dataset, user_id=dataset_document.created_by, document_id=dataset_document.id
+        )
+
+        indexing_start_at = time.perf_counter()
+        pending_batches = threading.BoundedSemaphore(dify_config.INDEXING_PIPELINE_MAX_PENDING_BATCHES)
+        futures: list[concurrent.futures.Future] = []
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=dify_config.INDEXING_PIPELINE_MAX_WORKERS, thread_name_prefix="indexing_pipeline"
+        )
+
+        def submit(batch: list[Document]) -> None:
+            wait_start_at = time.perf_counter()
+            pending_batches.acquire()
+            metrics.backpressure.add(time.perf_counter() - wait_start_at, len(batch))
+            for future in futures:
+                # stop splitting as soon as a batch failed or the document was paused
+                if future.done() and future.exception():
+                    pending_batches.release()
+                    future.result()
+
+            save_start_at = time.perf_counter()
+            self._check_document_paused_status(dataset_document.id)
+            doc_store.add_documents(docs=batch, save_child=dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX)
+            DocumentSegment.query.filter(
+                DocumentSegment.document_id == dataset_document.id,
+                DocumentSegment.index_node_id.in_([document.metadata["doc_id"] for document in batch]),
+            ).update(
+                {
+                    DocumentSegment.status: "indexing",
+                    DocumentSegment.indexing_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                },
+                synchronize_session=False,
+            )
+            db.session.commit()
+            metrics.save.add(time.perf_counter() - save_start_at, len(batch))
+
+            future = executor.submit(
+                self._load_batch,
+                flask_app,
+                index_processor,
+                batch,
+                dataset,
+                dataset_document,
+                embedding_model_instance,
+                metrics,
+            )
+            future.add_done_callback(lambda _: pending_batches.release())
+            futures.append(future)
+
+        try:
+            batch: list[Document] = []
+            for text_doc in text_docs:
+                transform_start_at = time.perf_counter()
+                documents = index_processor.transform(
+                    [text_doc],
+                    embedding_model_instance=transform_embedding_model_instance,
+                    process_rule=process_rule,
+                    tenant_id=dataset.tenant_id,
+                    doc_language=dataset_document.doc_language,
+                )
+                metrics.transform.add(time.perf_counter() - transform_start_at, len(documents))
+
+                batch.extend(documents)
+                while len(batch) >= dify_config.INDEXING_PIPELINE_BATCH_SIZE:
+                    submit(batch[: dify_config.INDEXING_PIPELINE_BATCH_SIZE])
+                    batch = batch[dify_config.INDEXING_PIPELINE_BATCH_SIZE :]
+            if batch:
+                submit(batch)
+
+            # every segment is saved, a resumed run only has to load the batches left
+            cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            self._update_document_index_status(
+                document_id=dataset_document.id,
+                after_indexing_status="indexing",
+                extra_update_params={
+                    DatasetDocument.cleaning_completed_at: cur_time,
+                    DatasetDocument.splitting_completed_at: cur_time,
+                },
+            )
+
+            tokens = sum(future.result() for future in futures)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+        logging.info(f"Indexing pipeline finished {len(futures)} batches, {metrics}")
+
+    def _load_batch(
+        self,
+        flask_app,
+        index_processor: BaseIndexProcessor,
+        documents: list[Document],
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        embedding_model_instance: Optional[ModelInstance],
+        metrics: "IndexingPipelineMetrics",
+    ) -> int:
+        load_start_at = time.perf_counter()
+        tokens = 0
+        if dataset.indexing_technique == "high_quality":
+            tokens = self._process_chunk(
+                flask_app, index_processor, documents, dataset, dataset_document, embedding_model_instance
+            )
+        if dataset_document.doc_form != IndexType.PARENT_CHILD_INDEX:
+            self._process_keyword_index(flask_app, dataset.id, dataset_document.id, documents)
+        metrics.load.add(time.perf_counter() - load_start_at, len(documents))
+        return tokens
+
+
+class IndexingPipelineStageMetrics:
+    """Busy time and number of items of one stage of the indexing pipeline."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.seconds = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, count: int) -> None:
+        with self._lock:
+            self.seconds += seconds
+            self.count += count
+
+    def __str__(self) -> str:
+        throughput = self.count / self.seconds if self.seconds else 0.0
+        return f"{self.name} {self.count} {self.unit} in {self.seconds:.2f}s ({throughput:.1f}/s)"
+
+
+class IndexingPipelineMetrics:
+    """Per stage metrics of the indexing pipeline run of one document."""
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self.extract = IndexingPipelineStageMetrics("extract", "pages")
+        self.transform = IndexingPipelineStageMetrics("transform", "chunks")
+        self.backpressure = IndexingPipelineStageMetrics("backpressure wait", "chunks")
+        self.save = IndexingPipelineStageMetrics("save", "chunks")
+        self.load = IndexingPipelineStageMetrics("embed and load", "chunks")
+
+    def __str__(self) -> str:
+        stages = (self.extract, self.transform, self.backpressure, self.save, self.load)
+        return f"document {self.document_id}: " + ", ".join(str(stage) for stage in stages)
+
 
 class DocumentIsPausedError(Exception):
     pass
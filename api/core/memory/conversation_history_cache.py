@@ -0,0 +1,60 @@
+from typing import Optional, cast
+
+from configs import dify_config
+from core.helper.lru_cache import TTLLRUCache
+from core.model_runtime.entities import PromptMessage
+
+
+class CachedHistoryMessage:
+    """
+    Prompt messages prepared from one message of a conversation
+    """
+
+    def __init__(self, prompt_messages: list[PromptMessage]) -> None:
+        self.prompt_messages = prompt_messages
+        # characters of the query and answer, they make up most of the memory the entry takes
+        self.text_size = sum(len(m.content) for m in prompt_messages if isinstance(m.content, str))
+        # local token counts of the prompt messages, by tokenizer encoding
+        self.num_tokens: dict[str, list[int]] = {}
+
+
+class ConversationHistoryCache:
+    """
+    Process-local cache of the prompt messages prepared from the messages of a conversation, bounded by the number
+    of messages and by the total size of their text.
+    Messages are only appended to a conversation, regenerating or editing a message creates a new message in
+    another thread, and the answer of a message is saved once, so the prompt messages of a message that has its
+    answer never change. Messages still waiting for their answer are not cached.
+    """
+
+    _cache = TTLLRUCache(
+        capacity=dify_config.CONVERSATION_HISTORY_CACHE_SIZE,
+        ttl=dify_config.CONVERSATION_HISTORY_CACHE_TTL,
+        max_weight=dify_config.CONVERSATION_HISTORY_CACHE_MAX_TEXT_SIZE,
+        weigh=lambda cached: cached.text_size,
+    )
+
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+
+    def get(self, message_id: str) -> Optional[CachedHistoryMessage]:
+        """
+        Get the cached prompt messages of a message.
+
+        :param message_id: message id
+        :return:
+        """
+        cached = self._cache.get((self.conversation_id, message_id))
+        if cached is None:
+            return None
+        return cast(CachedHistoryMessage, cached)
+
+    def set(self, message_id: str, cached: CachedHistoryMessage) -> None:
+        """
+        Cache the prompt messages of a message.
+
+        :param message_id: message id
+        :param cached: prompt messages prepared from the message
+        :return:
+        """
+        self._cache.put((self.conversation_id, message_id), cached)
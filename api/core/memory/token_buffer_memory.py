@@ -1,8 +1,9 @@
 from collections.abc import Sequence
-from typing import Optional
+from typing import Any, Optional
 
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
-from core.file import file_manager
+from core.file import FileUploadConfig, file_manager
+from core.memory.conversation_history_cache import CachedHistoryMessage, ConversationHistoryCache
 from core.model_manager import ModelInstance
 from core.model_runtime.entities import (
     AssistantPromptMessage,
@@ -13,6 +14,7 @@ from core.model_runtime.entities import (
     TextPromptMessageContent,
     UserPromptMessage,
 )
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
 from core.prompt.utils.extract_thread_messages import extract_thread_messages
 from extensions.ext_database import db
 from factories import file_factory
@@ -33,17 +35,13 @@ class TokenBufferMemory:
         :param max_token_limit: max token limit
         :param message_limit: message limit
         """
-        app_record = self.conversation.app
-
         # fetch limited messages, and return reversed
+        # only what finding the thread needs, the contents are loaded for the messages that are not cached yet
         query = (
             db.session.query(
                 Message.id,
-                Message.query,
-                Message.answer,
-                Message.created_at,
-                Message.workflow_run_id,
                 Message.parent_message_id,
+                (Message.answer != "").label("has_answer"),
             )
             .filter(
                 Message.conversation_id == self.conversation.id,
@@ -63,71 +61,192 @@ class TokenBufferMemory:
         thread_messages = extract_thread_messages(messages)
 
         # for newly created message, its answer is temporarily empty, we don't need to add it to memory
-        if thread_messages and not thread_messages[0].answer:
+        if thread_messages and not thread_messages[0].has_answer:
             thread_messages.pop(0)
 
         messages = list(reversed(thread_messages))
 
-        prompt_messages: list[PromptMessage] = []
+        history_cache = ConversationHistoryCache(self.conversation.id)
+        history: dict[str, CachedHistoryMessage] = {}
         for message in messages:
-            files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
-            if files:
-                file_extra_config = None
-                if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
-                    file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
-                else:
-                    if message.workflow_run_id:
-                        workflow_run = (
-                            db.session.query(WorkflowRun).filter(WorkflowRun.id == message.workflow_run_id).first()
-                        )
+            cached = history_cache.get(message.id)
+            if cached is not None:
+                history[message.id] = cached
+        missing_messages = [message for message in messages if message.id not in history]
+        if missing_messages:
+            history.update(self._build_history_messages(missing_messages, history_cache))
+
+        history_messages = [history[message.id] for message in messages if message.id in history]
+        if not history_messages:
+            return []
+
+        # count the tokens of every message once, the counts are kept with the cached prompt messages
+        encoding_name = LocalTokenizer.get_encoding_name(self.model_instance.model)
+        uncounted = [cached for cached in history_messages if encoding_name not in cached.num_tokens]
+        if uncounted:
+            num_tokens = LocalTokenizer.get_message_num_tokens(
+                self.model_instance.model, [m for cached in uncounted for m in cached.prompt_messages]
+            )
+            offset = 0
+            for cached in uncounted:
+                cached.num_tokens[encoding_name] = num_tokens[offset : offset + len(cached.prompt_messages)]
+                offset += len(cached.prompt_messages)
+
+        # cached prompt messages are shared between requests, hand out copies
+        prompt_messages: list[PromptMessage] = [
+            m.model_copy() for cached in history_messages for m in cached.prompt_messages
+        ]
+        message_tokens = [n for cached in history_messages for n in cached.num_tokens[encoding_name]]
+
+        # prune the chat message if it exceeds the max token limit
+        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
 
-                        if workflow_run and workflow_run.workflow:
-                            file_extra_config = FileUploadConfigManager.convert(
-                                workflow_run.workflow.features_dict, is_vision=False
-                            )
+        if curr_message_tokens > max_token_limit:
+            prompt_messages = self._prune_prompt_messages(
+                prompt_messages, curr_message_tokens, max_token_limit, message_tokens
+            )
+
+        return prompt_messages
 
-                detail = ImagePromptMessageContent.DETAIL.LOW
-                if file_extra_config and app_record:
-                    file_objs = file_factory.build_from_message_files(
-                        message_files=files, tenant_id=app_record.tenant_id, config=file_extra_config
+    def _build_history_messages(
+        self, messages: Sequence[Any], history_cache: ConversationHistoryCache
+    ) -> dict[str, CachedHistoryMessage]:
+        """
+        Build the prompt messages of messages, loading their contents, files and workflow runs in bulk.
+        :param messages: messages of the thread, with their id
+        :param history_cache: history cache of the conversation, the built prompt messages of answered messages
+            without files are added
+        """
+        message_ids = [message.id for message in messages]
+        contents = {
+            row.id: row
+            for row in db.session.query(Message.id, Message.query, Message.answer, Message.workflow_run_id)
+            .filter(Message.id.in_(message_ids))
+            .all()
+        }
+
+        message_files: dict[str, list[MessageFile]] = {}
+        for message_file in db.session.query(MessageFile).filter(MessageFile.message_id.in_(message_ids)).all():
+            message_files.setdefault(message_file.message_id, []).append(message_file)
+
+        file_extra_configs: dict[str, Optional[FileUploadConfig]] = {}
+        if message_files:
+            if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
+                file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
+                file_extra_configs = dict.fromkeys(message_files, file_extra_config)
+            else:
+                workflow_run_ids = {
+                    contents[message_id].workflow_run_id
+                    for message_id in message_files
+                    if message_id in contents and contents[message_id].workflow_run_id
+                }
+                workflow_runs: dict[str, WorkflowRun] = {}
+                if workflow_run_ids:
+                    workflow_runs = {
+                        workflow_run.id: workflow_run
+                        for workflow_run in db.session.query(WorkflowRun)
+                        .filter(WorkflowRun.id.in_(workflow_run_ids))
+                        .all()
+                    }
+                for message_id in message_files:
+                    workflow_run = (
+                        workflow_runs.get(contents[message_id].workflow_run_id) if message_id in contents else None
                     )
-                    if file_extra_config.image_config and file_extra_config.image_config.detail:
-                        detail = file_extra_config.image_config.detail
-                else:
-                    file_objs = []
-
-                if not file_objs:
-                    prompt_messages.append(UserPromptMessage(content=message.query))
-                else:
-                    prompt_message_contents: list[PromptMessageContent] = []
-                    prompt_message_contents.append(TextPromptMessageContent(data=message.query))
-                    for file in file_objs:
-                        prompt_message = file_manager.to_prompt_message_content(
-                            file,
-                            image_detail_config=detail,
+                    if workflow_run and workflow_run.workflow:
+                        file_extra_configs[message_id] = FileUploadConfigManager.convert(
+                            workflow_run.workflow.features_dict, is_vision=False
                         )
-                        prompt_message_contents.append(prompt_message)
 
-                    prompt_messages.append(UserPromptMessage(content=prompt_message_contents))
+        history: dict[str, CachedHistoryMessage] = {}
+        for message in messages:
+            content = contents.get(message.id)
+            if not content:
+                continue
 
-            else:
-                prompt_messages.append(UserPromptMessage(content=message.query))
+            files = message_files.get(message.id)
+            cached = CachedHistoryMessage(
+                prompt_messages=[
+                    self._build_user_prompt_message(content.query, files, file_extra_configs.get(message.id)),
+                    AssistantPromptMessage(content=content.answer),
+                ],
+            )
+            # prompt messages with files carry signed file urls or file data, they are built again every time;
+            # a message without an answer yet, e.g. one still being generated, gets it saved later
+            if content.answer and not files:
+                history_cache.set(message.id, cached)
+            history[message.id] = cached
 
-            prompt_messages.append(AssistantPromptMessage(content=message.answer))
+        return history
 
-        if not prompt_messages:
-            return []
+    def _build_user_prompt_message(
+        self, query: str, files: Optional[list[MessageFile]], file_extra_config: Optional[FileUploadConfig]
+    ) -> UserPromptMessage:
+        app_record = self.conversation.app
+        if not files:
+            return UserPromptMessage(content=query)
 
-        # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        detail = ImagePromptMessageContent.DETAIL.LOW
+        if file_extra_config and app_record:
+            file_objs = file_factory.build_from_message_files(
+                message_files=files, tenant_id=app_record.tenant_id, config=file_extra_config
+            )
+            if file_extra_config.image_config and file_extra_config.image_config.detail:
+                detail = file_extra_config.image_config.detail
+        else:
+            file_objs = []
 
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        if not file_objs:
+            return UserPromptMessage(content=query)
 
-        return prompt_messages
+        prompt_message_contents: list[PromptMessageContent] = []
+        prompt_message_contents.append(TextPromptMessageContent(data=query))
+        for file in file_objs:
+            prompt_message = file_manager.to_prompt_message_content(
+                file,
+                image_detail_config=detail,
+            )
+            prompt_message_contents.append(prompt_message)
+
+        return UserPromptMessage(content=prompt_message_contents)
+
+    def _prune_prompt_messages(
+        self,
+        prompt_messages: list[PromptMessage],
+        curr_message_tokens: int,
+        max_token_limit: int,
+        message_tokens: Optional[list[int]] = None,
+    ) -> list[PromptMessage]:
+        """
+        Drop the oldest prompt messages until the rest fits in the max token limit.
+        Every message is counted once by the local tokenizer, scaled to the model count, to estimate how many
+        messages to drop; the model only counts the messages kept around the estimated cut.
+        :param prompt_messages: prompt messages
+        :param curr_message_tokens: number of tokens of all prompt messages, counted by the model
+        :param max_token_limit: max token limit
+        :param message_tokens: local token counts of the prompt messages, counted here when not given
+        """
+        if message_tokens is None:
+            message_tokens = LocalTokenizer.get_message_num_tokens(self.model_instance.model, prompt_messages)
+        ratio = curr_message_tokens / max(sum(message_tokens), 1)
+
+        start = 0
+        estimated_tokens = float(curr_message_tokens)
+        while estimated_tokens > max_token_limit and start < len(prompt_messages) - 1:
+            estimated_tokens -= message_tokens[start] * ratio
+            start += 1
+
+        # the estimate only approximates the model count, move the cut until it is where counting all the way
+        # from the oldest message would have put it
+        last = len(prompt_messages) - 1
+        if start < last and self.model_instance.get_llm_num_tokens(prompt_messages[start:]) > max_token_limit:
+            start += 1
+            while start < last and self.model_instance.get_llm_num_tokens(prompt_messages[start:]) > max_token_limit:
+                start += 1
+        else:
+            while start > 0 and self.model_instance.get_llm_num_tokens(prompt_messages[start - 1 :]) <= max_token_limit:
+                start -= 1
+
+        return prompt_messages[start:]
 
     def get_history_prompt_text(
         self,
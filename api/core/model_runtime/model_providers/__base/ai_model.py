@@ -6,6 +6,8 @@ from typing import Optional
 from pydantic import BaseModel, ConfigDict, Field
 
 import contexts
+from configs import dify_config
+from core.helper.model_provider_cache import PluginModelCache
 from core.model_runtime.entities.common_entities import I18nObject
 from core.model_runtime.entities.defaults import PARAMETER_RULE_TEMPLATE
 from core.model_runtime.entities.model_entities import (
@@ -157,15 +159,24 @@ class AIModel(BaseModel):
             if cache_key in contexts.plugin_model_schemas.get():
                 return contexts.plugin_model_schemas.get()[cache_key]
 
-            schema = plugin_model_manager.get_model_schema(
-                tenant_id=self.tenant_id,
-                user_id="unknown",
-                plugin_id=self.plugin_id,
-                provider=self.provider_name,
-                model_type=self.model_type.value,
-                model=model,
-                credentials=credentials or {},
+            plugin_model_cache = PluginModelCache(tenant_id=self.tenant_id)
+            schema_key = plugin_model_cache.get_schema_key(
+                self.plugin_id, self.provider_name, self.model_type.value, model, credentials
             )
+            version = plugin_model_cache.get_version()
+            schema = plugin_model_cache.get_schema(version, schema_key) if version is not None else None
+            if schema is None:
+                schema = plugin_model_manager.get_model_schema(
+                    tenant_id=self.tenant_id,
+                    user_id="unknown",
+                    plugin_id=self.plugin_id,
+                    provider=self.provider_name,
+                    model_type=self.model_type.value,
+                    model=model,
+                    credentials=credentials or {},
+                )
+                if schema and version is not None:
+                    plugin_model_cache.set_schema(version, schema_key, schema)
 
             if schema:
                 contexts.plugin_model_schemas.get()[cache_key] = schema
@@ -254,6 +265,16 @@ class AIModel(BaseModel):
 
         return default_parameter_rule
 
+    def _can_count_tokens_locally(self) -> bool:
+        """
+        Whether the token counts of this model may be estimated with the local tokenizers,
+        see MODEL_LOCAL_TOKEN_COUNT_PROVIDERS
+
+        :return:
+        """
+        providers = dify_config.MODEL_LOCAL_TOKEN_COUNT_PROVIDERS_SET
+        return "*" in providers or f"{self.plugin_id}/{self.provider_name}" in providers
+
     def _get_num_tokens_by_gpt2(self, text: str) -> int:
         """
         Get number of tokens for given prompt messages by gpt2
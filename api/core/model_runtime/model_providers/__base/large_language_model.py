@@ -19,6 +19,7 @@ from core.model_runtime.entities.model_entities import (
     PriceType,
 )
 from core.model_runtime.model_providers.__base.ai_model import AIModel
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
 from core.plugin.manager.model import PluginModelManager
 
 logger = logging.getLogger(__name__)
@@ -295,6 +296,9 @@ class LargeLanguageModel(AIModel):
         :param tools: tools for tool calling
         :return:
         """
+        if self._can_count_tokens_locally():
+            return LocalTokenizer.get_num_tokens(model, prompt_messages, tools)
+
         plugin_model_manager = PluginModelManager()
         return plugin_model_manager.get_llm_num_tokens(
             tenant_id=self.tenant_id,
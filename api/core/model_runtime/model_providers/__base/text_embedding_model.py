@@ -6,6 +6,7 @@ from core.entities.embedding_type import EmbeddingInputType
 from core.model_runtime.entities.model_entities import ModelPropertyKey, ModelType
 from core.model_runtime.entities.text_embedding_entities import TextEmbeddingResult
 from core.model_runtime.model_providers.__base.ai_model import AIModel
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
 from core.plugin.manager.model import PluginModelManager
 
 
@@ -61,6 +62,9 @@ class TextEmbeddingModel(AIModel):
         :param texts: texts to embed
         :return:
         """
+        if self._can_count_tokens_locally():
+            return LocalTokenizer.get_num_tokens_batch(model, texts)
+
         plugin_model_manager = PluginModelManager()
         return plugin_model_manager.get_text_embedding_num_tokens(
             tenant_id=self.tenant_id,
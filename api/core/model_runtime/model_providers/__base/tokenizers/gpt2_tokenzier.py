@@ -27,9 +27,21 @@ class GPT2Tokenizer:
         # return cast(int, result)
         return GPT2Tokenizer._get_num_tokens_by_gpt2(text)
 
+    @staticmethod
+    def get_num_tokens_batch(texts: list[str]) -> list[int]:
+        """
+        use gpt2 tokenizer to get num tokens of every text, encoding them in one batch when tiktoken is available
+        """
+        _tokenizer = GPT2Tokenizer.get_encoder()
+        if hasattr(_tokenizer, "encode_ordinary_batch"):
+            return [len(tokens) for tokens in _tokenizer.encode_ordinary_batch(texts)]
+        return [len(_tokenizer.encode(text)) for text in texts]
+
     @staticmethod
     def get_encoder() -> Any:
         global _tokenizer, _lock
+        if _tokenizer is not None:
+            return _tokenizer
         with _lock:
             if _tokenizer is None:
                 # Try to use tiktoken to get the tokenizer because it is faster
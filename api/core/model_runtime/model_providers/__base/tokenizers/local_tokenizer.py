@@ -0,0 +1,123 @@
+import json
+import logging
+from collections.abc import Sequence
+from threading import Lock
+from typing import Any, Optional
+
+from core.model_runtime.entities.message_entities import (
+    AssistantPromptMessage,
+    PromptMessage,
+    PromptMessageTool,
+    TextPromptMessageContent,
+)
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
+
+logger = logging.getLogger(__name__)
+
+_encoders: dict[str, Any] = {}
+_lock = Lock()
+
+# overhead of the chat format, as counted for the OpenAI chat models
+_TOKENS_PER_MESSAGE = 3
+_TOKENS_PER_NAME = 1
+_TOKENS_PER_REPLY = 3
+
+
+class LocalTokenizer:
+    """
+    Registry of the local tiktoken encoders, selected by model name, for estimating token counts without
+    asking the model provider. Models tiktoken does not know are counted with the GPT-2 encoding.
+    """
+
+    @staticmethod
+    def get_encoding_name(model: str) -> str:
+        try:
+            import tiktoken
+
+            return tiktoken.encoding_name_for_model(model)
+        except Exception:
+            return "gpt2"
+
+    @staticmethod
+    def get_encoder(model: str) -> Any:
+        encoding_name = LocalTokenizer.get_encoding_name(model)
+        encoder = _encoders.get(encoding_name)
+        if encoder is not None:
+            return encoder
+        with _lock:
+            if encoding_name not in _encoders:
+                if encoding_name == "gpt2":
+                    _encoders[encoding_name] = GPT2Tokenizer.get_encoder()
+                else:
+                    try:
+                        import tiktoken
+
+                        _encoders[encoding_name] = tiktoken.get_encoding(encoding_name)
+                    except Exception:
+                        # the encoding files could not be loaded, e.g. offline, keep estimating with GPT-2
+                        logger.warning(f"Failed to load tiktoken encoding {encoding_name}, fallback to gpt2")
+                        _encoders[encoding_name] = GPT2Tokenizer.get_encoder()
+            return _encoders[encoding_name]
+
+    @staticmethod
+    def get_num_tokens_batch(model: str, texts: Sequence[str]) -> list[int]:
+        """
+        Get number of tokens of every text, encoding them in one batch when tiktoken is available
+        """
+        if not texts:
+            return []
+        encoder = LocalTokenizer.get_encoder(model)
+        if hasattr(encoder, "encode_ordinary_batch"):
+            return [len(tokens) for tokens in encoder.encode_ordinary_batch(list(texts))]
+        return [len(encoder.encode(text)) for text in texts]
+
+    @staticmethod
+    def get_message_num_tokens(model: str, prompt_messages: Sequence[PromptMessage]) -> list[int]:
+        """
+        Get number of tokens of every prompt message, the text of all messages is encoded in one batch.
+        Only the text contents are counted, like the provider side estimates do.
+        """
+        texts: list[str] = []
+        owners: list[int] = []
+        for index, prompt_message in enumerate(prompt_messages):
+            for text in LocalTokenizer._get_message_texts(prompt_message):
+                texts.append(text)
+                owners.append(index)
+
+        message_tokens = [
+            _TOKENS_PER_MESSAGE + (_TOKENS_PER_NAME if prompt_message.name else 0) for prompt_message in prompt_messages
+        ]
+        for index, num_tokens in zip(owners, LocalTokenizer.get_num_tokens_batch(model, texts)):
+            message_tokens[index] += num_tokens
+        return message_tokens
+
+    @staticmethod
+    def get_num_tokens(
+        model: str, prompt_messages: Sequence[PromptMessage], tools: Optional[Sequence[PromptMessageTool]] = None
+    ) -> int:
+        """
+        Get number of tokens of a prompt, the messages and the tools they may call
+        """
+        num_tokens = sum(LocalTokenizer.get_message_num_tokens(model, prompt_messages)) + _TOKENS_PER_REPLY
+        if tools:
+            num_tokens += sum(
+                LocalTokenizer.get_num_tokens_batch(model, [json.dumps(tool.model_dump()) for tool in tools])
+            )
+        return num_tokens
+
+    @staticmethod
+    def _get_message_texts(prompt_message: PromptMessage) -> list[str]:
+        texts = [prompt_message.role.value]
+        if prompt_message.name:
+            texts.append(prompt_message.name)
+        if isinstance(prompt_message.content, str):
+            texts.append(prompt_message.content)
+        elif prompt_message.content:
+            texts.extend(
+                content.data for content in prompt_message.content if isinstance(content, TextPromptMessageContent)
+            )
+        if isinstance(prompt_message, AssistantPromptMessage):
+            texts.extend(
+                tool_call.function.name + tool_call.function.arguments for tool_call in prompt_message.tool_calls
+            )
+        return texts
@@ -8,6 +8,7 @@ from typing import Optional
 from pydantic import BaseModel
 
 import contexts
+from core.helper.model_provider_cache import PluginModelCache
 from core.helper.position_helper import get_provider_position_map, sort_to_dict_by_position_map
 from core.model_runtime.entities.model_entities import AIModelEntity, ModelType
 from core.model_runtime.entities.provider_entities import ProviderConfig, ProviderEntity, SimpleProviderEntity
@@ -88,6 +89,14 @@ class ModelProviderFactory:
             if plugin_model_providers is not None:
                 return plugin_model_providers
 
+            plugin_model_cache = PluginModelCache(tenant_id=self.tenant_id)
+            version = plugin_model_cache.get_version()
+            if version is not None:
+                cached_plugin_model_providers = plugin_model_cache.get_providers(version)
+                if cached_plugin_model_providers is not None:
+                    contexts.plugin_model_providers.set(cached_plugin_model_providers)
+                    return cached_plugin_model_providers
+
             plugin_model_providers = []
             contexts.plugin_model_providers.set(plugin_model_providers)
 
@@ -98,6 +107,9 @@ class ModelProviderFactory:
                 provider.declaration.provider = provider.plugin_id + "/" + provider.declaration.provider
                 plugin_model_providers.append(provider)
 
+            if version is not None:
+                plugin_model_cache.set_providers(version, plugin_model_providers)
+
             return plugin_model_providers
 
     def get_provider_schema(self, provider: str) -> ProviderEntity:
@@ -222,15 +234,24 @@ class ModelProviderFactory:
             if cache_key in contexts.plugin_model_schemas.get():
                 return contexts.plugin_model_schemas.get()[cache_key]
 
-            schema = self.plugin_model_manager.get_model_schema(
-                tenant_id=self.tenant_id,
-                user_id="unknown",
-                plugin_id=plugin_id,
-                provider=provider_name,
-                model_type=model_type.value,
-                model=model,
-                credentials=credentials or {},
+            plugin_model_cache = PluginModelCache(tenant_id=self.tenant_id)
+            schema_key = plugin_model_cache.get_schema_key(
+                plugin_id, provider_name, model_type.value, model, credentials
             )
+            version = plugin_model_cache.get_version()
+            schema = plugin_model_cache.get_schema(version, schema_key) if version is not None else None
+            if schema is None:
+                schema = self.plugin_model_manager.get_model_schema(
+                    tenant_id=self.tenant_id,
+                    user_id="unknown",
+                    plugin_id=plugin_id,
+                    provider=provider_name,
+                    model_type=model_type.value,
+                    model=model,
+                    credentials=credentials or {},
+                )
+                if schema and version is not None:
+                    plugin_model_cache.set_schema(version, schema_key, schema)
 
             if schema:
                 contexts.plugin_model_schemas.get()[cache_key] = schema
@@ -28,6 +28,7 @@ from core.ops.langfuse_trace.entities.langfuse_trace_entity import (
     UnitEnum,
 )
 from core.ops.utils import filter_none_values
+from core.workflow.payload_storage import WorkflowPayloadStorage
 from extensions.ext_database import db
 from models.model import EndUser
 from models.workflow import WorkflowNodeExecution
@@ -147,12 +148,10 @@ class LangFuseDataTrace(BaseTraceInstance):
             node_type = node_execution.node_type
             status = node_execution.status
             if node_type == "llm":
-                inputs = (
-                    json.loads(node_execution.process_data).get("prompts", {}) if node_execution.process_data else {}
-                )
+                inputs = (WorkflowPayloadStorage.load(node_execution.process_data) or {}).get("prompts", {})
             else:
-                inputs = json.loads(node_execution.inputs) if node_execution.inputs else {}
-            outputs = json.loads(node_execution.outputs) if node_execution.outputs else {}
+                inputs = WorkflowPayloadStorage.load(node_execution.inputs) or {}
+            outputs = WorkflowPayloadStorage.load(node_execution.outputs) or {}
             created_at = node_execution.created_at or datetime.now()
             elapsed_time = node_execution.elapsed_time
             finished_at = created_at + timedelta(seconds=elapsed_time)
@@ -169,7 +168,7 @@ class LangFuseDataTrace(BaseTraceInstance):
                     "status": status,
                 }
             )
-            process_data = json.loads(node_execution.process_data) if node_execution.process_data else {}
+            process_data = WorkflowPayloadStorage.load(node_execution.process_data) or {}
             model_provider = process_data.get("model_provider", None)
             model_name = process_data.get("model_name", None)
             if model_provider is not None and model_name is not None:
@@ -1,11 +1,13 @@
 import inspect
 import json
 import logging
+import threading
 from collections.abc import Callable, Generator
-from typing import TypeVar
+from typing import Optional, TypeVar
 
 import requests
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 from yarl import URL
 
 from configs import dify_config
@@ -38,6 +40,25 @@ logger = logging.getLogger(__name__)
 
 
 class BasePluginManager:
+    # shared by all managers of the process so requests reuse keep-alive connections to the plugin daemon
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=dify_config.PLUGIN_DAEMON_MAX_CONNECTIONS,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    cls._session = session
+        return cls._session
+
     def _request(
         self,
         method: str,
@@ -60,12 +81,22 @@ class BasePluginManager:
             data = json.dumps(data)
 
         try:
-            response = requests.request(
-                method=method, url=str(url), headers=headers, data=data, params=params, stream=stream, files=files
+            response = self._get_session().request(
+                method=method,
+                url=str(url),
+                headers=headers,
+                data=data,
+                params=params,
+                stream=stream,
+                files=files,
+                timeout=(dify_config.PLUGIN_DAEMON_CONNECT_TIMEOUT, dify_config.PLUGIN_DAEMON_READ_TIMEOUT),
             )
         except requests.exceptions.ConnectionError:
             logger.exception("Request to Plugin Daemon Service failed")
             raise PluginDaemonInnerError(code=-500, message="Request to Plugin Daemon Service failed")
+        except requests.exceptions.Timeout:
+            logger.exception("Request to Plugin Daemon Service timed out")
+            raise PluginDaemonInnerError(code=-500, message="Request to Plugin Daemon Service timed out")
 
         return response
 
@@ -79,15 +110,16 @@ class BasePluginManager:
         files: dict | None = None,
     ) -> Generator[bytes, None, None]:
         """
-        Make a stream request to the plugin daemon inner API
+        Make a stream request to the plugin daemon inner API, yield the raw data of each line
         """
         response = self._request(method, path, headers, data, params, files, stream=True)
-        for line in response.iter_lines():
-            line = line.decode("utf-8").strip()
-            if line.startswith("data:"):
-                line = line[5:].strip()
-            if line:
-                yield line
+        with response:
+            for line in response.iter_lines():
+                line = line.strip()
+                if line.startswith(b"data:"):
+                    line = line[5:].strip()
+                if line:
+                    yield line
 
     def _stream_request_with_model(
         self,
@@ -103,7 +135,7 @@ class BasePluginManager:
         Make a stream request to the plugin daemon inner API and yield the response as a model.
         """
         for line in self._stream_request(method, path, params, headers, data, files):
-            yield type(**json.loads(line))  # type: ignore
+            yield type.model_validate_json(line)  # type: ignore
 
     def _request_with_model(
         self,
@@ -119,7 +151,7 @@ class BasePluginManager:
         Make a request to the plugin daemon inner API and return the response as a model.
         """
         response = self._request(method, path, headers, data, params, files)
-        return type(**response.json())  # type: ignore
+        return type.model_validate_json(response.content)  # type: ignore
 
     def _request_with_plugin_daemon_response(
         self,
@@ -136,11 +168,11 @@ class BasePluginManager:
         Make a request to the plugin daemon inner API and return the response as a model.
         """
         response = self._request(method, path, headers, data, params, files)
-        json_response = response.json()
         if transformer:
-            json_response = transformer(json_response)
-
-        rep = PluginDaemonBasicResponse[type](**json_response)  # type: ignore
+            rep = PluginDaemonBasicResponse[type](**transformer(response.json()))  # type: ignore
+        else:
+            # validate the raw body, without building the intermediate python objects
+            rep = PluginDaemonBasicResponse[type].model_validate_json(response.content)  # type: ignore
         if rep.code != 0:
             try:
                 error = PluginDaemonError(**json.loads(rep.message))
@@ -167,17 +199,21 @@ class BasePluginManager:
         """
         Make a stream request to the plugin daemon inner API and yield the response as a model.
         """
+        response_type = PluginDaemonBasicResponse[type]  # type: ignore
         for line in self._stream_request(method, path, params, headers, data, files):
-            line_data = None
             try:
-                line_data = json.loads(line)
-                rep = PluginDaemonBasicResponse[type](**line_data)  # type: ignore
+                rep = response_type.model_validate_json(line)
             except Exception:
                 # TODO modify this when line_data has code and message
-                if line_data and "error" in line_data:
+                line_data = None
+                try:
+                    line_data = json.loads(line)
+                except Exception:
+                    pass
+                if isinstance(line_data, dict) and "error" in line_data:
                     raise ValueError(line_data["error"])
                 else:
-                    raise ValueError(line)
+                    raise ValueError(line.decode("utf-8", errors="replace"))
 
             if rep.code != 0:
                 if rep.code == -500:
@@ -20,7 +20,11 @@ from core.entities.provider_entities import (
     SystemConfiguration,
 )
 from core.helper import encrypter
-from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
+from core.helper.model_provider_cache import (
+    ProviderConfigurationsCache,
+    ProviderCredentialsCache,
+    ProviderCredentialsCacheType,
+)
 from core.helper.position_helper import is_filtered
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import (
@@ -89,6 +93,81 @@ class ProviderManager:
         - Get provider instance
         - Switch selection priority
 
+        :param tenant_id:
+        :return:
+        """
+        provider_configurations_cache = ProviderConfigurationsCache(tenant_id=tenant_id)
+        # read the version first, a write while the configurations are built makes them stale right away
+        version = provider_configurations_cache.get_version()
+        if version is not None:
+            cached_provider_configurations = provider_configurations_cache.get(version)
+            if cached_provider_configurations is not None and self._refresh_quota_configurations(
+                cached_provider_configurations, self._get_system_quotas(tenant_id)
+            ):
+                return cached_provider_configurations
+
+        provider_configurations = self._build_configurations(tenant_id)
+        if version is not None:
+            provider_configurations_cache.set(version, provider_configurations)
+        return provider_configurations
+
+    @staticmethod
+    def _get_system_quotas(tenant_id: str) -> dict[tuple[str, str], tuple[int, int]]:
+        """
+        Get the live quota limit and usage of the system providers of the workspace.
+
+        :param tenant_id: workspace id
+        :return: (quota limit, quota used) by (provider name, quota type)
+        """
+        provider_records = (
+            db.session.query(Provider.provider_name, Provider.quota_type, Provider.quota_limit, Provider.quota_used)
+            .filter(
+                Provider.tenant_id == tenant_id,
+                Provider.provider_type == ProviderType.SYSTEM.value,
+                Provider.is_valid == True,
+            )
+            .all()
+        )
+        return {
+            (str(ModelProviderID(provider_record.provider_name)), provider_record.quota_type): (
+                provider_record.quota_limit,
+                provider_record.quota_used,
+            )
+            for provider_record in provider_records
+        }
+
+    @staticmethod
+    def _refresh_quota_configurations(
+        provider_configurations: ProviderConfigurations, quotas: dict[tuple[str, str], tuple[int, int]]
+    ) -> bool:
+        """
+        Update the quota usage of cached configurations, quota deductions do not invalidate the cache.
+
+        :param provider_configurations: cached provider configurations
+        :param quotas: live quotas from _get_system_quotas
+        :return: False when a quota ran out or was topped up since the configurations were built,
+            the quota type and provider type in use depend on it so the configurations must be rebuilt
+        """
+        refreshed_quotas = []
+        for provider_configuration in provider_configurations.values():
+            for quota_configuration in provider_configuration.system_configuration.quota_configurations:
+                quota = quotas.get((provider_configuration.provider.provider, quota_configuration.quota_type.value))
+                if quota is None:
+                    continue
+                quota_limit, quota_used = quota
+                if (quota_limit > quota_used or quota_limit == -1) != quota_configuration.is_valid:
+                    return False
+                refreshed_quotas.append((quota_configuration, quota_limit, quota_used))
+
+        for quota_configuration, quota_limit, quota_used in refreshed_quotas:
+            quota_configuration.quota_limit = quota_limit
+            quota_configuration.quota_used = quota_used
+        return True
+
+    def _build_configurations(self, tenant_id: str) -> ProviderConfigurations:
+        """
+        Build model provider configurations from the provider records of the workspace.
+
         :param tenant_id:
         :return:
         """
@@ -1,10 +1,12 @@
 import json
-from collections import defaultdict
+from collections import Counter
 from typing import Any, Optional
 
 from pydantic import BaseModel
 
 from configs import dify_config
+from core.rag.datasource.keyword.jieba.jieba_keyword_postings import POSTINGS_DATA_SOURCE_TYPE, JiebaKeywordPostings
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_cache import JiebaKeywordTableCache
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
 from core.rag.datasource.keyword.keyword_base import BaseKeyword
 from core.rag.models.document import Document
@@ -24,58 +26,52 @@ class Jieba(BaseKeyword):
         self._config = KeywordTableConfig()
 
     def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
-        lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
-        with redis_client.lock(lock_name, timeout=600):
-            keyword_table_handler = JiebaKeywordTableHandler()
-            keyword_table = self._get_dataset_keyword_table()
-            for text in texts:
-                keywords = keyword_table_handler.extract_keywords(
-                    text.page_content, self._config.max_keywords_per_chunk
-                )
-                if text.metadata is not None:
-                    self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
-                    keyword_table = self._add_text_to_keyword_table(
-                        keyword_table or {}, text.metadata["doc_id"], list(keywords)
-                    )
+        keyword_table_handler = JiebaKeywordTableHandler()
+        node_keywords: dict[str, list[str]] = {}
+        for text in texts:
+            keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
+            if text.metadata is not None:
+                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
+                node_keywords.setdefault(text.metadata["doc_id"], []).extend(keywords)
 
-            self._save_dataset_keyword_table(keyword_table)
+        self._add_to_keyword_index(node_keywords)
 
-            return self
+        return self
 
     def add_texts(self, texts: list[Document], **kwargs):
-        lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
-        with redis_client.lock(lock_name, timeout=600):
-            keyword_table_handler = JiebaKeywordTableHandler()
-
-            keyword_table = self._get_dataset_keyword_table()
-            keywords_list = kwargs.get("keywords_list")
-            for i in range(len(texts)):
-                text = texts[i]
-                if keywords_list:
-                    keywords = keywords_list[i]
-                    if not keywords:
-                        keywords = keyword_table_handler.extract_keywords(
-                            text.page_content, self._config.max_keywords_per_chunk
-                        )
-                else:
+        keyword_table_handler = JiebaKeywordTableHandler()
+        node_keywords: dict[str, list[str]] = {}
+        keywords_list = kwargs.get("keywords_list")
+        for i in range(len(texts)):
+            text = texts[i]
+            if keywords_list:
+                keywords = keywords_list[i]
+                if not keywords:
                     keywords = keyword_table_handler.extract_keywords(
                         text.page_content, self._config.max_keywords_per_chunk
                     )
-                if text.metadata is not None:
-                    self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
-                    keyword_table = self._add_text_to_keyword_table(
-                        keyword_table or {}, text.metadata["doc_id"], list(keywords)
-                    )
+            else:
+                keywords = keyword_table_handler.extract_keywords(
+                    text.page_content, self._config.max_keywords_per_chunk
+                )
+            if text.metadata is not None:
+                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
+                node_keywords.setdefault(text.metadata["doc_id"], []).extend(keywords)
 
-            self._save_dataset_keyword_table(keyword_table)
+        self._add_to_keyword_index(node_keywords)
 
     def text_exists(self, id: str) -> bool:
+        if self._is_postings_storage():
+            return JiebaKeywordPostings(self.dataset.id).node_exists(id)
         keyword_table = self._get_dataset_keyword_table()
         if keyword_table is None:
             return False
         return id in set.union(*keyword_table.values())
 
     def delete_by_ids(self, ids: list[str]) -> None:
+        if self._is_postings_storage():
+            JiebaKeywordPostings(self.dataset.id).delete_node_ids(ids)
+            return
         lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
         with redis_client.lock(lock_name, timeout=600):
             keyword_table = self._get_dataset_keyword_table()
@@ -85,22 +81,28 @@ class Jieba(BaseKeyword):
             self._save_dataset_keyword_table(keyword_table)
 
     def search(self, query: str, **kwargs: Any) -> list[Document]:
-        keyword_table = self._get_dataset_keyword_table()
+        keywords = JiebaKeywordTableHandler().extract_keywords(query)
+        keyword_table = self._get_search_keyword_table(keywords)
 
         k = kwargs.get("top_k", 4)
         document_ids_filter = kwargs.get("document_ids_filter")
-        sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table or {}, query, k)
+        sorted_chunk_indices = self._retrieve_ids_by_keywords(keyword_table, keywords, k)
 
-        documents = []
-        for chunk_index in sorted_chunk_indices:
+        segments: dict[str, DocumentSegment] = {}
+        if sorted_chunk_indices:
             segment_query = db.session.query(DocumentSegment).filter(
-                DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id == chunk_index
+                DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id.in_(sorted_chunk_indices)
             )
             if document_ids_filter:
                 segment_query = segment_query.filter(DocumentSegment.document_id.in_(document_ids_filter))
-            segment = segment_query.first()
+            for index_segment in segment_query.all():
+                segments.setdefault(index_segment.index_node_id, index_segment)
+
+        documents = []
+        for chunk_index in sorted_chunk_indices:
+            segment = segments.get(chunk_index)
 
-            if segment:
+            if segment is not None:
                 documents.append(
                     Document(
                         page_content=segment.content,
@@ -122,10 +124,33 @@ class Jieba(BaseKeyword):
             if dataset_keyword_table:
                 db.session.delete(dataset_keyword_table)
                 db.session.commit()
-                if dataset_keyword_table.data_source_type != "database":
+                JiebaKeywordTableCache.invalidate(self.dataset.id)
+                if dataset_keyword_table.data_source_type == POSTINGS_DATA_SOURCE_TYPE:
+                    JiebaKeywordPostings(self.dataset.id).delete_all()
+                elif dataset_keyword_table.data_source_type != "database":
                     file_key = "keyword_files/" + self.dataset.tenant_id + "/" + self.dataset.id + ".txt"
                     storage.delete(file_key)
 
+    def _is_postings_storage(self) -> bool:
+        dataset_keyword_table = self.dataset.dataset_keyword_table
+        if dataset_keyword_table:
+            return bool(dataset_keyword_table.data_source_type == POSTINGS_DATA_SOURCE_TYPE)
+        return dify_config.KEYWORD_DATA_SOURCE_TYPE == POSTINGS_DATA_SOURCE_TYPE
+
+    def _add_to_keyword_index(self, node_keywords: dict[str, list[str]]):
+        if self._is_postings_storage():
+            # make sure the dataset keyword table row recording the storage type exists
+            self._get_dataset_keyword_table()
+            JiebaKeywordPostings(self.dataset.id).add(node_keywords)
+            return
+        lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
+        with redis_client.lock(lock_name, timeout=600):
+            keyword_table = self._get_dataset_keyword_table()
+            for node_id, keywords in node_keywords.items():
+                keyword_table = self._add_text_to_keyword_table(keyword_table or {}, node_id, keywords)
+
+            self._save_dataset_keyword_table(keyword_table)
+
     def _save_dataset_keyword_table(self, keyword_table):
         keyword_table_dict = {
             "__type__": "keyword_table",
@@ -141,10 +166,25 @@ class Jieba(BaseKeyword):
             if storage.exists(file_key):
                 storage.delete(file_key)
             storage.save(file_key, json.dumps(keyword_table_dict, cls=SetEncoder).encode("utf-8"))
+        JiebaKeywordTableCache.invalidate(self.dataset.id)
+
+    def _get_search_keyword_table(self, keywords: set[str]) -> dict[str, set[str]]:
+        """Keyword table used for search, served from the process cache while its version is current."""
+        version = JiebaKeywordTableCache.get_version(self.dataset.id)
+        keyword_table = JiebaKeywordTableCache.get(self.dataset.id, version)
+        if keyword_table is not None:
+            return keyword_table
+        if self._is_postings_storage():
+            return JiebaKeywordPostings(self.dataset.id).get_postings(keywords)
+        keyword_table = self._get_dataset_keyword_table() or {}
+        JiebaKeywordTableCache.put(self.dataset.id, version, keyword_table)
+        return keyword_table
 
     def _get_dataset_keyword_table(self) -> Optional[dict]:
         dataset_keyword_table = self.dataset.dataset_keyword_table
         if dataset_keyword_table:
+            if dataset_keyword_table.data_source_type == POSTINGS_DATA_SOURCE_TYPE:
+                return {}
             keyword_table_dict = dataset_keyword_table.keyword_table_dict
             if keyword_table_dict:
                 return dict(keyword_table_dict["__data__"]["table"])
@@ -192,24 +232,15 @@ class Jieba(BaseKeyword):
 
         return keyword_table
 
-    def _retrieve_ids_by_query(self, keyword_table: dict, query: str, k: int = 4):
-        keyword_table_handler = JiebaKeywordTableHandler()
-        keywords = keyword_table_handler.extract_keywords(query)
-
+    def _retrieve_ids_by_keywords(self, keyword_table: dict, keywords: set[str], k: int = 4):
         # go through text chunks in order of most matching keywords
-        chunk_indices_count: dict[str, int] = defaultdict(int)
-        keywords_list = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
-        for keyword in keywords_list:
-            for node_id in keyword_table[keyword]:
-                chunk_indices_count[node_id] += 1
-
-        sorted_chunk_indices = sorted(
-            chunk_indices_count.keys(),
-            key=lambda x: chunk_indices_count[x],
-            reverse=True,
-        )
+        chunk_indices_count: Counter[str] = Counter()
+        for keyword in keywords:
+            node_ids = keyword_table.get(keyword)
+            if node_ids:
+                chunk_indices_count.update(node_ids)
 
-        return sorted_chunk_indices[:k]
+        return [chunk_index for chunk_index, _ in chunk_indices_count.most_common(k)]
 
     def _update_segment_keywords(self, dataset_id: str, node_id: str, keywords: list[str]):
         document_segment = (
@@ -223,33 +254,25 @@ class Jieba(BaseKeyword):
             db.session.commit()
 
     def create_segment_keywords(self, node_id: str, keywords: list[str]):
-        keyword_table = self._get_dataset_keyword_table()
         self._update_segment_keywords(self.dataset.id, node_id, keywords)
-        keyword_table = self._add_text_to_keyword_table(keyword_table or {}, node_id, keywords)
-        self._save_dataset_keyword_table(keyword_table)
+        self._add_to_keyword_index({node_id: keywords})
 
     def multi_create_segment_keywords(self, pre_segment_data_list: list):
         keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = self._get_dataset_keyword_table()
+        node_keywords: dict[str, list[str]] = {}
         for pre_segment_data in pre_segment_data_list:
             segment = pre_segment_data["segment"]
             if pre_segment_data["keywords"]:
                 segment.keywords = pre_segment_data["keywords"]
-                keyword_table = self._add_text_to_keyword_table(
-                    keyword_table or {}, segment.index_node_id, pre_segment_data["keywords"]
-                )
+                node_keywords.setdefault(segment.index_node_id, []).extend(pre_segment_data["keywords"])
             else:
                 keywords = keyword_table_handler.extract_keywords(segment.content, self._config.max_keywords_per_chunk)
                 segment.keywords = list(keywords)
-                keyword_table = self._add_text_to_keyword_table(
-                    keyword_table or {}, segment.index_node_id, list(keywords)
-                )
-        self._save_dataset_keyword_table(keyword_table)
+                node_keywords.setdefault(segment.index_node_id, []).extend(keywords)
+        self._add_to_keyword_index(node_keywords)
 
     def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
-        keyword_table = self._get_dataset_keyword_table()
-        keyword_table = self._add_text_to_keyword_table(keyword_table or {}, node_id, keywords)
-        self._save_dataset_keyword_table(keyword_table)
+        self._add_to_keyword_index({node_id: keywords})
 
 
 class SetEncoder(json.JSONEncoder):
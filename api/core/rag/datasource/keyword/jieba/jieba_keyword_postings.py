@@ -0,0 +1,82 @@
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+
+from sqlalchemy.dialects.postgresql import insert
+
+from extensions.ext_database import db
+from models.dataset import DatasetKeywordPosting
+
+POSTINGS_DATA_SOURCE_TYPE = "postings"
+
+
+class JiebaKeywordPostings:
+    """
+    Incremental storage for the jieba inverted index of a dataset, one row per (keyword, index node id) posting.
+    Writes only touch the postings of the changed nodes instead of rewriting the whole keyword table.
+    """
+
+    _BATCH_SIZE = 1000
+
+    def __init__(self, dataset_id: str):
+        self._dataset_id = dataset_id
+
+    def add(self, node_keywords: Mapping[str, Iterable[str]]) -> None:
+        rows = [
+            {"dataset_id": self._dataset_id, "keyword": keyword, "index_node_id": node_id}
+            for node_id, keywords in node_keywords.items()
+            for keyword in set(keywords)
+        ]
+        for i in range(0, len(rows), self._BATCH_SIZE):
+            stmt = insert(DatasetKeywordPosting).values(rows[i : i + self._BATCH_SIZE])
+            stmt = stmt.on_conflict_do_nothing(constraint="dataset_keyword_posting_unique_idx")
+            db.session.execute(stmt)
+        db.session.commit()
+
+    def delete_node_ids(self, node_ids: list[str]) -> None:
+        for i in range(0, len(node_ids), self._BATCH_SIZE):
+            db.session.query(DatasetKeywordPosting).filter(
+                DatasetKeywordPosting.dataset_id == self._dataset_id,
+                DatasetKeywordPosting.index_node_id.in_(node_ids[i : i + self._BATCH_SIZE]),
+            ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def delete_all(self) -> None:
+        db.session.query(DatasetKeywordPosting).filter(DatasetKeywordPosting.dataset_id == self._dataset_id).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+    def node_exists(self, node_id: str) -> bool:
+        posting = (
+            db.session.query(DatasetKeywordPosting.id)
+            .filter(
+                DatasetKeywordPosting.dataset_id == self._dataset_id,
+                DatasetKeywordPosting.index_node_id == node_id,
+            )
+            .first()
+        )
+        return posting is not None
+
+    def get_postings(self, keywords: Iterable[str]) -> dict[str, set[str]]:
+        """Fetch the postings of the given keywords only, in the same shape as the legacy keyword table."""
+        keyword_list = list(set(keywords))
+        keyword_table: dict[str, set[str]] = defaultdict(set)
+        for i in range(0, len(keyword_list), self._BATCH_SIZE):
+            postings = db.session.query(DatasetKeywordPosting.keyword, DatasetKeywordPosting.index_node_id).filter(
+                DatasetKeywordPosting.dataset_id == self._dataset_id,
+                DatasetKeywordPosting.keyword.in_(keyword_list[i : i + self._BATCH_SIZE]),
+            )
+            for keyword, node_id in postings:
+                keyword_table[keyword].add(node_id)
+        return dict(keyword_table)
+
+    def replace_table(self, keyword_table: Mapping[str, Iterable[str]]) -> None:
+        """Replace all postings of the dataset with a legacy keyword table, used when migrating datasets."""
+        node_keywords: dict[str, list[str]] = defaultdict(list)
+        for keyword, node_ids in keyword_table.items():
+            for node_id in node_ids:
+                node_keywords[node_id].append(keyword)
+        db.session.query(DatasetKeywordPosting).filter(DatasetKeywordPosting.dataset_id == self._dataset_id).delete(
+            synchronize_session=False
+        )
+        self.add(node_keywords)
@@ -0,0 +1,48 @@
+from typing import Optional, cast
+
+from configs import dify_config
+from core.helper.lru_cache import TTLLRUCache
+from extensions.ext_redis import redis_client
+
+_keyword_table_cache = TTLLRUCache(
+    capacity=dify_config.KEYWORD_TABLE_CACHE_SIZE, ttl=dify_config.KEYWORD_TABLE_CACHE_TTL
+)
+
+
+class JiebaKeywordTableCache:
+    """
+    Process-level cache of parsed dataset keyword tables used by keyword search.
+    Every write bumps a per-dataset version in redis, so all processes drop their stale copy on the next search.
+    Cached tables are shared between searches and must not be mutated.
+    """
+
+    @staticmethod
+    def _version_key(dataset_id: str) -> str:
+        return f"keyword_table_version_{dataset_id}"
+
+    @classmethod
+    def get_version(cls, dataset_id: str) -> Optional[bytes]:
+        return cast(Optional[bytes], redis_client.get(cls._version_key(dataset_id)))
+
+    @classmethod
+    def get(cls, dataset_id: str, version: Optional[bytes]) -> Optional[dict[str, set[str]]]:
+        cached = _keyword_table_cache.get(dataset_id)
+        if cached is None:
+            return None
+        cached_version, keyword_table = cast(tuple[Optional[bytes], dict[str, set[str]]], cached)
+        if cached_version != version:
+            return None
+        return keyword_table
+
+    @classmethod
+    def put(cls, dataset_id: str, version: Optional[bytes], keyword_table: dict[str, set[str]]) -> None:
+        _keyword_table_cache.put(dataset_id, (version, keyword_table))
+
+    @classmethod
+    def invalidate(cls, dataset_id: str) -> None:
+        redis_client.incr(cls._version_key(dataset_id))
+        _keyword_table_cache.delete(dataset_id)
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        return _keyword_table_cache.stats()
@@ -0,0 +1,82 @@
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+from configs import dify_config
+
+
+class _TenantTasks:
+    def __init__(self) -> None:
+        self.running = 0
+        self.pending: deque[tuple[Future, Callable[..., Any], tuple[Any, ...], dict[str, Any]]] = deque()
+
+
+class RetrievalExecutor:
+    """
+    Process-wide bounded thread pool shared by all retrievals.
+    In-flight tasks are capped per tenant so that one busy tenant cannot occupy every worker, the tasks over the
+    cap wait in a per-tenant queue and start when one of the tenant's tasks finishes. Submitting never blocks.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+    # tenants with tasks running or waiting, idle tenants are dropped
+    _tenant_tasks: dict[str, _TenantTasks] = {}
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=dify_config.RETRIEVAL_SERVICE_EXECUTORS or None,
+                        thread_name_prefix="retrieval",
+                    )
+        return cls._executor
+
+    @classmethod
+    def submit(cls, tenant_id: str, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        """Submit a task, it is queued without blocking the caller while the tenant is at its maximum in flight."""
+        if not dify_config.RETRIEVAL_SERVICE_TENANT_MAX_CONCURRENCY:
+            return cls._get_executor().submit(fn, *args, **kwargs)
+
+        future: Future = Future()
+        with cls._lock:
+            tenant_tasks = cls._tenant_tasks.setdefault(tenant_id, _TenantTasks())
+            tenant_tasks.pending.append((future, fn, args, kwargs))
+        cls._dispatch(tenant_id)
+        return future
+
+    @classmethod
+    def _dispatch(cls, tenant_id: str) -> None:
+        max_concurrency = dify_config.RETRIEVAL_SERVICE_TENANT_MAX_CONCURRENCY
+        with cls._lock:
+            tenant_tasks = cls._tenant_tasks.get(tenant_id)
+            if tenant_tasks is None:
+                return
+            ready = []
+            while tenant_tasks.pending and tenant_tasks.running < max_concurrency:
+                ready.append(tenant_tasks.pending.popleft())
+                tenant_tasks.running += 1
+            if not tenant_tasks.running and not tenant_tasks.pending:
+                del cls._tenant_tasks[tenant_id]
+        for task in ready:
+            cls._get_executor().submit(cls._run, tenant_id, *task)
+
+    @classmethod
+    def _run(
+        cls, tenant_id: str, future: Future, fn: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> None:
+        # the tenant slot is held by this task from here until it finishes
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with cls._lock:
+                cls._tenant_tasks[tenant_id].running -= 1
+            cls._dispatch(tenant_id)
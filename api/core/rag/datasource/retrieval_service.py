@@ -1,13 +1,12 @@
 import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from flask import Flask, current_app
 from sqlalchemy.orm import load_only
 
-from configs import dify_config
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.retrieval_executor import RetrievalExecutor
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.index_processor.constant.index_type import IndexType
@@ -42,65 +41,70 @@ class RetrievalService:
         reranking_mode: str = "reranking_model",
         weights: Optional[dict] = None,
         document_ids_filter: Optional[list[str]] = None,
+        dataset: Optional[Dataset] = None,
     ):
         if not query:
             return []
-        dataset = cls._get_dataset(dataset_id)
+        if dataset is None or dataset.id != dataset_id:
+            dataset = cls._get_dataset(dataset_id)
         if not dataset or dataset.available_document_count == 0 or dataset.available_segment_count == 0:
             return []
 
-        all_documents: list[Document] = []
-        exceptions: list[str] = []
-
-        # Optimize multithreading with thread pools
-        with ThreadPoolExecutor(max_workers=dify_config.RETRIEVAL_SERVICE_EXECUTORS) as executor:  # type: ignore
-            futures = []
-            if retrieval_method == "keyword_search":
-                futures.append(
-                    executor.submit(
-                        cls.keyword_search,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        dataset_id=dataset_id,
-                        query=query,
-                        top_k=top_k,
-                        all_documents=all_documents,
-                        exceptions=exceptions,
-                        document_ids_filter=document_ids_filter,
-                    )
+        # run on the process-wide retrieval executor instead of a thread pool per call
+        flask_app = current_app._get_current_object()  # type: ignore
+        futures = []
+        if retrieval_method == "keyword_search":
+            futures.append(
+                RetrievalExecutor.submit(
+                    dataset.tenant_id,
+                    cls.keyword_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    top_k=top_k,
+                    document_ids_filter=document_ids_filter,
                 )
-            if RetrievalMethod.is_support_semantic_search(retrieval_method):
-                futures.append(
-                    executor.submit(
-                        cls.embedding_search,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        dataset_id=dataset_id,
-                        query=query,
-                        top_k=top_k,
-                        score_threshold=score_threshold,
-                        reranking_model=reranking_model,
-                        all_documents=all_documents,
-                        retrieval_method=retrieval_method,
-                        exceptions=exceptions,
-                        document_ids_filter=document_ids_filter,
-                    )
+            )
+        if RetrievalMethod.is_support_semantic_search(retrieval_method):
+            futures.append(
+                RetrievalExecutor.submit(
+                    dataset.tenant_id,
+                    cls.embedding_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    top_k=top_k,
+                    score_threshold=score_threshold,
+                    reranking_model=reranking_model,
+                    retrieval_method=retrieval_method,
+                    document_ids_filter=document_ids_filter,
                 )
-            if RetrievalMethod.is_support_fulltext_search(retrieval_method):
-                futures.append(
-                    executor.submit(
-                        cls.full_text_index_search,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        dataset_id=dataset_id,
-                        query=query,
-                        top_k=top_k,
-                        score_threshold=score_threshold,
-                        reranking_model=reranking_model,
-                        all_documents=all_documents,
-                        retrieval_method=retrieval_method,
-                        exceptions=exceptions,
-                        document_ids_filter=document_ids_filter,
-                    )
+            )
+        if RetrievalMethod.is_support_fulltext_search(retrieval_method):
+            futures.append(
+                RetrievalExecutor.submit(
+                    dataset.tenant_id,
+                    cls.full_text_index_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    top_k=top_k,
+                    score_threshold=score_threshold,
+                    reranking_model=reranking_model,
+                    retrieval_method=retrieval_method,
+                    document_ids_filter=document_ids_filter,
                 )
-            concurrent.futures.wait(futures, timeout=30, return_when=concurrent.futures.ALL_COMPLETED)
+            )
+        # every search returns its own documents, they are merged once all of them have finished
+        concurrent.futures.wait(futures, return_when=concurrent.futures.ALL_COMPLETED)
+
+        all_documents: list[Document] = []
+        exceptions: list[str] = []
+        for future in futures:
+            try:
+                all_documents.extend(future.result())
+            except Exception as e:
+                exceptions.append(str(e))
 
         if exceptions:
             raise ValueError(";\n".join(exceptions))
@@ -139,24 +143,18 @@ class RetrievalService:
         dataset_id: str,
         query: str,
         top_k: int,
-        all_documents: list,
-        exceptions: list,
         document_ids_filter: Optional[list[str]] = None,
-    ):
+    ) -> list[Document]:
         with flask_app.app_context():
-            try:
-                dataset = cls._get_dataset(dataset_id)
-                if not dataset:
-                    raise ValueError("dataset not found")
+            dataset = cls._get_dataset(dataset_id)
+            if not dataset:
+                raise ValueError("dataset not found")
 
-                keyword = Keyword(dataset=dataset)
+            keyword = Keyword(dataset=dataset)
 
-                documents = keyword.search(
-                    cls.escape_query_for_search(query), top_k=top_k, document_ids_filter=document_ids_filter
-                )
-                all_documents.extend(documents)
-            except Exception as e:
-                exceptions.append(str(e))
+            return keyword.search(
+                cls.escape_query_for_search(query), top_k=top_k, document_ids_filter=document_ids_filter
+            )
 
     @classmethod
     def embedding_search(
@@ -167,49 +165,41 @@ class RetrievalService:
         top_k: int,
         score_threshold: Optional[float],
         reranking_model: Optional[dict],
-        all_documents: list,
         retrieval_method: str,
-        exceptions: list,
         document_ids_filter: Optional[list[str]] = None,
-    ):
+    ) -> list[Document]:
         with flask_app.app_context():
-            try:
-                dataset = cls._get_dataset(dataset_id)
-                if not dataset:
-                    raise ValueError("dataset not found")
-
-                vector = Vector(dataset=dataset)
-                documents = vector.search_by_vector(
-                    query,
-                    search_type="similarity_score_threshold",
-                    top_k=top_k,
+            dataset = cls._get_dataset(dataset_id)
+            if not dataset:
+                raise ValueError("dataset not found")
+
+            vector = Vector(dataset=dataset)
+            documents = vector.search_by_vector(
+                query,
+                search_type="similarity_score_threshold",
+                top_k=top_k,
+                score_threshold=score_threshold,
+                filter={"group_id": [dataset.id]},
+                document_ids_filter=document_ids_filter,
+            )
+
+            if (
+                documents
+                and reranking_model
+                and reranking_model.get("reranking_model_name")
+                and reranking_model.get("reranking_provider_name")
+                and retrieval_method == RetrievalMethod.SEMANTIC_SEARCH.value
+            ):
+                data_post_processor = DataPostProcessor(
+                    str(dataset.tenant_id), str(RerankMode.RERANKING_MODEL.value), reranking_model, None, False
+                )
+                return data_post_processor.invoke(
+                    query=query,
+                    documents=documents,
                     score_threshold=score_threshold,
-                    filter={"group_id": [dataset.id]},
-                    document_ids_filter=document_ids_filter,
+                    top_n=len(documents),
                 )
-
-                if documents:
-                    if (
-                        reranking_model
-                        and reranking_model.get("reranking_model_name")
-                        and reranking_model.get("reranking_provider_name")
-                        and retrieval_method == RetrievalMethod.SEMANTIC_SEARCH.value
-                    ):
-                        data_post_processor = DataPostProcessor(
-                            str(dataset.tenant_id), str(RerankMode.RERANKING_MODEL.value), reranking_model, None, False
-                        )
-                        all_documents.extend(
-                            data_post_processor.invoke(
-                                query=query,
-                                documents=documents,
-                                score_threshold=score_threshold,
-                                top_n=len(documents),
-                            )
-                        )
-                    else:
-                        all_documents.extend(documents)
-            except Exception as e:
-                exceptions.append(str(e))
+            return documents
 
     @classmethod
     def full_text_index_search(
@@ -220,44 +210,36 @@ class RetrievalService:
         top_k: int,
         score_threshold: Optional[float],
         reranking_model: Optional[dict],
-        all_documents: list,
         retrieval_method: str,
-        exceptions: list,
         document_ids_filter: Optional[list[str]] = None,
-    ):
+    ) -> list[Document]:
         with flask_app.app_context():
-            try:
-                dataset = cls._get_dataset(dataset_id)
-                if not dataset:
-                    raise ValueError("dataset not found")
+            dataset = cls._get_dataset(dataset_id)
+            if not dataset:
+                raise ValueError("dataset not found")
 
-                vector_processor = Vector(dataset=dataset)
+            vector_processor = Vector(dataset=dataset)
 
-                documents = vector_processor.search_by_full_text(
-                    cls.escape_query_for_search(query), top_k=top_k, document_ids_filter=document_ids_filter
+            documents = vector_processor.search_by_full_text(
+                cls.escape_query_for_search(query), top_k=top_k, document_ids_filter=document_ids_filter
+            )
+            if (
+                documents
+                and reranking_model
+                and reranking_model.get("reranking_model_name")
+                and reranking_model.get("reranking_provider_name")
+                and retrieval_method == RetrievalMethod.FULL_TEXT_SEARCH.value
+            ):
+                data_post_processor = DataPostProcessor(
+                    str(dataset.tenant_id), str(RerankMode.RERANKING_MODEL.value), reranking_model, None, False
                 )
-                if documents:
-                    if (
-                        reranking_model
-                        and reranking_model.get("reranking_model_name")
-                        and reranking_model.get("reranking_provider_name")
-                        and retrieval_method == RetrievalMethod.FULL_TEXT_SEARCH.value
-                    ):
-                        data_post_processor = DataPostProcessor(
-                            str(dataset.tenant_id), str(RerankMode.RERANKING_MODEL.value), reranking_model, None, False
-                        )
-                        all_documents.extend(
-                            data_post_processor.invoke(
-                                query=query,
-                                documents=documents,
-                                score_threshold=score_threshold,
-                                top_n=len(documents),
-                            )
-                        )
-                    else:
-                        all_documents.extend(documents)
-            except Exception as e:
-                exceptions.append(str(e))
+                return data_post_processor.invoke(
+                    query=query,
+                    documents=documents,
+                    score_threshold=score_threshold,
+                    top_n=len(documents),
+                )
+            return documents
 
     @staticmethod
     def escape_query_for_search(query: str) -> str:
@@ -284,6 +266,62 @@ class RetrievalService:
                 .all()
             }
 
+            # Batch query child chunks and segments of the whole result set
+            child_index_node_ids = set()
+            index_node_ids = set()
+            for document in documents:
+                dataset_document = dataset_documents.get(document.metadata.get("document_id"))
+                if not dataset_document or not document.metadata.get("doc_id"):
+                    continue
+                if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                    child_index_node_ids.add(document.metadata["doc_id"])
+                else:
+                    index_node_ids.add(document.metadata["doc_id"])
+
+            child_chunks: dict[str, ChildChunk] = {}
+            if child_index_node_ids:
+                for chunk in (
+                    db.session.query(ChildChunk).filter(ChildChunk.index_node_id.in_(child_index_node_ids)).all()
+                ):
+                    child_chunks.setdefault(chunk.index_node_id, chunk)
+
+            parent_segments: dict[str, DocumentSegment] = {}
+            parent_segment_ids = {chunk.segment_id for chunk in child_chunks.values()}
+            if parent_segment_ids:
+                parent_segments = {
+                    parent_segment.id: parent_segment
+                    for parent_segment in db.session.query(DocumentSegment)
+                    .filter(
+                        DocumentSegment.enabled == True,
+                        DocumentSegment.status == "completed",
+                        DocumentSegment.id.in_(parent_segment_ids),
+                    )
+                    .options(
+                        load_only(
+                            DocumentSegment.id,
+                            DocumentSegment.dataset_id,
+                            DocumentSegment.content,
+                            DocumentSegment.answer,
+                        )
+                    )
+                    .all()
+                }
+
+            segments: dict[tuple[str, str], DocumentSegment] = {}
+            if index_node_ids:
+                dataset_ids = {doc.dataset_id for doc in dataset_documents.values()}
+                for index_segment in (
+                    db.session.query(DocumentSegment)
+                    .filter(
+                        DocumentSegment.dataset_id.in_(dataset_ids),
+                        DocumentSegment.enabled == True,
+                        DocumentSegment.status == "completed",
+                        DocumentSegment.index_node_id.in_(index_node_ids),
+                    )
+                    .all()
+                ):
+                    segments.setdefault((index_segment.dataset_id, index_segment.index_node_id), index_segment)
+
             records = []
             include_segment_ids = set()
             segment_child_map = {}
@@ -301,33 +339,15 @@ class RetrievalService:
                 if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
                     # Handle parent-child documents
                     child_index_node_id = document.metadata.get("doc_id")
-
-                    child_chunk = (
-                        db.session.query(ChildChunk).filter(ChildChunk.index_node_id == child_index_node_id).first()
-                    )
-
-                    if not child_chunk:
+                    if not child_index_node_id:
                         continue
 
-                    segment = (
-                        db.session.query(DocumentSegment)
-                        .filter(
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                            DocumentSegment.id == child_chunk.segment_id,
-                        )
-                        .options(
-                            load_only(
-                                DocumentSegment.id,
-                                DocumentSegment.content,
-                                DocumentSegment.answer,
-                            )
-                        )
-                        .first()
-                    )
+                    child_chunk = child_chunks.get(child_index_node_id)
+                    if child_chunk is None:
+                        continue
 
-                    if not segment:
+                    segment = parent_segments.get(child_chunk.segment_id)
+                    if segment is None or segment.dataset_id != dataset_document.dataset_id:
                         continue
 
                     if segment.id not in include_segment_ids:
@@ -364,18 +384,8 @@ class RetrievalService:
                     if not index_node_id:
                         continue
 
-                    segment = (
-                        db.session.query(DocumentSegment)
-                        .filter(
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                            DocumentSegment.index_node_id == index_node_id,
-                        )
-                        .first()
-                    )
-
-                    if not segment:
+                    segment = segments.get((dataset_document.dataset_id, index_node_id))
+                    if segment is None:
                         continue
 
                     include_segment_ids.add(segment.id)
@@ -11,6 +11,7 @@ from pydantic import BaseModel, model_validator
 
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_pool import VectorClientPool
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -44,8 +45,14 @@ class ElasticSearchConfig(BaseModel):
 class ElasticSearchVector(BaseVector):
     def __init__(self, index_name: str, config: ElasticSearchConfig, attributes: list):
         super().__init__(index_name.lower())
-        self._client = self._init_client(config)
-        self._version = self._get_version()
+        # the server version is pooled along with the client so it is only fetched once per connection
+        self._client, self._version = VectorClientPool.get_client(
+            VectorType.ELASTICSEARCH,
+            config,
+            lambda: self._init_client_with_version(config),
+            health_check=lambda pooled: pooled[0].ping(),
+            close=lambda pooled: pooled[0].close(),
+        )
         self._check_version()
         self._attributes = attributes
 
@@ -68,8 +75,13 @@ class ElasticSearchVector(BaseVector):
 
         return client
 
-    def _get_version(self) -> str:
-        info = self._client.info()
+    def _init_client_with_version(self, config: ElasticSearchConfig) -> tuple[Elasticsearch, str]:
+        client = self._init_client(config)
+        return client, self._get_version(client)
+
+    @staticmethod
+    def _get_version(client: Elasticsearch) -> str:
+        info = client.info()
         return cast(str, info["version"]["number"])
 
     def _check_version(self):
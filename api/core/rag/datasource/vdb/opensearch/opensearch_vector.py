@@ -11,6 +11,7 @@ from pydantic import BaseModel, model_validator
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_pool import VectorClientPool
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -60,7 +61,13 @@ class OpenSearchVector(BaseVector):
     def __init__(self, collection_name: str, config: OpenSearchConfig):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = OpenSearch(**config.to_opensearch_params())
+        self._client = VectorClientPool.get_client(
+            VectorType.OPENSEARCH,
+            config,
+            lambda: OpenSearch(**config.to_opensearch_params()),
+            health_check=lambda client: client.ping(),
+            close=lambda client: client.close(),
+        )
 
     def get_type(self) -> str:
         return VectorType.OPENSEARCH
@@ -1,5 +1,6 @@
 import json
 import logging
+import threading
 import uuid
 from contextlib import contextmanager
 from typing import Any
@@ -11,6 +12,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_pool import VectorClientPool
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -71,10 +73,41 @@ USING gin (text gin_bigm_ops);
 """
 
 
+class BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Thread-safe connection pool shared by all PGVector instances with the same config.
+    Callers wait for a free connection instead of failing once max connections are in use.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._available = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key=None):
+        self._available.acquire()
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._available.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._available.release()
+
+
 class PGVector(BaseVector):
     def __init__(self, collection_name: str, config: PGVectorConfig):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self.pool = VectorClientPool.get_client(
+            VectorType.PGVECTOR,
+            config,
+            lambda: self._create_connection_pool(config),
+            health_check=self._check_connection_pool,
+            close=lambda pool: pool.closeall(),
+        )
         self.table_name = f"embedding_{collection_name}"
         self.pg_bigm = config.pg_bigm
 
@@ -82,7 +115,7 @@ class PGVector(BaseVector):
         return VectorType.PGVECTOR
 
     def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
+        return BlockingConnectionPool(
             config.min_connection,
             config.max_connection,
             host=config.host,
@@ -92,6 +125,17 @@ class PGVector(BaseVector):
             database=config.database,
         )
 
+    @staticmethod
+    def _check_connection_pool(pool: BlockingConnectionPool) -> bool:
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        finally:
+            pool.putconn(conn)
+
     @contextmanager
     def _get_cursor(self):
         conn = self.pool.getconn()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Optional, TypeVar, cast
+
+from pydantic import BaseModel
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _PooledClient:
+    client: Any
+    health_check: Optional[Callable[[Any], bool]]
+    close: Optional[Callable[[Any], None]]
+    last_used: float
+    last_checked: float
+
+
+class VectorClientPool:
+    """
+    Process-wide registry of vector database clients keyed by (vector type, connection config).
+    Vector instances are created per retrieval and per indexing batch, reusing the client keeps
+    HTTP/gRPC channels and database connection pools warm across them.
+    Clients that fail a health check or stay unused for the idle timeout are dropped from the pool but not closed,
+    Vector instances created earlier may still be using them. Garbage collection finalizes a dropped client once the
+    last of them is gone.
+    """
+
+    _clients: dict[tuple[str, str], _PooledClient] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _config_key(config: BaseModel) -> str:
+        payload = json.dumps(config.model_dump(mode="json"), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @classmethod
+    def get_client(
+        cls,
+        vector_type: str,
+        config: BaseModel,
+        factory: Callable[[], T],
+        health_check: Optional[Callable[[T], bool]] = None,
+        close: Optional[Callable[[T], None]] = None,
+    ) -> T:
+        """
+        Return the pooled client for the connection config, creating it with `factory` when missing.
+        `health_check` is run at most once per health check interval, a falsy result or an error replaces the client.
+        `close` releases a client that lost the race to be pooled against a concurrent caller, it was never handed out.
+        """
+        if not dify_config.VECTOR_CLIENT_POOL_ENABLED:
+            return factory()
+
+        key = (vector_type, cls._config_key(config))
+        now = time.monotonic()
+        with cls._lock:
+            cls._evict_idle(now)
+            entry = cls._clients.get(key)
+            skip_check = True
+            if entry is not None:
+                entry.last_used = now
+                if entry.health_check is not None and now - entry.last_checked >= cls._health_check_interval():
+                    # let concurrent callers keep the client while this one checks it
+                    entry.last_checked = now
+                    skip_check = False
+
+        if entry is not None:
+            if skip_check or cls._is_healthy(vector_type, entry):
+                return cast(T, entry.client)
+            with cls._lock:
+                if cls._clients.get(key) is entry:
+                    del cls._clients[key]
+
+        client = factory()
+        with cls._lock:
+            existing = cls._clients.get(key)
+            created = _PooledClient(
+                client=client, health_check=health_check, close=close, last_used=now, last_checked=now
+            )
+            if existing is None:
+                cls._clients[key] = created
+            else:
+                # another thread created the client concurrently, keep a single client per config
+                existing.last_used = now
+        if existing is not None:
+            cls._close(created)
+            return cast(T, existing.client)
+        return client
+
+    @staticmethod
+    def _health_check_interval() -> int:
+        return dify_config.VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL
+
+    @staticmethod
+    def _is_healthy(vector_type: str, entry: _PooledClient) -> bool:
+        assert entry.health_check is not None
+        try:
+            if entry.health_check(entry.client):
+                return True
+            logger.warning(f"Pooled {vector_type} client failed its health check, reconnecting.")
+        except Exception as e:
+            logger.warning(f"Pooled {vector_type} client failed its health check: {str(e)}, reconnecting.")
+        return False
+
+    @classmethod
+    def _evict_idle(cls, now: float) -> None:
+        idle_timeout = dify_config.VECTOR_CLIENT_POOL_IDLE_TIMEOUT
+        if not idle_timeout:
+            return
+        for key in [key for key, entry in cls._clients.items() if now - entry.last_used >= idle_timeout]:
+            del cls._clients[key]
+
+    @staticmethod
+    def _close(entry: _PooledClient) -> None:
+        if entry.close is None:
+            return
+        try:
+            entry.close(entry.client)
+        except Exception as e:
+            logger.warning(f"Failed to close unused vector database client: {str(e)}")
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._clients.clear()
+
+    @classmethod
+    def size(cls) -> int:
+        with cls._lock:
+            return len(cls._clients)
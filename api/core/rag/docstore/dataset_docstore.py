@@ -1,11 +1,13 @@
 from collections.abc import Sequence
 from typing import Any, Optional
+from uuid import uuid4
 
-from sqlalchemy import func
+from sqlalchemy import func, insert
 
+from configs import dify_config
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
-from core.rag.models.document import Document
+from core.rag.models.document import ChildDocument, Document
 from extensions.ext_database import db
 from models.dataset import ChildChunk, Dataset, DocumentSegment
 
@@ -85,59 +87,55 @@ class DatasetDocumentStore:
         else:
             tokens_list = [0] * len(docs)
 
-        for doc, tokens in zip(docs, tokens_list):
+        for doc in docs:
             if not isinstance(doc, Document):
                 raise ValueError("doc must be a Document")
 
             if doc.metadata is None:
                 raise ValueError("doc.metadata must be a dict")
 
-            segment_document = self.get_document_segment(doc_id=doc.metadata["doc_id"])
+        existing_segments = self._get_document_segments([doc.metadata["doc_id"] for doc in docs])
+        # doc ids of the segments added by this call, a repeated doc id updates the segment like an existing one
+        added_doc_ids: set[str] = set()
+        segment_rows: list[dict[str, Any]] = []
+        child_chunk_rows: list[dict[str, Any]] = []
+        batch_size = dify_config.DATASET_SEGMENT_INSERT_BATCH_SIZE
+
+        for index, (doc, tokens) in enumerate(zip(docs, tokens_list), start=1):
+            doc_id = doc.metadata["doc_id"]
+            segment_document = existing_segments.get(doc_id)
+            if segment_document is None and doc_id in added_doc_ids:
+                self._insert_segments(segment_rows, child_chunk_rows)
+                segment_rows, child_chunk_rows = [], []
+                segment_document = self.get_document_segment(doc_id=doc_id)
 
             # NOTE: doc could already exist in the store, but we overwrite it
             if not allow_update and segment_document:
-                raise ValueError(
-                    f"doc_id {doc.metadata['doc_id']} already exists. Set allow_update to True to overwrite."
-                )
+                raise ValueError(f"doc_id {doc_id} already exists. Set allow_update to True to overwrite.")
 
             if not segment_document:
                 max_position += 1
-
-                segment_document = DocumentSegment(
-                    tenant_id=self._dataset.tenant_id,
-                    dataset_id=self._dataset.id,
-                    document_id=self._document_id,
-                    index_node_id=doc.metadata["doc_id"],
-                    index_node_hash=doc.metadata["doc_hash"],
-                    position=max_position,
-                    content=doc.page_content,
-                    word_count=len(doc.page_content),
-                    tokens=tokens,
-                    enabled=False,
-                    created_by=self._user_id,
+                segment_id = str(uuid4())
+                segment_rows.append(
+                    {
+                        "id": segment_id,
+                        "tenant_id": self._dataset.tenant_id,
+                        "dataset_id": self._dataset.id,
+                        "document_id": self._document_id,
+                        "index_node_id": doc_id,
+                        "index_node_hash": doc.metadata["doc_hash"],
+                        "position": max_position,
+                        "content": doc.page_content,
+                        "answer": doc.metadata.pop("answer", "") if doc.metadata.get("answer") else None,
+                        "word_count": len(doc.page_content),
+                        "tokens": tokens,
+                        "enabled": False,
+                        "created_by": self._user_id,
+                    }
                 )
-                if doc.metadata.get("answer"):
-                    segment_document.answer = doc.metadata.pop("answer", "")
-
-                db.session.add(segment_document)
-                db.session.flush()
-                if save_child:
-                    if doc.children:
-                        for postion, child in enumerate(doc.children, start=1):
-                            child_segment = ChildChunk(
-                                tenant_id=self._dataset.tenant_id,
-                                dataset_id=self._dataset.id,
-                                document_id=self._document_id,
-                                segment_id=segment_document.id,
-                                position=postion,
-                                index_node_id=child.metadata.get("doc_id"),
-                                index_node_hash=child.metadata.get("doc_hash"),
-                                content=child.page_content,
-                                word_count=len(child.page_content),
-                                type="automatic",
-                                created_by=self._user_id,
-                            )
-                            db.session.add(child_segment)
+                added_doc_ids.add(doc_id)
+                if save_child and doc.children:
+                    child_chunk_rows.extend(self._child_chunk_rows(segment_id, doc.children))
             else:
                 segment_document.content = doc.page_content
                 if doc.metadata.get("answer"):
@@ -154,23 +152,60 @@ class DatasetDocumentStore:
                         ChildChunk.segment_id == segment_document.id,
                     ).delete()
                     # add new child chunks
-                    for position, child in enumerate(doc.children, start=1):
-                        child_segment = ChildChunk(
-                            tenant_id=self._dataset.tenant_id,
-                            dataset_id=self._dataset.id,
-                            document_id=self._document_id,
-                            segment_id=segment_document.id,
-                            position=position,
-                            index_node_id=child.metadata.get("doc_id"),
-                            index_node_hash=child.metadata.get("doc_hash"),
-                            content=child.page_content,
-                            word_count=len(child.page_content),
-                            type="automatic",
-                            created_by=self._user_id,
-                        )
-                        db.session.add(child_segment)
-
-            db.session.commit()
+                    child_chunk_rows.extend(self._child_chunk_rows(segment_document.id, doc.children))
+
+            if index % batch_size == 0:
+                self._insert_segments(segment_rows, child_chunk_rows)
+                segment_rows, child_chunk_rows = [], []
+                db.session.commit()
+
+        self._insert_segments(segment_rows, child_chunk_rows)
+        db.session.commit()
+
+    def _get_document_segments(self, doc_ids: Sequence[str]) -> dict[str, DocumentSegment]:
+        """Prefetch the segments of the given doc ids with chunked `IN` queries."""
+        unique_doc_ids = list(dict.fromkeys(doc_ids))
+        batch_size = dify_config.DATASET_SEGMENT_INSERT_BATCH_SIZE
+        document_segments: dict[str, DocumentSegment] = {}
+        for i in range(0, len(unique_doc_ids), batch_size):
+            segments = (
+                db.session.query(DocumentSegment)
+                .filter(
+                    DocumentSegment.dataset_id == self._dataset.id,
+                    DocumentSegment.index_node_id.in_(unique_doc_ids[i : i + batch_size]),
+                )
+                .all()
+            )
+            for segment in segments:
+                # keep the first match like get_document_segment
+                document_segments.setdefault(segment.index_node_id, segment)
+        return document_segments
+
+    def _child_chunk_rows(self, segment_id: str, children: Sequence[ChildDocument]) -> list[dict[str, Any]]:
+        return [
+            {
+                "tenant_id": self._dataset.tenant_id,
+                "dataset_id": self._dataset.id,
+                "document_id": self._document_id,
+                "segment_id": segment_id,
+                "position": position,
+                "index_node_id": child.metadata.get("doc_id"),
+                "index_node_hash": child.metadata.get("doc_hash"),
+                "content": child.page_content,
+                "word_count": len(child.page_content),
+                "type": "automatic",
+                "created_by": self._user_id,
+            }
+            for position, child in enumerate(children, start=1)
+        ]
+
+    @staticmethod
+    def _insert_segments(segment_rows: list[dict[str, Any]], child_chunk_rows: list[dict[str, Any]]) -> None:
+        """Bulk insert the pending segments and child chunks."""
+        if segment_rows:
+            db.session.execute(insert(DocumentSegment), segment_rows)
+        if child_chunk_rows:
+            db.session.execute(insert(ChildChunk), child_chunk_rows)
 
     def document_exists(self, doc_id: str) -> bool:
         """Check if document exists."""
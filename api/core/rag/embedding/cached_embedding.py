@@ -1,16 +1,18 @@
-import base64
 import logging
 from typing import Any, Optional, cast
 
 import numpy as np
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
 from configs import dify_config
 from core.entities.embedding_type import EmbeddingInputType
+from core.helper.lru_cache import TTLLRUCache
 from core.model_manager import ModelInstance
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
 from core.rag.embedding.embedding_base import Embeddings
+from core.rag.embedding.embedding_codec import EmbeddingStorageFormat, decode_embedding, encode_embedding
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from libs import helper
@@ -18,8 +20,18 @@ from models.dataset import Embedding
 
 logger = logging.getLogger(__name__)
 
+# per-process tier in front of the redis query embedding cache, keyed like the redis entries
+query_embedding_cache = TTLLRUCache(
+    capacity=dify_config.QUERY_EMBEDDING_LOCAL_CACHE_SIZE, ttl=dify_config.QUERY_EMBEDDING_LOCAL_CACHE_TTL
+)
+
 
 class CacheEmbedding(Embeddings):
+    @staticmethod
+    def query_cache_stats() -> dict[str, int]:
+        """Hit/miss counters of the in-process query embedding cache."""
+        return query_embedding_cache.stats()
+
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
         self._model_instance = model_instance
         self._user = user
@@ -28,18 +40,12 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings: list[Any] = [None for _ in range(len(texts))]
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(text_hashes)
         embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = (
-                db.session.query(Embedding)
-                .filter_by(
-                    model_name=self._model_instance.model, hash=hash, provider_name=self._model_instance.provider
-                )
-                .first()
-            )
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
+        for i, hash in enumerate(text_hashes):
+            if hash in cached_embeddings:
+                text_embeddings[i] = cached_embeddings[hash]
             else:
                 embedding_queue_indices.append(i)
         if embedding_queue_indices:
@@ -76,23 +82,11 @@ class CacheEmbedding(Embeddings):
                             db.session.rollback()
                         except Exception:
                             logging.exception("Failed transform embedding")
-                cache_embeddings = []
-                try:
-                    for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
-                        text_embeddings[i] = n_embedding
-                        hash = helper.generate_text_hash(texts[i])
-                        if hash not in cache_embeddings:
-                            embedding_cache = Embedding(
-                                model_name=self._model_instance.model,
-                                hash=hash,
-                                provider_name=self._model_instance.provider,
-                            )
-                            embedding_cache.set_embedding(n_embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
+                new_embeddings: dict[str, list[float]] = {}
+                for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
+                    text_embeddings[i] = n_embedding
+                    new_embeddings.setdefault(text_hashes[i], n_embedding)
+                self._save_cached_embeddings(new_embeddings)
             except Exception as ex:
                 db.session.rollback()
                 logger.exception("Failed to embed documents: %s")
@@ -100,16 +94,70 @@ class CacheEmbedding(Embeddings):
 
         return text_embeddings
 
+    def _get_cached_embeddings(self, text_hashes: list[str]) -> dict[str, list[float]]:
+        """Resolve cached document embeddings for the given text hashes with chunked `IN` queries."""
+        unique_hashes = list(dict.fromkeys(text_hashes))
+        batch_size = dify_config.EMBEDDING_CACHE_QUERY_BATCH_SIZE
+        cached_embeddings: dict[str, list[float]] = {}
+        for i in range(0, len(unique_hashes), batch_size):
+            embeddings = (
+                db.session.query(Embedding)
+                .filter(
+                    Embedding.model_name == self._model_instance.model,
+                    Embedding.provider_name == self._model_instance.provider,
+                    Embedding.hash.in_(unique_hashes[i : i + batch_size]),
+                )
+                .all()
+            )
+            for embedding in embeddings:
+                cached_embeddings[embedding.hash] = embedding.get_embedding()
+        return cached_embeddings
+
+    def _save_cached_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        """Bulk insert newly computed document embeddings, skipping rows cached concurrently by other workers."""
+        if not embeddings:
+            return
+        rows = []
+        # concurrent indexing batches insert in the same hash order, so they wait on each other instead of deadlocking
+        for hash, n_embedding in sorted(embeddings.items()):
+            embedding_cache = Embedding(
+                model_name=self._model_instance.model,
+                hash=hash,
+                provider_name=self._model_instance.provider,
+            )
+            embedding_cache.set_embedding(n_embedding)
+            rows.append(
+                {
+                    "model_name": embedding_cache.model_name,
+                    "hash": embedding_cache.hash,
+                    "provider_name": embedding_cache.provider_name,
+                    "embedding": embedding_cache.embedding,
+                }
+            )
+        batch_size = dify_config.EMBEDDING_CACHE_QUERY_BATCH_SIZE
+        try:
+            for i in range(0, len(rows), batch_size):
+                stmt = insert(Embedding).values(rows[i : i + batch_size])
+                stmt = stmt.on_conflict_do_nothing(constraint="embedding_hash_idx")
+                db.session.execute(stmt)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
         # use doc embedding cache or store if not exists
         hash = helper.generate_text_hash(text)
         embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}"
+        local_embedding = query_embedding_cache.get(embedding_cache_key)
+        if local_embedding is not None:
+            return list(local_embedding)
         embedding = redis_client.get(embedding_cache_key)
         if embedding:
             redis_client.expire(embedding_cache_key, 600)
-            decoded_embedding = np.frombuffer(base64.b64decode(embedding), dtype="float")
-            return [float(x) for x in decoded_embedding]
+            decoded_embedding = decode_embedding(embedding)
+            query_embedding_cache.put(embedding_cache_key, tuple(decoded_embedding))
+            return decoded_embedding
         try:
             embedding_result = self._model_instance.invoke_text_embedding(
                 texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
@@ -126,14 +174,11 @@ class CacheEmbedding(Embeddings):
             raise ex
 
         try:
-            # encode embedding to base64
-            embedding_vector = np.array(embedding_results)
-            vector_bytes = embedding_vector.tobytes()
-            # Transform to Base64
-            encoded_vector = base64.b64encode(vector_bytes)
-            # Transform to string
-            encoded_str = encoded_vector.decode("utf-8")
-            redis_client.setex(embedding_cache_key, 600, encoded_str)
+            encoded_embedding = encode_embedding(
+                embedding_results, EmbeddingStorageFormat(dify_config.EMBEDDING_CACHE_STORAGE_FORMAT)
+            )
+            redis_client.setex(embedding_cache_key, 600, encoded_embedding)
+            query_embedding_cache.put(embedding_cache_key, tuple(embedding_results))
         except Exception as ex:
             if dify_config.DEBUG:
                 logging.exception(f"Failed to add embedding to redis for the text '{text[:10]}...({len(text)} chars)'")
@@ -0,0 +1,81 @@
+import base64
+import pickle
+import struct
+from enum import StrEnum
+from typing import cast
+
+import numpy as np
+
+# Header layout: magic (2 bytes) | version (1 byte) | dtype code (1 byte) | dimension (uint32, little endian).
+# The magic is neither a pickle protocol marker (0x80) nor base64 text, so legacy payloads are never mistaken for it.
+_MAGIC = b"\xd1\xfe"
+_VERSION = 1
+_HEADER = struct.Struct("<2sBBI")
+_INT8_SCALE = struct.Struct("<f")
+
+
+class EmbeddingStorageFormat(StrEnum):
+    FLOAT32 = "float32"
+    FLOAT16 = "float16"
+    INT8 = "int8"
+
+
+_DTYPE_CODES = {
+    EmbeddingStorageFormat.FLOAT32: 0,
+    EmbeddingStorageFormat.FLOAT16: 1,
+    EmbeddingStorageFormat.INT8: 2,
+}
+_CODE_DTYPES = {code: storage_format for storage_format, code in _DTYPE_CODES.items()}
+
+
+def encode_embedding(
+    embedding: list[float], storage_format: EmbeddingStorageFormat = EmbeddingStorageFormat.FLOAT32
+) -> bytes:
+    """
+    Encode an embedding into the compact, versioned binary format.
+    int8 payloads are prefixed by the float32 scale used for symmetric quantization.
+    """
+    storage_format = EmbeddingStorageFormat(storage_format)
+    vector = np.asarray(embedding, dtype=np.float32)
+    header = _HEADER.pack(_MAGIC, _VERSION, _DTYPE_CODES[storage_format], vector.size)
+    if storage_format == EmbeddingStorageFormat.INT8:
+        max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        quantized: bytes = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8).tobytes()
+        return header + _INT8_SCALE.pack(scale) + quantized
+    return header + vector.astype(storage_format.value).tobytes()
+
+
+def is_compact_embedding(data: bytes) -> bool:
+    return data[: len(_MAGIC)] == _MAGIC
+
+
+def decode_embedding(data: bytes) -> list[float]:
+    """
+    Decode an embedding written by `encode_embedding`.
+    Legacy pickled lists (embeddings table) and base64 float64 buffers (redis query cache) are read transparently.
+    """
+    if not is_compact_embedding(data):
+        return _decode_legacy_embedding(data)
+
+    _, version, dtype_code, dimension = _HEADER.unpack_from(data)
+    if version != _VERSION:
+        raise ValueError(f"Unsupported embedding encoding version: {version}")
+    storage_format = _CODE_DTYPES.get(dtype_code)
+    if storage_format is None:
+        raise ValueError(f"Unsupported embedding dtype code: {dtype_code}")
+
+    offset = _HEADER.size
+    if storage_format == EmbeddingStorageFormat.INT8:
+        (scale,) = _INT8_SCALE.unpack_from(data, offset)
+        offset += _INT8_SCALE.size
+        quantized = np.frombuffer(data, dtype=np.int8, count=dimension, offset=offset)
+        return cast(list[float], (quantized.astype(np.float32) * scale).tolist())
+    vector = np.frombuffer(data, dtype=storage_format.value, count=dimension, offset=offset)
+    return cast(list[float], vector.astype(np.float32).tolist())
+
+
+def _decode_legacy_embedding(data: bytes) -> list[float]:
+    if data[:1] == b"\x80":
+        return cast(list[float], pickle.loads(data))  # noqa: S301
+    return cast(list[float], np.frombuffer(base64.b64decode(data), dtype="float").tolist())
@@ -1,9 +1,9 @@
 import math
-from collections import Counter
-from typing import Optional
+from typing import Optional, cast
 
 import numpy as np
 
+from configs import dify_config
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
@@ -11,6 +11,8 @@ from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.models.document import Document
 from core.rag.rerank.entity.weight import VectorSetting, Weights
 from core.rag.rerank.rerank_base import BaseRerankRunner
+from extensions.ext_database import db
+from models.dataset import DocumentSegment
 
 
 class WeightRerankRunner(BaseRerankRunner):
@@ -65,7 +67,7 @@ class WeightRerankRunner(BaseRerankRunner):
 
     def _calculate_keyword_score(self, query: str, documents: list[Document]) -> list[float]:
         """
-        Calculate BM25 scores
+        Calculate TF-IDF cosine scores
         :param query: search query
         :param documents: documents for reranking
 
@@ -73,72 +75,88 @@ class WeightRerankRunner(BaseRerankRunner):
         """
         keyword_table_handler = JiebaKeywordTableHandler()
         query_keywords = keyword_table_handler.extract_keywords(query, None)
+        indexed_keywords = self._get_indexed_keywords(documents)
+        if any(
+            document.metadata is not None and document.metadata["doc_id"] not in indexed_keywords
+            for document in documents
+        ):
+            # indexed keywords are capped and may be edited, never score one candidate set with both regimes
+            indexed_keywords = {}
         documents_keywords = []
         for document in documents:
-            # get the document keywords
-            document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
-            if document.metadata is not None:
-                document.metadata["keywords"] = document_keywords
-                documents_keywords.append(document_keywords)
-
-        # Counter query keywords(TF)
-        query_keyword_counts = Counter(query_keywords)
-
-        # total documents
+            # get the document keywords, reuse the ones extracted at indexing time when available
+            if document.metadata is None:
+                continue
+            document_keywords = indexed_keywords.get(document.metadata["doc_id"])
+            if document_keywords is None:
+                document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
+            document.metadata["keywords"] = document_keywords
+            documents_keywords.append(document_keywords)
+
+        if not documents_keywords:
+            return []
+
+        # sparse document-term matrix in coordinate form, keywords are sets so every TF is 1
+        vocabulary: dict[str, int] = {}
+        rows: list[int] = []
+        cols: list[int] = []
+        for row, document_keywords in enumerate(documents_keywords):
+            for keyword in document_keywords:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(keyword, len(vocabulary)))
+        row_index = np.asarray(rows, dtype=np.int64)
+        col_index = np.asarray(cols, dtype=np.int64)
+
+        # IDF of all documents' keywords
         total_documents = len(documents)
+        doc_count_containing_keyword = np.bincount(col_index, minlength=len(vocabulary))
+        keyword_idf = np.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
+        keyword_idf_square = keyword_idf**2
+
+        # query TF-IDF over the documents' vocabulary, keywords unknown to the documents weigh 0
+        query_mask = np.zeros(len(vocabulary))
+        for keyword in query_keywords:
+            if keyword in vocabulary:
+                query_mask[vocabulary[keyword]] = 1.0
+
+        numerators = np.bincount(
+            row_index, weights=(keyword_idf_square * query_mask)[col_index], minlength=len(documents_keywords)
+        )
+        documents_norm = np.sqrt(
+            np.bincount(row_index, weights=keyword_idf_square[col_index], minlength=len(documents_keywords))
+        )
+        query_norm = math.sqrt(float(np.dot(keyword_idf_square, query_mask)))
 
-        # calculate all documents' keywords IDF
-        all_keywords = set()
-        for document_keywords in documents_keywords:
-            all_keywords.update(document_keywords)
-
-        keyword_idf = {}
-        for keyword in all_keywords:
-            # calculate include query keywords' documents
-            doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
-            # IDF
-            keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
-
-        query_tfidf = {}
-
-        for keyword, count in query_keyword_counts.items():
-            tf = count
-            idf = keyword_idf.get(keyword, 0)
-            query_tfidf[keyword] = tf * idf
-
-        # calculate all documents' TF-IDF
-        documents_tfidf = []
-        for document_keywords in documents_keywords:
-            document_keyword_counts = Counter(document_keywords)
-            document_tfidf = {}
-            for keyword, count in document_keyword_counts.items():
-                tf = count
-                idf = keyword_idf.get(keyword, 0)
-                document_tfidf[keyword] = tf * idf
-            documents_tfidf.append(document_tfidf)
-
-        def cosine_similarity(vec1, vec2):
-            intersection = set(vec1.keys()) & set(vec2.keys())
-            numerator = sum(vec1[x] * vec2[x] for x in intersection)
-
-            sum1 = sum(vec1[x] ** 2 for x in vec1)
-            sum2 = sum(vec2[x] ** 2 for x in vec2)
-            denominator = math.sqrt(sum1) * math.sqrt(sum2)
-
-            if not denominator:
-                return 0.0
-            else:
-                return float(numerator) / denominator
+        denominators = documents_norm * query_norm
+        similarities = np.divide(numerators, denominators, out=np.zeros_like(numerators), where=denominators > 0)
 
-        similarities = []
-        for document_tfidf in documents_tfidf:
-            similarity = cosine_similarity(query_tfidf, document_tfidf)
-            similarities.append(similarity)
+        return cast(list[float], similarities.tolist())
 
-        # for idx, similarity in enumerate(similarities):
-        #     print(f"Document {idx + 1} similarity: {similarity}")
+    def _get_indexed_keywords(self, documents: list[Document]) -> dict[str, set[str]]:
+        """
+        Load the keywords extracted at indexing time for the candidates in one query
+        :param documents: documents for reranking
 
-        return similarities
+        :return: keywords by index node id
+        """
+        if not dify_config.WEIGHT_RERANK_REUSE_INDEXED_KEYWORDS:
+            return {}
+        dataset_ids = {document.metadata.get("dataset_id") for document in documents if document.metadata}
+        index_node_ids = {document.metadata.get("doc_id") for document in documents if document.metadata}
+        dataset_ids.discard(None)
+        index_node_ids.discard(None)
+        if not dataset_ids or not index_node_ids:
+            return {}
+
+        segments = (
+            db.session.query(DocumentSegment.index_node_id, DocumentSegment.keywords)
+            .filter(
+                DocumentSegment.dataset_id.in_(dataset_ids),
+                DocumentSegment.index_node_id.in_(index_node_ids),
+            )
+            .all()
+        )
+        return {index_node_id: set(keywords) for index_node_id, keywords in segments if keywords}
 
     def _calculate_cosine(
         self, tenant_id: str, query: str, documents: list[Document], vector_setting: VectorSetting
@@ -150,7 +168,7 @@ class WeightRerankRunner(BaseRerankRunner):
 
         :return:
         """
-        query_vector_scores = []
+        query_vector_scores: list[float] = [0.0] * len(documents)
 
         model_manager = ModelManager()
 
@@ -161,25 +179,22 @@ class WeightRerankRunner(BaseRerankRunner):
             model=vector_setting.embedding_model_name,
         )
         cache_embedding = CacheEmbedding(embedding_model)
-        query_vector = cache_embedding.embed_query(query)
-        for document in documents:
-            # calculate cosine similarity
+        query_vector = np.asarray(cache_embedding.embed_query(query), dtype=np.float64)
+
+        # documents already scored by the vector store keep their score, the rest are scored in one matrix product
+        unscored_indices = []
+        for i, document in enumerate(documents):
             if document.metadata and "score" in document.metadata:
-                query_vector_scores.append(document.metadata["score"])
+                query_vector_scores[i] = document.metadata["score"]
             else:
-                # transform to NumPy
-                vec1 = np.array(query_vector)
-                vec2 = np.array(document.vector)
-
-                # calculate dot product
-                dot_product = np.dot(vec1, vec2)
+                unscored_indices.append(i)
 
-                # calculate norm
-                norm_vec1 = np.linalg.norm(vec1)
-                norm_vec2 = np.linalg.norm(vec2)
-
-                # calculate cosine similarity
-                cosine_sim = dot_product / (norm_vec1 * norm_vec2)
-                query_vector_scores.append(cosine_sim)
+        if unscored_indices:
+            document_vectors = np.asarray([documents[i].vector for i in unscored_indices], dtype=np.float64)
+            cosine_sims = (document_vectors @ query_vector) / (
+                np.linalg.norm(document_vectors, axis=1) * np.linalg.norm(query_vector)
+            )
+            for i, cosine_sim in zip(unscored_indices, cosine_sims.tolist()):
+                query_vector_scores[i] = cosine_sim
 
         return query_vector_scores
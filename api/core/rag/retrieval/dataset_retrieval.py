@@ -384,6 +384,7 @@ class DatasetRetrieval:
                             reranking_mode=retrieval_model_config.get("reranking_mode", "reranking_model"),
                             weights=retrieval_model_config.get("weights", None),
                             document_ids_filter=document_ids_filter,
+                            dataset=dataset,
                         )
                 self._on_query(query, [dataset_id], app_id, user_from, user_id)
 
@@ -615,6 +616,7 @@ class DatasetRetrieval:
                         query=query,
                         top_k=top_k,
                         document_ids_filter=document_ids_filter,
+                        dataset=dataset,
                     )
                     if documents:
                         all_documents.extend(documents)
@@ -635,6 +637,7 @@ class DatasetRetrieval:
                             reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                             weights=retrieval_model.get("weights", None),
                             document_ids_filter=document_ids_filter,
+                            dataset=dataset,
                         )
 
                         all_documents.extend(documents)
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import logging
 from typing import Any, Optional
 
+from configs import dify_config
 from core.model_manager import ModelInstance
 from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
 from core.rag.splitter.text_splitter import (
@@ -16,6 +18,59 @@ from core.rag.splitter.text_splitter import (
     Union,
 )
 
+logger = logging.getLogger(__name__)
+
+
+class SplitterTokenCounter:
+    """
+    Token length function of the splitters built from an encoder, every distinct text is counted once.
+    Texts are counted by the local GPT-2 encoder, scaled to the tokenizer of the embedding model by a ratio measured
+    with one embedding model call on a sample of the first splits, instead of one remote call per length lookup.
+    """
+
+    def __init__(self, embedding_model_instance: Optional[ModelInstance]):
+        self._embedding_model_instance = embedding_model_instance
+        self._lengths: dict[str, int] = {}
+        self._ratio: Optional[float] = None if embedding_model_instance else 1.0
+
+    def __call__(self, texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+
+        missing = list(dict.fromkeys(text for text in texts if text not in self._lengths))
+        if missing:
+            self._lengths.update(zip(missing, self._count(missing)))
+        return [self._lengths[text] for text in texts]
+
+    def _count(self, texts: list[str]) -> list[int]:
+        if self._embedding_model_instance and not dify_config.TEXT_SPLITTER_LOCAL_TOKEN_COUNT_ENABLED:
+            return self._embedding_model_instance.get_text_embedding_num_tokens(texts=texts)
+
+        lengths = GPT2Tokenizer.get_num_tokens_batch(texts)
+        if self._ratio is None:
+            self._ratio = self._calibrate(texts, lengths)
+        if not self._ratio or self._ratio == 1.0:
+            return lengths
+        return [max(1, round(length * self._ratio)) if length else 0 for length in lengths]
+
+    def _calibrate(self, texts: list[str], lengths: list[int]) -> Optional[float]:
+        sample_size = dify_config.TEXT_SPLITTER_TOKEN_CALIBRATION_SAMPLE_SIZE
+        if not self._embedding_model_instance or not sample_size:
+            return 1.0
+        sample = [(text, length) for text, length in zip(texts, lengths) if length][:sample_size]
+        if not sample:
+            # only empty texts so far, calibrate on the next ones
+            return None
+
+        try:
+            model_lengths = self._embedding_model_instance.get_text_embedding_num_tokens(
+                texts=[text for text, _ in sample]
+            )
+        except Exception:
+            logger.warning("Failed to count tokens with the embedding model, using the GPT-2 counts", exc_info=True)
+            return 1.0
+        return sum(model_lengths) / sum(length for _, length in sample) if sum(model_lengths) else 1.0
+
 
 class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
     """
@@ -30,14 +85,7 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
         disallowed_special: Union[Literal["all"], Collection[str]] = "all",  # noqa: UP037
         **kwargs: Any,
     ):
-        def _token_encoder(texts: list[str]) -> list[int]:
-            if not texts:
-                return []
-
-            if embedding_model_instance:
-                return embedding_model_instance.get_text_embedding_num_tokens(texts=texts)
-            else:
-                return [GPT2Tokenizer.get_num_tokens(text) for text in texts]
+        _token_encoder = SplitterTokenCounter(embedding_model_instance)
 
         if issubclass(cls, TokenTextSplitter):
             extra_kwargs = {
@@ -175,6 +175,7 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                     dataset_id=dataset.id,
                     query=query,
                     top_k=retrieval_model.get("top_k") or 2,
+                    dataset=dataset,
                 )
                 if documents:
                     all_documents.extend(documents)
@@ -194,6 +195,7 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                         else None,
                         reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                         weights=retrieval_model.get("weights", None),
+                        dataset=dataset,
                     )
 
                     all_documents.extend(documents)
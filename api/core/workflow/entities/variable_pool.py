@@ -1,7 +1,8 @@
 import re
 from collections import defaultdict
 from collections.abc import Mapping, Sequence
-from typing import Any, Union
+from functools import lru_cache
+from typing import Any, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -17,13 +18,42 @@ VariableValue = Union[str, int, float, dict, list, File]
 
 VARIABLE_PATTERN = re.compile(r"\{\{#([a-zA-Z0-9_]{1,50}(?:\.[a-zA-Z_][a-zA-Z0-9_]{0,29}){1,10})#\}\}")
 
+# Python support `attr in FileAttribute` after 3.12
+_FILE_ATTRIBUTE_VALUES = frozenset(item.value for item in FileAttribute)
+
+
+# node templates are static and memoized, longer templates are mostly prompts with retrieved context or
+# conversation text substituted in, which never repeat and would only fill the cache
+_MAX_CACHED_TEMPLATE_LENGTH = 4096
+
+
+def _split_template(template: str) -> tuple[tuple[Segment, Optional[list[str]]], ...]:
+    """
+    Split a template into its parts, each part is the literal segment used when the part does not resolve
+    to a variable and the selector to look it up with, if any.
+    """
+    return tuple(
+        (variable_factory.build_segment(part), part.split(".") if "." in part else None)
+        for part in VARIABLE_PATTERN.split(template)
+        if part
+    )
+
+
+_split_template_cached = lru_cache(maxsize=1024)(_split_template)
+
+
+def _compile_template(template: str) -> tuple[tuple[Segment, Optional[list[str]]], ...]:
+    if len(template) > _MAX_CACHED_TEMPLATE_LENGTH:
+        return _split_template(template)
+    return _split_template_cached(template)
+
 
 class VariablePool(BaseModel):
     # Variable dictionary is a dictionary for looking up variables by their selector.
     # The first element of the selector is the node id, it's the first-level key in the dictionary.
-    # Other elements of the selector are the keys in the second-level dictionary. To get the key, we hash the
+    # Other elements of the selector are the keys in the second-level dictionary. The key is the tuple of the
     # elements of the selector except the first one.
-    variable_dictionary: dict[str, dict[int, Segment]] = Field(
+    variable_dictionary: dict[str, dict[tuple[str, ...], Segment]] = Field(
         description="Variables mapping",
         default=defaultdict(dict),
     )
@@ -43,6 +73,23 @@ class VariablePool(BaseModel):
         default_factory=list,
     )
 
+    # Plain fields rather than private attributes, which are much slower to read on the hot lookup path.
+    parent: Optional["VariablePool"] = Field(
+        description="Parent scope of a copy-on-write child pool, see `create_child`.",
+        default=None,
+        exclude=True,
+    )
+    removed_keys: set[tuple[str, tuple[str, ...]]] = Field(
+        description="Selectors removed from a child pool, they hide the values of the parent scope.",
+        default_factory=set,
+        exclude=True,
+    )
+    removed_node_ids: set[str] = Field(
+        description="Node ids removed from a child pool, they hide the values of the parent scope.",
+        default_factory=set,
+        exclude=True,
+    )
+
     def __init__(
         self,
         *,
@@ -102,8 +149,10 @@ class VariablePool(BaseModel):
             segment = variable_factory.build_segment(value)
             variable = variable_factory.segment_to_variable(segment=segment, selector=selector)
 
-        hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]][hash_key] = variable
+        key = tuple(selector[1:])
+        self.variable_dictionary[selector[0]][key] = variable
+        if self.parent is not None:
+            self.removed_keys.discard((selector[0], key))
 
     def get(self, selector: Sequence[str], /) -> Segment | None:
         """
@@ -121,13 +170,15 @@ class VariablePool(BaseModel):
         if len(selector) < 2:
             return None
 
-        hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        key = tuple(selector[1:])
+        variables = self.variable_dictionary.get(selector[0])
+        value = variables.get(key) if variables else None
+        if value is None and self.parent is not None:
+            value = self._lookup_parents(selector[0], key)
 
         if value is None:
             selector, attr = selector[:-1], selector[-1]
-            # Python support `attr in FileAttribute` after 3.12
-            if attr not in {item.value for item in FileAttribute}:
+            if attr not in _FILE_ATTRIBUTE_VALUES:
                 return None
             value = self.get(selector)
             if not isinstance(value, FileSegment | NoneSegment):
@@ -154,18 +205,53 @@ class VariablePool(BaseModel):
             return
         if len(selector) == 1:
             self.variable_dictionary[selector[0]] = {}
+            if self.parent is not None:
+                self.removed_node_ids.add(selector[0])
             return
-        hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]].pop(hash_key, None)
+        key = tuple(selector[1:])
+        self.variable_dictionary[selector[0]].pop(key, None)
+        if self.parent is not None:
+            self.removed_keys.add((selector[0], key))
+
+    def create_child(self) -> "VariablePool":
+        """
+        Create a copy-on-write scope of the variable pool.
+
+        The child reads through to this pool and only stores its own writes and removals, so creating it does not
+        copy any variable. Writes of the child are never seen by this pool.
+
+        Returns:
+            VariablePool: The child pool.
+        """
+        child = VariablePool.model_construct(
+            variable_dictionary=defaultdict(dict),
+            user_inputs=self.user_inputs,
+            system_variables=self.system_variables,
+            environment_variables=self.environment_variables,
+            conversation_variables=self.conversation_variables,
+            parent=self,
+        )
+        return child
+
+    def _lookup_parents(self, node_id: str, key: tuple[str, ...]) -> Segment | None:
+        pool: VariablePool = self
+        while pool.parent is not None:
+            if node_id in pool.removed_node_ids or (node_id, key) in pool.removed_keys:
+                return None
+            pool = pool.parent
+            variables = pool.variable_dictionary.get(node_id)
+            value = variables.get(key) if variables else None
+            if value is not None:
+                return value
+        return None
 
     def convert_template(self, template: str, /):
-        parts = VARIABLE_PATTERN.split(template)
         segments = []
-        for part in filter(lambda x: x, parts):
-            if "." in part and (variable := self.get(part.split("."))):
+        for literal, selector in _compile_template(template):
+            if selector and (variable := self.get(selector)):
                 segments.append(variable)
             else:
-                segments.append(variable_factory.build_segment(part))
+                segments.append(literal)
         return SegmentGroup(value=segments)
 
     def get_file(self, selector: Sequence[str], /) -> FileSegment | None:
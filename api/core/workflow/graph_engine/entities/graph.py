@@ -52,6 +52,9 @@ class Graph(BaseModel):
     )
     answer_stream_generate_routes: AnswerStreamGenerateRoute = Field(..., description="answer stream generate routes")
     end_stream_param: EndStreamParam = Field(..., description="end stream param")
+    version_hash: Optional[str] = Field(
+        default=None, description="hash of the workflow graph this graph was compiled from, set when cached"
+    )
 
     @classmethod
     def init(cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None) -> "Graph":
@@ -0,0 +1,76 @@
+import hashlib
+import logging
+from collections.abc import Mapping
+from typing import Any, Optional, cast
+
+from configs import dify_config
+from core.helper.lru_cache import TTLLRUCache
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.nodes import NodeType
+
+logger = logging.getLogger(__name__)
+
+_graph_cache = TTLLRUCache(capacity=dify_config.WORKFLOW_GRAPH_CACHE_SIZE, ttl=dify_config.WORKFLOW_GRAPH_CACHE_TTL)
+
+_SUB_GRAPH_NODE_TYPES = {NodeType.ITERATION.value, NodeType.LOOP.value}
+
+
+class GraphCache:
+    """
+    Process-wide cache of compiled graphs keyed by (workflow id, graph version hash, root node id).
+    Compiled graphs are shared between runs and must be treated as read-only.
+    """
+
+    @staticmethod
+    def version_hash(graph: str) -> str:
+        return hashlib.sha256(graph.encode()).hexdigest()
+
+    @classmethod
+    def get_graph(
+        cls,
+        workflow_id: str,
+        version_hash: str,
+        graph_config: Mapping[str, Any],
+        root_node_id: Optional[str] = None,
+    ) -> Graph:
+        """
+        Return the compiled graph, compiling it on a miss.
+        Compiling a whole workflow also compiles the sub graphs of its iteration and loop nodes.
+        """
+        key = (workflow_id, version_hash, root_node_id)
+        cached = _graph_cache.get(key)
+        if cached is not None:
+            return cast(Graph, cached)
+
+        graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        graph.version_hash = version_hash
+        _graph_cache.put(key, graph)
+        if root_node_id is None:
+            cls._precompile_sub_graphs(workflow_id, version_hash, graph_config)
+        return graph
+
+    @classmethod
+    def get_sub_graph(
+        cls, workflow_id: str, parent_graph: Graph, graph_config: Mapping[str, Any], root_node_id: str
+    ) -> Graph:
+        """Return the sub graph of an iteration or loop node, cached when its parent graph is."""
+        if not parent_graph.version_hash:
+            return Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        return cls.get_graph(workflow_id, parent_graph.version_hash, graph_config, root_node_id)
+
+    @classmethod
+    def _precompile_sub_graphs(cls, workflow_id: str, version_hash: str, graph_config: Mapping[str, Any]) -> None:
+        for node_config in graph_config.get("nodes") or []:
+            node_data = node_config.get("data", {})
+            start_node_id = node_data.get("start_node_id")
+            if node_data.get("type") not in _SUB_GRAPH_NODE_TYPES or not start_node_id:
+                continue
+            try:
+                cls.get_graph(workflow_id, version_hash, graph_config, start_node_id)
+            except Exception:
+                # an invalid sub graph fails when its node runs, as it does without the cache
+                logger.debug(f"Failed to precompile sub graph {start_node_id} of workflow {workflow_id}", exc_info=True)
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        return _graph_cache.stats()
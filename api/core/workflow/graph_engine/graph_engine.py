@@ -1,12 +1,15 @@
 import contextvars
 import logging
 import queue
+import threading
 import time
 import uuid
-from collections.abc import Generator, Mapping
-from concurrent.futures import ThreadPoolExecutor, wait
-from copy import copy, deepcopy
+from collections import deque
+from collections.abc import Callable, Generator, Mapping
+from concurrent.futures import Future, wait
+from copy import copy
 from datetime import UTC, datetime
+from functools import partial
 from typing import Any, Optional, cast
 
 from flask import Flask, current_app
@@ -41,6 +44,7 @@ from core.workflow.graph_engine.entities.graph import Graph, GraphEdge
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.graph_engine.worker_pool import GraphEngineWorkerPool
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.agent.agent_node import AgentNode
 from core.workflow.nodes.agent.entities import AgentNodeData
@@ -59,24 +63,95 @@ from models.workflow import WorkflowNodeExecutionStatus, WorkflowType
 logger = logging.getLogger(__name__)
 
 
-class GraphEngineThreadPool(ThreadPoolExecutor):
+class GraphEngineThreadPool:
+    """
+    Per-run view of the shared GraphEngineWorkerPool, capping how many tasks of one run execute concurrently.
+    Tasks over the cap are queued and handed to the worker pool as the run's tasks finish, so submitting never
+    blocks the caller, which keeps consuming the events of the running tasks meanwhile.
+    """
+
     def __init__(
         self,
-        max_workers=None,
-        thread_name_prefix="",
-        initializer=None,
-        initargs=(),
-        max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+        max_workers: Optional[int] = None,
+        max_submit_count: int = dify_config.MAX_SUBMIT_COUNT,
+        run_inline_when_full: bool = True,
     ) -> None:
-        super().__init__(max_workers, thread_name_prefix, initializer, initargs)
+        """
+        :param max_workers: max tasks of the run executing concurrently
+        :param max_submit_count: max tasks submitted and not done
+        :param run_inline_when_full: run tasks submitted from a worker inline when the cap is reached, required when
+            tasks wait on the tasks they submit, a task queued behind its waiting parent would never start
+        """
+        self.max_workers = max_workers or dify_config.GRAPH_ENGINE_RUN_MAX_WORKERS
         self.max_submit_count = max_submit_count
+        self.run_inline_when_full = run_inline_when_full
         self.submit_count = 0
+        self._running = 0
+        self._pending: deque[tuple[Future, Callable[..., Any], tuple[Any, ...], dict[str, Any]]] = deque()
+        self._lock = threading.Lock()
 
-    def submit(self, fn, /, *args, **kwargs):
+    def submit(self, fn, /, *args, **kwargs) -> Future:
         self.submit_count += 1
         self.check_is_full()
 
-        return super().submit(fn, *args, **kwargs)
+        with self._lock:
+            has_slot = not self._pending and self._running < self.max_workers
+            if has_slot:
+                self._running += 1
+        if has_slot:
+            return self._start(fn, args, kwargs)
+
+        if self.run_inline_when_full and GraphEngineWorkerPool.in_worker():
+            return GraphEngineWorkerPool.run_inline(fn, *args, **kwargs)
+
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((future, fn, args, kwargs))
+        self._dispatch()
+        return future
+
+    def _start(self, fn: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]) -> Future:
+        try:
+            future = GraphEngineWorkerPool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """
+        Hand queued tasks to the worker pool while the run has free slots, skipping the cancelled ones.
+        """
+        while True:
+            with self._lock:
+                if not self._pending or self._running >= self.max_workers:
+                    return
+                future, fn, args, kwargs = self._pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._running += 1
+
+            try:
+                task = self._start(fn, args, kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                continue
+            task.add_done_callback(partial(self._copy_outcome, future))
+
+    @staticmethod
+    def _copy_outcome(future: Future, task: Future) -> None:
+        try:
+            result = task.result()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
 
     def task_done_callback(self, future):
         self.submit_count -= 1
@@ -107,7 +182,6 @@ class GraphEngine:
         thread_pool_id: Optional[str] = None,
     ) -> None:
         thread_pool_max_submit_count = dify_config.MAX_SUBMIT_COUNT
-        thread_pool_max_workers = 10
 
         # init thread pool
         if thread_pool_id:
@@ -119,7 +193,7 @@ class GraphEngine:
             self.is_main_thread_pool = False
         else:
             self.thread_pool = GraphEngineThreadPool(
-                max_workers=thread_pool_max_workers, max_submit_count=thread_pool_max_submit_count
+                max_workers=dify_config.GRAPH_ENGINE_RUN_MAX_WORKERS, max_submit_count=thread_pool_max_submit_count
             )
             self.thread_pool_id = str(uuid.uuid4())
             self.is_main_thread_pool = True
@@ -496,24 +570,22 @@ class GraphEngine:
             futures.append(future)
 
         succeeded_count = 0
+        # every branch ends with a succeeded or failed event, so block until the branches report back
         while True:
-            try:
-                event = q.get(timeout=1)
-                if event is None:
-                    break
+            event = q.get()
+            if event is None:
+                break
 
-                yield event
-                if not isinstance(event, BaseAgentEvent) and event.parallel_id == parallel_id:
-                    if isinstance(event, ParallelBranchRunSucceededEvent):
-                        succeeded_count += 1
-                        if succeeded_count == len(futures):
-                            q.put(None)
-
-                        continue
-                    elif isinstance(event, ParallelBranchRunFailedEvent):
-                        raise GraphRunFailedError(event.error)
-            except queue.Empty:
-                continue
+            yield event
+            if not isinstance(event, BaseAgentEvent) and event.parallel_id == parallel_id:
+                if isinstance(event, ParallelBranchRunSucceededEvent):
+                    succeeded_count += 1
+                    if succeeded_count == len(futures):
+                        q.put(None)
+
+                    continue
+                elif isinstance(event, ParallelBranchRunFailedEvent):
+                    raise GraphRunFailedError(event.error)
 
         # wait all threads
         wait(futures)
@@ -875,11 +947,11 @@ class GraphEngine:
     def create_copy(self):
         """
         create a graph engine copy
-        :return: graph engine with a new variable pool and initialized total tokens
+        :return: graph engine with a copy-on-write child variable pool and initialized total tokens
         """
         new_instance = copy(self)
         new_instance.graph_runtime_state = copy(self.graph_runtime_state)
-        new_instance.graph_runtime_state.variable_pool = deepcopy(self.graph_runtime_state.variable_pool)
+        new_instance.graph_runtime_state.variable_pool = self.graph_runtime_state.variable_pool.create_child()
         new_instance.graph_runtime_state.total_tokens = 0
         return new_instance
 
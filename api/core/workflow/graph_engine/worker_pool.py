@@ -0,0 +1,111 @@
+import contextvars
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+from configs import dify_config
+
+
+class GraphEngineWorkerPool:
+    """
+    Process-wide bounded thread pool shared by the parallel branches and parallel iterations of all workflow runs.
+    Tasks submitted from one of its own workers run inline when every worker is taken, so a branch waiting on its
+    nested branches can never starve the pool.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    # tasks handed to the executor and not finished yet, running or queued
+    _in_flight = 0
+    _running = 0
+    _submitted = 0
+    _started = 0
+    _inline = 0
+    _queue_wait_total = 0.0
+    _queue_wait_max = 0.0
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=dify_config.GRAPH_ENGINE_MAX_WORKERS, thread_name_prefix="graph_engine"
+                    )
+        return cls._executor
+
+    @classmethod
+    def in_worker(cls) -> bool:
+        return getattr(cls._local, "in_worker", False)
+
+    @classmethod
+    def submit(cls, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        with cls._lock:
+            run_inline = cls.in_worker() and cls._in_flight >= dify_config.GRAPH_ENGINE_MAX_WORKERS
+            if not run_inline:
+                cls._in_flight += 1
+                cls._submitted += 1
+        if run_inline:
+            return cls.run_inline(fn, *args, **kwargs)
+
+        try:
+            future = cls._get_executor().submit(cls._run_in_worker, time.perf_counter(), fn, *args, **kwargs)
+        except Exception:
+            cls._task_done()
+            raise
+        # also called when a queued task is cancelled and never reaches a worker
+        future.add_done_callback(lambda _: cls._task_done())
+        return future
+
+    @classmethod
+    def run_inline(cls, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        """Run the task in the calling thread, returning a completed future so callers can treat it alike."""
+        with cls._lock:
+            cls._inline += 1
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            result = contextvars.copy_context().run(fn, *args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        return future
+
+    @classmethod
+    def _run_in_worker(cls, submitted_at: float, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        queue_wait = time.perf_counter() - submitted_at
+        with cls._lock:
+            cls._running += 1
+            cls._started += 1
+            cls._queue_wait_total += queue_wait
+            cls._queue_wait_max = max(cls._queue_wait_max, queue_wait)
+        cls._local.in_worker = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            cls._local.in_worker = False
+            with cls._lock:
+                cls._running -= 1
+
+    @classmethod
+    def _task_done(cls) -> None:
+        with cls._lock:
+            cls._in_flight -= 1
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        with cls._lock:
+            return {
+                "max_workers": dify_config.GRAPH_ENGINE_MAX_WORKERS,
+                "running": cls._running,
+                "queued": cls._in_flight - cls._running,
+                "submitted": cls._submitted,
+                "inline": cls._inline,
+                "queue_wait_avg": cls._queue_wait_total / cls._started if cls._started else 0.0,
+                "queue_wait_max": cls._queue_wait_max,
+            }
@@ -4,7 +4,7 @@ import uuid
 from collections.abc import Generator, Mapping, Sequence
 from concurrent.futures import Future, wait
 from datetime import UTC, datetime
-from queue import Empty, Queue
+from queue import Queue
 from typing import TYPE_CHECKING, Any, Optional, cast
 
 from flask import Flask, current_app
@@ -33,6 +33,7 @@ from core.workflow.graph_engine.entities.event import (
     NodeRunSucceededEvent,
 )
 from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_cache import GraphCache
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.enums import NodeType
 from core.workflow.nodes.event import NodeEvent, RunCompletedEvent
@@ -108,7 +109,9 @@ class IterationNode(BaseNode[IterationNodeData]):
         root_node_id = self.node_data.start_node_id
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        iteration_graph = GraphCache.get_sub_graph(
+            workflow_id=self.workflow_id, parent_graph=self.graph, graph_config=graph_config, root_node_id=root_node_id
+        )
 
         if not iteration_graph:
             raise IterationGraphNotFoundError("iteration graph not found")
@@ -167,8 +170,11 @@ class IterationNode(BaseNode[IterationNodeData]):
             if self.node_data.is_parallel:
                 futures: list[Future] = []
                 q: Queue = Queue()
+                # iterations never wait on each other, queue the ones over parallel_nums instead of running them inline
                 thread_pool = GraphEngineThreadPool(
-                    max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
+                    max_workers=self.node_data.parallel_nums,
+                    max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+                    run_inline_when_full=False,
                 )
                 for index, item in enumerate(iterator_list_value):
                     future: Future = thread_pool.submit(
@@ -190,26 +196,23 @@ class IterationNode(BaseNode[IterationNodeData]):
                     futures.append(future)
                 succeeded_count = 0
                 while True:
-                    try:
-                        event = q.get(timeout=1)
-                        if event is None:
-                            break
-                        if isinstance(event, IterationRunNextEvent):
-                            succeeded_count += 1
-                            if succeeded_count == len(futures):
-                                q.put(None)
-                        yield event
-                        if isinstance(event, RunCompletedEvent):
-                            q.put(None)
-                            for f in futures:
-                                if not f.done():
-                                    f.cancel()
-                            yield event
-                        if isinstance(event, IterationRunFailedEvent):
+                    event = q.get()
+                    if event is None:
+                        break
+                    if isinstance(event, IterationRunNextEvent):
+                        succeeded_count += 1
+                        if succeeded_count == len(futures):
                             q.put(None)
-                            yield event
-                    except Empty:
-                        continue
+                    yield event
+                    if isinstance(event, RunCompletedEvent):
+                        q.put(None)
+                        for f in futures:
+                            if not f.done():
+                                f.cancel()
+                        yield event
+                    if isinstance(event, IterationRunFailedEvent):
+                        q.put(None)
+                        yield event
 
                 # wait all threads
                 wait(futures)
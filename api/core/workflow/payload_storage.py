@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import logging
+from typing import Any, Optional
+
+from configs import dify_config
+from extensions.ext_storage import storage
+
+logger = logging.getLogger(__name__)
+
+OFFLOADED_PAYLOAD_KEY = "__dify_offloaded_payload__"
+
+# how json.dumps starts an offloaded payload pointer
+_OFFLOADED_PAYLOAD_PREFIX = f'{{"{OFFLOADED_PAYLOAD_KEY}": '
+
+# the columns of workflow runs and node executions that may be offloaded
+PAYLOAD_COLUMNS = ("inputs", "process_data", "outputs")
+
+
+class WorkflowPayloadStorage:
+    """
+    Keeps the large inputs, outputs and process data of workflow runs and node executions in the object storage,
+    gzip compressed. The database row keeps a truncated preview and the storage key instead of the payload.
+    Every column of a row has a single storage key, rewriting the column overwrites its object.
+    """
+
+    @staticmethod
+    def storage_key(tenant_id: str, row_id: str, column: str) -> str:
+        return f"workflow_payloads/{tenant_id}/{row_id}/{column}.json.gz"
+
+    @staticmethod
+    def offload(
+        tenant_id: str, row_id: str, column: str, payload: Optional[str], stored: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Return the value to store in the row for a JSON payload, saving the payload to the storage when it is
+        longer than WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD characters
+        :param tenant_id: tenant id
+        :param row_id: id of the workflow run or node execution
+        :param column: column of the payload
+        :param payload: JSON payload
+        :param stored: value currently stored in the column, the upload is skipped when it holds the same payload
+        """
+        threshold = dify_config.WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD
+        if not payload or not threshold or len(payload) <= threshold or WorkflowPayloadStorage.is_offloaded(payload):
+            return payload
+
+        data = payload.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if stored is not None and WorkflowPayloadStorage.is_offloaded(stored):
+            if json.loads(stored)[OFFLOADED_PAYLOAD_KEY].get("sha256") == digest:
+                return stored
+
+        key = WorkflowPayloadStorage.storage_key(tenant_id, row_id, column)
+        storage.save(key, gzip.compress(data))
+        return json.dumps(
+            {
+                OFFLOADED_PAYLOAD_KEY: {
+                    "key": key,
+                    "size": len(payload),
+                    "sha256": digest,
+                    "preview": payload[: dify_config.WORKFLOW_PAYLOAD_PREVIEW_LENGTH],
+                }
+            }
+        )
+
+    @staticmethod
+    def delete(tenant_id: str, row_id: str) -> None:
+        """
+        Delete the offloaded payloads of a workflow run or node execution, a failure only leaves orphaned objects
+        """
+        for column in PAYLOAD_COLUMNS:
+            key = WorkflowPayloadStorage.storage_key(tenant_id, row_id, column)
+            try:
+                if storage.exists(key):
+                    storage.delete(key)
+            except Exception:
+                logger.exception(f"Failed to delete offloaded workflow payload {key}")
+
+    @staticmethod
+    def is_offloaded(payload: Optional[str]) -> bool:
+        return payload is not None and payload.startswith(_OFFLOADED_PAYLOAD_PREFIX)
+
+    @staticmethod
+    def load_preview(payload: Optional[str]) -> Any:
+        """
+        Parse the JSON payload stored in a row without loading an offloaded payload from the storage,
+        an offloaded payload is returned as its size and truncated preview
+        """
+        if not payload:
+            return None
+        value = json.loads(payload)
+        if not WorkflowPayloadStorage.is_offloaded(payload):
+            return value
+
+        pointer = value[OFFLOADED_PAYLOAD_KEY]
+        return {OFFLOADED_PAYLOAD_KEY: {"size": pointer["size"], "preview": pointer["preview"]}}
+
+    @staticmethod
+    def load_column(row: Any, column: str) -> Any:
+        """
+        Load the payload of a column of a workflow run or node execution, memoized on the row until the column
+        is rewritten so that reading it again does not fetch it from the storage again
+        """
+        payload = getattr(row, column)
+        loaded_payloads = row.__dict__.setdefault("_loaded_payloads", {})
+        if column in loaded_payloads and loaded_payloads[column][0] == payload:
+            return loaded_payloads[column][1]
+        value = WorkflowPayloadStorage.load(payload)
+        loaded_payloads[column] = (payload, value)
+        return value
+
+    @staticmethod
+    def load(payload: Optional[str]) -> Any:
+        """
+        Parse the JSON payload stored in a row, loading it from the storage when it was offloaded
+        """
+        if not payload:
+            return None
+        value = json.loads(payload)
+        if not WorkflowPayloadStorage.is_offloaded(payload):
+            return value
+
+        pointer = value[OFFLOADED_PAYLOAD_KEY]
+        try:
+            return json.loads(gzip.decompress(storage.load_once(pointer["key"])))
+        except Exception:
+            # keep serving the preview when the stored payload is gone
+            logger.exception(f"Failed to load offloaded workflow payload {pointer['key']}")
+            return value
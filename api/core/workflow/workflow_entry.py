@@ -15,6 +15,7 @@ from core.workflow.graph_engine.entities.event import GraphEngineEvent, GraphRun
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+from core.workflow.graph_engine.graph_cache import GraphCache
 from core.workflow.graph_engine.graph_engine import GraphEngine
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.base import BaseNode
@@ -152,7 +153,11 @@ class WorkflowEntry:
         variable_pool = VariablePool(environment_variables=workflow.environment_variables)
 
         # init graph
-        graph = Graph.init(graph_config=workflow.graph_dict)
+        graph = GraphCache.get_graph(
+            workflow_id=workflow.id,
+            version_hash=GraphCache.version_hash(workflow.graph),
+            graph_config=workflow_graph,
+        )
 
         # init workflow run state
         node_instance = node_cls(
@@ -163,7 +168,7 @@ class WorkflowEntry:
                 app_id=workflow.app_id,
                 workflow_type=WorkflowType.value_of(workflow.type),
                 workflow_id=workflow.id,
-                graph_config=workflow.graph_dict,
+                graph_config=workflow_graph,
                 user_id=user_id,
                 user_from=UserFrom.ACCOUNT,
                 invoke_from=InvokeFrom.DEBUGGER,
@@ -176,7 +181,7 @@ class WorkflowEntry:
         try:
             # variable selector to variable mapping
             variable_mapping = node_cls.extract_variable_selector_to_variable_mapping(
-                graph_config=workflow.graph_dict, config=node_config
+                graph_config=workflow_graph, config=node_config
             )
         except NotImplementedError:
             variable_mapping = {}
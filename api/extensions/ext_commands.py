@@ -12,6 +12,7 @@ def init_app(app: DifyApp):
         fix_app_site_missing,
         install_plugins,
         migrate_data_for_plugin,
+        migrate_keyword_table_to_postings,
         old_metadata_migration,
         reset_email,
         reset_encrypt_key_pair,
@@ -36,6 +37,7 @@ def init_app(app: DifyApp):
         install_plugins,
         old_metadata_migration,
         clear_free_plan_tenant_expired_logs,
+        migrate_keyword_table_to_postings,
     ]
     for cmd in cmds_to_register:
         app.cli.add_command(cmd)
@@ -116,6 +116,14 @@ workflow_run_node_execution_fields = {
     "finished_at": TimestampField,
 }
 
+# offloaded payloads are listed as their preview, the full payloads are served by the node execution detail
+workflow_run_node_execution_for_list_fields = {
+    **workflow_run_node_execution_fields,
+    "inputs": fields.Raw(attribute="inputs_preview"),
+    "process_data": fields.Raw(attribute="process_data_preview"),
+    "outputs": fields.Raw(attribute="outputs_preview"),
+}
+
 workflow_run_node_execution_list_fields = {
-    "data": fields.List(fields.Nested(workflow_run_node_execution_fields)),
+    "data": fields.List(fields.Nested(workflow_run_node_execution_for_list_fields)),
 }
@@ -4,10 +4,15 @@ from Crypto.Cipher import AES
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
 
+from configs import dify_config
+from core.helper.lru_cache import TTLLRUCache
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from libs import gmpy2_pkcs10aep_cipher
 
+# parsed private keys of the tenants, importing a key costs more than the decryption itself
+_decoding_cache = TTLLRUCache(capacity=1024, ttl=dify_config.TENANT_PRIVATE_KEY_CACHE_TTL)
+
 
 def generate_key_pair(tenant_id):
     private_key = RSA.generate(2048)
@@ -19,6 +24,7 @@ def generate_key_pair(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
     storage.save(filepath, pem_private)
+    invalidate_decrypt_decoding(tenant_id)
 
     return pem_public.decode()
 
@@ -45,10 +51,19 @@ def encrypt(text, public_key):
     return prefix_hybrid + encrypted_data
 
 
+def _get_privkey_cache_key(tenant_id) -> str:
+    filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
+    return "tenant_privkey:{hash}".format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+
+
 def get_decrypt_decoding(tenant_id):
+    decoding = _decoding_cache.get(tenant_id)
+    if decoding is not None:
+        return decoding
+
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
-    cache_key = "tenant_privkey:{hash}".format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+    cache_key = _get_privkey_cache_key(tenant_id)
     private_key = redis_client.get(cache_key)
     if not private_key:
         try:
@@ -61,9 +76,18 @@ def get_decrypt_decoding(tenant_id):
     rsa_key = RSA.import_key(private_key)
     cipher_rsa = gmpy2_pkcs10aep_cipher.new(rsa_key)
 
+    _decoding_cache.put(tenant_id, (rsa_key, cipher_rsa))
     return rsa_key, cipher_rsa
 
 
+def invalidate_decrypt_decoding(tenant_id):
+    """
+    Drop the cached private key of the tenant after it was rotated
+    """
+    _decoding_cache.delete(tenant_id)
+    redis_client.delete(_get_privkey_cache_key(tenant_id))
+
+
 def decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa):
     if encrypted_text.startswith(prefix_hybrid):
         encrypted_text = encrypted_text[len(prefix_hybrid) :]
@@ -86,7 +110,13 @@ def decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa):
 def decrypt(encrypted_text, tenant_id):
     rsa_key, cipher_rsa = get_decrypt_decoding(tenant_id)
 
-    return decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+    try:
+        return decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+    except ValueError:
+        # the key may have been rotated by another process since it was cached here
+        _decoding_cache.delete(tenant_id)
+        rsa_key, cipher_rsa = get_decrypt_decoding(tenant_id)
+        return decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
 
 
 class PrivkeyNotFoundError(Exception):
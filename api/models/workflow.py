@@ -440,11 +440,15 @@ class WorkflowRun(Base):
 
     @property
     def inputs_dict(self) -> Mapping[str, Any]:
-        return json.loads(self.inputs) if self.inputs else {}
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_column(self, "inputs") if self.inputs else {}
 
     @property
     def outputs_dict(self) -> Mapping[str, Any]:
-        return json.loads(self.outputs) if self.outputs else {}
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_column(self, "outputs") if self.outputs else {}
 
     @property
     def message(self):
@@ -667,15 +671,39 @@ class WorkflowNodeExecution(Base):
 
     @property
     def inputs_dict(self):
-        return json.loads(self.inputs) if self.inputs else None
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_column(self, "inputs")
 
     @property
     def outputs_dict(self):
-        return json.loads(self.outputs) if self.outputs else None
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_column(self, "outputs")
 
     @property
     def process_data_dict(self):
-        return json.loads(self.process_data) if self.process_data else None
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_column(self, "process_data")
+
+    @property
+    def inputs_preview(self):
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_preview(self.inputs)
+
+    @property
+    def outputs_preview(self):
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_preview(self.outputs)
+
+    @property
+    def process_data_preview(self):
+        from core.workflow.payload_storage import WorkflowPayloadStorage
+
+        return WorkflowPayloadStorage.load_preview(self.process_data)
 
     @property
     def execution_metadata_dict(self):
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from configs import dify_config
 from core.model_runtime.utils.encoders import jsonable_encoder
+from core.workflow.payload_storage import WorkflowPayloadStorage
 from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models.account import Tenant
@@ -140,6 +141,9 @@ class ClearFreePlanTenantExpiredLogs:
                     ).delete(synchronize_session=False)
                     session.commit()
 
+                    for workflow_node_execution_id in workflow_node_execution_ids:
+                        WorkflowPayloadStorage.delete(tenant_id, workflow_node_execution_id)
+
                     click.echo(
                         click.style(
                             f"[{datetime.datetime.now()}] Processed {len(workflow_node_execution_ids)}"
@@ -183,6 +187,9 @@ class ClearFreePlanTenantExpiredLogs:
                     ).delete(synchronize_session=False)
                     session.commit()
 
+                    for workflow_run_id in workflow_run_ids:
+                        WorkflowPayloadStorage.delete(tenant_id, workflow_run_id)
+
     @classmethod
     def process(cls, days: int, batch: int, tenant_ids: list[str]):
         """
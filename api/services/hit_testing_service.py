@@ -57,6 +57,7 @@ class HitTestingService:
             else None,
             reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
             weights=retrieval_model.get("weights", None),
+            dataset=dataset,
         )
 
         end = time.perf_counter()
@@ -141,3 +141,32 @@ class WorkflowRunService:
         )
 
         return node_executions
+
+    def get_workflow_run_node_execution(
+        self, app_model: App, run_id: str, node_execution_id: str
+    ) -> Optional[WorkflowNodeExecution]:
+        """
+        Get workflow run node execution detail
+        """
+        workflow_run = self.get_workflow_run(app_model, run_id)
+
+        contexts.plugin_tool_providers.set({})
+        contexts.plugin_tool_providers_lock.set(threading.Lock())
+
+        if not workflow_run:
+            return None
+
+        node_execution = (
+            db.session.query(WorkflowNodeExecution)
+            .filter(
+                WorkflowNodeExecution.tenant_id == app_model.tenant_id,
+                WorkflowNodeExecution.app_id == app_model.id,
+                WorkflowNodeExecution.workflow_id == workflow_run.workflow_id,
+                WorkflowNodeExecution.triggered_from == WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN.value,
+                WorkflowNodeExecution.workflow_run_id == run_id,
+                WorkflowNodeExecution.id == node_execution_id,
+            )
+            .first()
+        )
+
+        return node_execution
@@ -21,6 +21,7 @@ from core.workflow.nodes.enums import ErrorStrategy
 from core.workflow.nodes.event import RunCompletedEvent
 from core.workflow.nodes.event.types import NodeEvent
 from core.workflow.nodes.node_mapping import LATEST_VERSION, NODE_TYPE_CLASSES_MAPPING
+from core.workflow.payload_storage import WorkflowPayloadStorage
 from core.workflow.workflow_entry import WorkflowEntry
 from events.app_event import app_draft_workflow_was_synced, app_published_workflow_was_updated
 from extensions.ext_database import db
@@ -398,9 +399,15 @@ class WorkflowService:
             )
             outputs = WorkflowEntry.handle_special_values(node_run_result.outputs) if node_run_result.outputs else None
 
-            workflow_node_execution.inputs = json.dumps(inputs)
-            workflow_node_execution.process_data = json.dumps(process_data)
-            workflow_node_execution.outputs = json.dumps(outputs)
+            workflow_node_execution.inputs = WorkflowPayloadStorage.offload(
+                tenant_id, workflow_node_execution.id, "inputs", json.dumps(inputs)
+            )
+            workflow_node_execution.process_data = WorkflowPayloadStorage.offload(
+                tenant_id, workflow_node_execution.id, "process_data", json.dumps(process_data)
+            )
+            workflow_node_execution.outputs = WorkflowPayloadStorage.offload(
+                tenant_id, workflow_node_execution.id, "outputs", json.dumps(outputs)
+            )
             workflow_node_execution.execution_metadata = (
                 json.dumps(jsonable_encoder(node_run_result.metadata)) if node_run_result.metadata else None
             )
@@ -7,6 +7,7 @@ from celery import shared_task  # type: ignore
 from sqlalchemy import delete
 from sqlalchemy.exc import SQLAlchemyError
 
+from core.workflow.payload_storage import WorkflowPayloadStorage
 from extensions.ext_database import db
 from models.dataset import AppDatasetJoin
 from models.model import (
@@ -177,6 +178,7 @@ def _delete_app_workflows(tenant_id: str, app_id: str):
 def _delete_app_workflow_runs(tenant_id: str, app_id: str):
     def del_workflow_run(workflow_run_id: str):
         db.session.query(WorkflowRun).filter(WorkflowRun.id == workflow_run_id).delete(synchronize_session=False)
+        WorkflowPayloadStorage.delete(tenant_id, workflow_run_id)
 
     _delete_records(
         """select id from workflow_runs where tenant_id=:tenant_id and app_id=:app_id limit 1000""",
@@ -191,6 +193,7 @@ def _delete_app_workflow_node_executions(tenant_id: str, app_id: str):
         db.session.query(WorkflowNodeExecution).filter(WorkflowNodeExecution.id == workflow_node_execution_id).delete(
             synchronize_session=False
         )
+        WorkflowPayloadStorage.delete(tenant_id, workflow_node_execution_id)
 
     _delete_records(
         """select id from workflow_node_executions where tenant_id=:tenant_id and app_id=:app_id limit 1000""",
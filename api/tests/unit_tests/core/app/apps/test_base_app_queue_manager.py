@@ -0,0 +1,83 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import GenerateTaskStoppedError, PublishFrom
+from core.app.apps.task_stop_signal import TaskStopSignal
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import QueuePingEvent, QueueStopEvent
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    mock_redis = MagicMock()
+    mock_redis.get.return_value = None
+    mocker.patch("core.app.apps.base_app_queue_manager.redis_client", new=mock_redis)
+    mocker.patch("core.app.apps.task_stop_signal.redis_client", new=mock_redis)
+    mocker.patch.object(TaskStopSignal, "_listener", None)
+    return mock_redis
+
+
+def _queue_manager(task_id: str = "task") -> WorkflowAppQueueManager:
+    return WorkflowAppQueueManager(task_id, "user", InvokeFrom.SERVICE_API, "workflow")
+
+
+def test_stopped_flag_is_read_at_most_once_per_interval(mock_redis):
+    queue_manager = _queue_manager()
+
+    for _ in range(100):
+        queue_manager.publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+
+    assert mock_redis.get.call_count == 1
+    mock_redis.pubsub.return_value.run_in_thread.assert_called_once()
+
+
+def test_pushed_stop_signal_stops_the_task_without_reading_redis(mock_redis):
+    queue_manager = _queue_manager()
+    queue_manager.publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+    mock_redis.get.reset_mock()
+
+    TaskStopSignal._handle_message({"type": "message", "data": b"task"})
+
+    with pytest.raises(GenerateTaskStoppedError):
+        queue_manager.publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+    mock_redis.get.assert_not_called()
+
+
+def test_set_stop_flag_publishes_the_stop_signal(mock_redis):
+    queue_manager = _queue_manager()
+    mock_redis.get.return_value = b"end-user-user"
+
+    WorkflowAppQueueManager.set_stop_flag("task", InvokeFrom.SERVICE_API, "user")
+
+    mock_redis.setex.assert_called_with("generate_task_stopped:task", 600, 1)
+    mock_redis.publish.assert_called_once_with(TaskStopSignal.CHANNEL, "task")
+    assert queue_manager._is_stopped()
+
+
+def test_stopped_flag_in_redis_is_the_fallback(mock_redis, mocker):
+    mocker.patch("core.app.apps.base_app_queue_manager.dify_config.APP_STOP_FLAG_CHECK_INTERVAL", 0)
+    queue_manager = _queue_manager("other-task")
+    assert not queue_manager._is_stopped()
+
+    mock_redis.get.return_value = b"1"
+
+    assert queue_manager._is_stopped()
+    mock_redis.get.reset_mock()
+    assert queue_manager._is_stopped()
+    mock_redis.get.assert_not_called()
+
+
+def test_stop_signal_wakes_up_the_idle_listener(mock_redis):
+    queue_manager = _queue_manager("idle-task")
+    listener = queue_manager.listen()
+    threading.Timer(0.1, TaskStopSignal._handle_message, args=({"type": "message", "data": b"idle-task"},)).start()
+
+    started_at = time.monotonic()
+    events = [message.event for message in listener]
+
+    assert time.monotonic() - started_at < 0.5
+    assert isinstance(events[-1], QueueStopEvent)
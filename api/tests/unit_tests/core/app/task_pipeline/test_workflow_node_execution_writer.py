@@ -0,0 +1,140 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from core.app.task_pipeline.workflow_node_execution_writer import WorkflowNodeExecutionWriter
+from models.workflow import WorkflowNodeExecution
+
+
+class _FakeTable:
+    """Stands in for the workflow_node_executions table, recording the bulk statements of each commit"""
+
+    def __init__(self):
+        self.rows: dict[str, dict] = {}
+        self.statements: list[tuple[str, int]] = []
+
+    def session(self, engine):
+        session = MagicMock()
+        session.__enter__.return_value = session
+        session.execute.side_effect = self._execute
+        return session
+
+    def _execute(self, statement, rows):
+        self.statements.append((statement.__visit_name__, len(rows)))
+        for row in rows:
+            if statement.__visit_name__ == "insert":
+                assert row["id"] not in self.rows
+                self.rows[row["id"]] = dict(row)
+            else:
+                self.rows[row["id"]].update(row)
+
+
+@pytest.fixture
+def table(mocker):
+    table = _FakeTable()
+    mocker.patch("core.app.task_pipeline.workflow_node_execution_writer.db", new=MagicMock())
+    mocker.patch("core.app.task_pipeline.workflow_node_execution_writer.Session", side_effect=table.session)
+    mocker.patch(
+        "core.app.task_pipeline.workflow_node_execution_writer.dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 60
+    )
+    return table
+
+
+def _node_execution(index: int) -> WorkflowNodeExecution:
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.id = str(uuid4())
+    workflow_node_execution.tenant_id = str(uuid4())
+    workflow_node_execution.app_id = str(uuid4())
+    workflow_node_execution.workflow_id = str(uuid4())
+    workflow_node_execution.triggered_from = "workflow-run"
+    workflow_node_execution.workflow_run_id = str(uuid4())
+    workflow_node_execution.index = index
+    workflow_node_execution.node_execution_id = str(uuid4())
+    workflow_node_execution.node_id = f"node_{index}"
+    workflow_node_execution.node_type = "code"
+    workflow_node_execution.title = f"Node {index}"
+    workflow_node_execution.status = "running"
+    workflow_node_execution.elapsed_time = 0
+    workflow_node_execution.created_by_role = "account"
+    workflow_node_execution.created_by = str(uuid4())
+    workflow_node_execution.created_at = datetime(2025, 1, 1)
+    return workflow_node_execution
+
+
+def test_changes_are_buffered_until_flushed(table):
+    writer = WorkflowNodeExecutionWriter()
+    node_executions = [_node_execution(index) for index in range(3)]
+
+    for workflow_node_execution in node_executions:
+        writer.save(workflow_node_execution)
+    assert table.rows == {}
+
+    writer.flush(wait=True)
+    assert table.statements == [("insert", 3)]
+    assert {row["status"] for row in table.rows.values()} == {"running"}
+
+    node_executions[0].status = "succeeded"
+    node_executions[0].outputs = '{"result": 1}'
+    writer.save(node_executions[0])
+    writer.flush(wait=True)
+
+    assert table.statements == [("insert", 3), ("update", 1)]
+    assert table.rows[node_executions[0].id]["status"] == "succeeded"
+    assert table.rows[node_executions[1].id]["status"] == "running"
+
+
+def test_batch_size_triggers_a_background_write(table, mocker):
+    mocker.patch(
+        "core.app.task_pipeline.workflow_node_execution_writer.dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE", 2
+    )
+    writer = WorkflowNodeExecutionWriter()
+    first, second = _node_execution(1), _node_execution(2)
+
+    writer.save(first)
+    first.status = "succeeded"
+    writer.save(first)
+    assert table.statements == []
+
+    writer.save(second)
+    writer.flush(wait=True)
+
+    assert table.statements == [("insert", 2)]
+    assert table.rows[first.id]["status"] == "succeeded"
+    # unset columns are left to the server defaults
+    assert "outputs" not in table.rows[second.id]
+
+
+def test_unchanged_payloads_are_offloaded_once(table, mocker):
+    mocker.patch("core.workflow.payload_storage.dify_config.WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD", 100)
+    storage = mocker.patch("core.workflow.payload_storage.storage")
+    writer = WorkflowNodeExecutionWriter()
+    workflow_node_execution = _node_execution(1)
+    workflow_node_execution.inputs = json.dumps({"text": "x" * 1000})
+
+    writer.save(workflow_node_execution)
+    writer.flush(wait=True)
+    workflow_node_execution.status = "succeeded"
+    writer.save(workflow_node_execution)
+    writer.flush(wait=True)
+
+    assert table.statements == [("insert", 1), ("update", 1)]
+    storage.save.assert_called_once()
+    assert storage.save.call_args.args[0] == (
+        f"workflow_payloads/{workflow_node_execution.tenant_id}/{workflow_node_execution.id}/inputs.json.gz"
+    )
+
+
+def test_stale_snapshots_are_not_written():
+    writer = WorkflowNodeExecutionWriter()
+    engine = MagicMock()
+    row = {"id": "node-execution", "status": "succeeded"}
+    writer._persisted_versions["node-execution"] = 2
+
+    writer._write(engine, [(1, {"id": "node-execution", "status": "running"})])
+    engine.assert_not_called()
+
+    writer._write_in_background(engine, [(3, row)])
+    assert writer._failed_rows == {"node-execution": (3, row)}
@@ -0,0 +1,50 @@
+import base64
+
+import pytest
+
+from core.helper import encrypter
+from core.helper.lru_cache import TTLLRUCache
+
+
+@pytest.fixture
+def mock_rsa(mocker):
+    mocker.patch.object(encrypter, "_decrypted_token_cache", TTLLRUCache(capacity=10, ttl=60))
+    mock_rsa = mocker.patch("core.helper.encrypter.rsa")
+    mock_rsa.decrypt.side_effect = lambda encrypted_text, tenant_id: f"{tenant_id}:{encrypted_text.decode()}"
+    mock_rsa.get_decrypt_decoding.return_value = ("rsa_key", "cipher_rsa")
+    mock_rsa.decrypt_token_with_decoding.side_effect = lambda encrypted_text, rsa_key, cipher_rsa: (
+        f"batch:{encrypted_text.decode()}"
+    )
+    return mock_rsa
+
+
+def _token(text: str) -> str:
+    return base64.b64encode(text.encode()).decode()
+
+
+def test_decrypted_tokens_are_cached_per_tenant_and_ciphertext(mock_rsa):
+    assert encrypter.decrypt_token("tenant", _token("a")) == "tenant:a"
+    assert encrypter.decrypt_token("tenant", _token("a")) == "tenant:a"
+    assert mock_rsa.decrypt.call_count == 1
+
+    # the same ciphertext is never served to another tenant from the cache
+    assert encrypter.decrypt_token("other", _token("a")) == "other:a"
+    # an updated credential is a new ciphertext
+    assert encrypter.decrypt_token("tenant", _token("b")) == "tenant:b"
+    assert mock_rsa.decrypt.call_count == 3
+
+
+def test_batch_decrypt_only_loads_the_key_for_missing_tokens(mock_rsa):
+    encrypter.decrypt_token("tenant", _token("a"))
+
+    assert encrypter.batch_decrypt_token("tenant", [_token("a")]) == ["tenant:a"]
+    mock_rsa.get_decrypt_decoding.assert_not_called()
+
+    assert encrypter.batch_decrypt_token("tenant", [_token("a"), _token("b"), _token("c")]) == [
+        "tenant:a",
+        "batch:b",
+        "batch:c",
+    ]
+    mock_rsa.get_decrypt_decoding.assert_called_once_with("tenant")
+    assert encrypter.batch_decrypt_token("tenant", [_token("c")]) == ["batch:c"]
+    assert mock_rsa.decrypt_token_with_decoding.call_count == 2
@@ -0,0 +1,51 @@
+from core.helper.lru_cache import TTLLRUCache
+
+
+def test_ttl_lru_cache_evicts_least_recently_used():
+    cache = TTLLRUCache(capacity=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "capacity": 2, "hits": 3, "misses": 1}
+
+
+def test_ttl_lru_cache_expires_entries(mocker):
+    now = 1000.0
+    mocker.patch("core.helper.lru_cache.time.monotonic", side_effect=lambda: now)
+    cache = TTLLRUCache(capacity=10, ttl=5)
+    cache.put("a", 1)
+
+    now += 4
+    assert cache.get("a") == 1
+    now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_ttl_lru_cache_disabled_with_zero_capacity():
+    cache = TTLLRUCache(capacity=0, ttl=60)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_ttl_lru_cache_evicts_over_max_weight():
+    cache = TTLLRUCache(capacity=10, ttl=60, max_weight=10, weigh=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    assert cache.get("a") == "xxxx"
+    cache.put("c", "xxxx")
+
+    assert cache.get("b") is None
+    assert cache.weight == 8
+
+    cache.put("a", "x")
+    cache.put("d", "x" * 11)
+    assert cache.get("d") is None
+    assert cache.get("a") == "x"
+    assert cache.weight == 5
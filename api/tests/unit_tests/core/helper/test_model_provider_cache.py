@@ -0,0 +1,181 @@
+from contextvars import Context
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.entities.provider_configuration import ProviderConfigurations
+from core.entities.provider_entities import ProviderQuotaType, QuotaConfiguration, QuotaUnit
+from core.helper.lru_cache import TTLLRUCache
+from core.helper.model_provider_cache import PluginModelCache, ProviderConfigurationsCache
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.model_providers.model_provider_factory import ModelProviderFactory
+from core.provider_manager import ProviderManager
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, b"0")) + 1).encode()
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = str(value).encode()
+        return True
+
+
+@pytest.fixture
+def redis(mocker):
+    redis = _FakeRedis()
+    mocker.patch("core.helper.model_provider_cache.redis_client", new=redis)
+    mocker.patch.object(ProviderConfigurationsCache, "_cache", TTLLRUCache(capacity=10, ttl=60))
+    mocker.patch.object(PluginModelCache, "_providers_cache", TTLLRUCache(capacity=10, ttl=60))
+    mocker.patch.object(PluginModelCache, "_schemas_cache", TTLLRUCache(capacity=10, ttl=60))
+    return redis
+
+
+@pytest.fixture
+def system_quotas(mocker):
+    return mocker.patch.object(ProviderManager, "_get_system_quotas", return_value={})
+
+
+@pytest.fixture
+def build_configurations(mocker, system_quotas):
+    return mocker.patch.object(
+        ProviderManager,
+        "_build_configurations",
+        side_effect=lambda tenant_id: ProviderConfigurations(tenant_id=tenant_id),
+    )
+
+
+def test_configurations_are_built_once_per_version(redis, build_configurations):
+    first = ProviderManager().get_configurations("tenant")
+    assert ProviderManager().get_configurations("tenant") is first
+    assert build_configurations.call_count == 1
+
+    ProviderConfigurationsCache(tenant_id="tenant").delete()
+
+    assert ProviderManager().get_configurations("tenant") is not first
+    assert build_configurations.call_count == 2
+
+
+def test_write_in_another_process_invalidates_the_cached_configurations(redis, build_configurations):
+    first = ProviderManager().get_configurations("tenant")
+    other = ProviderManager().get_configurations("other")
+
+    # another process only bumps the shared version
+    redis.incr("provider_configurations_version:tenant_id:tenant")
+
+    assert ProviderManager().get_configurations("tenant") is not first
+    assert ProviderManager().get_configurations("other") is other
+    assert build_configurations.call_count == 3
+
+
+def _quota_configuration(quota_limit: int, quota_used: int) -> QuotaConfiguration:
+    return QuotaConfiguration(
+        quota_type=ProviderQuotaType.TRIAL,
+        quota_unit=QuotaUnit.TOKENS,
+        quota_limit=quota_limit,
+        quota_used=quota_used,
+        is_valid=quota_limit > quota_used,
+    )
+
+
+def test_quota_usage_of_cached_configurations_is_read_live(redis, mocker, system_quotas):
+    quota_configuration = _quota_configuration(quota_limit=100, quota_used=10)
+    provider_configuration = MagicMock()
+    provider_configuration.provider.provider = "langgenius/openai/openai"
+    provider_configuration.system_configuration.quota_configurations = [quota_configuration]
+
+    def build(tenant_id):
+        provider_configurations = ProviderConfigurations(tenant_id=tenant_id)
+        provider_configurations["langgenius/openai/openai"] = provider_configuration
+        return provider_configurations
+
+    build_configurations = mocker.patch.object(ProviderManager, "_build_configurations", side_effect=build)
+    first = ProviderManager().get_configurations("tenant")
+
+    # deductions only change the usage
+    system_quotas.return_value = {("langgenius/openai/openai", "trial"): (100, 60)}
+    assert ProviderManager().get_configurations("tenant") is first
+    assert quota_configuration.quota_used == 60
+    assert build_configurations.call_count == 1
+
+    # running out of quota changes the quota type and provider type in use
+    system_quotas.return_value = {("langgenius/openai/openai", "trial"): (100, 100)}
+    assert ProviderManager().get_configurations("tenant") is not first
+    assert build_configurations.call_count == 2
+
+
+def test_configurations_are_not_cached_without_redis(mocker, build_configurations):
+    redis = MagicMock()
+    redis.get.side_effect = ConnectionError("redis unavailable")
+    mocker.patch("core.helper.model_provider_cache.redis_client", new=redis)
+
+    ProviderManager().get_configurations("tenant")
+    ProviderManager().get_configurations("tenant")
+
+    assert build_configurations.call_count == 2
+
+
+@pytest.fixture
+def plugin_model_manager(mocker):
+    plugin_model_manager = mocker.patch(
+        "core.model_runtime.model_providers.model_provider_factory.PluginModelManager"
+    ).return_value
+    plugin_model_manager.fetch_model_providers.side_effect = lambda tenant_id: [
+        MagicMock(plugin_id="langgenius/openai", declaration=MagicMock(provider="openai"))
+    ]
+    plugin_model_manager.get_model_schema.side_effect = lambda **kwargs: MagicMock()
+    return plugin_model_manager
+
+
+def _in_new_request(func):
+    # every request starts with empty plugin model context vars
+    return Context().run(func)
+
+
+def test_plugin_model_providers_are_fetched_once_per_version(redis, plugin_model_manager):
+    def get_providers():
+        return ModelProviderFactory("tenant").get_plugin_model_providers()
+
+    first = _in_new_request(get_providers)
+    assert _in_new_request(get_providers) is first
+    assert first[0].declaration.provider == "langgenius/openai/openai"
+    assert plugin_model_manager.fetch_model_providers.call_count == 1
+
+    PluginModelCache(tenant_id="tenant").delete()
+
+    assert _in_new_request(get_providers) is not first
+    assert plugin_model_manager.fetch_model_providers.call_count == 2
+    assert redis.values["provider_configurations_version:tenant_id:tenant"] == b"1"
+
+
+def test_finished_installation_tasks_invalidate_plugin_models_once(redis):
+    for _ in range(3):
+        PluginModelCache(tenant_id="tenant").delete_for_finished_task("task")
+    PluginModelCache(tenant_id="tenant").delete_for_finished_task("other-task")
+
+    assert redis.values["plugin_models_version:tenant_id:tenant"] == b"2"
+
+
+def test_plugin_model_schemas_are_cached_per_credentials(redis, plugin_model_manager):
+    def get_schema(credentials):
+        return lambda: ModelProviderFactory("tenant").get_model_schema(
+            provider="langgenius/openai/openai", model_type=ModelType.LLM, model="gpt-4o", credentials=credentials
+        )
+
+    first = _in_new_request(get_schema({"api_key": "a"}))
+    assert _in_new_request(get_schema({"api_key": "a"})) is first
+    assert _in_new_request(get_schema({"api_key": "b"})) is not first
+    assert plugin_model_manager.get_model_schema.call_count == 2
+
+    redis.incr("plugin_models_version:tenant_id:tenant")
+
+    assert _in_new_request(get_schema({"api_key": "a"})) is not first
+    assert plugin_model_manager.get_model_schema.call_count == 3
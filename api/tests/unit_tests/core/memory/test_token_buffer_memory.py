@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from constants import UUID_NIL
+from core.helper.lru_cache import TTLLRUCache
+from core.memory.conversation_history_cache import ConversationHistoryCache
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, UserPromptMessage
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
+from models.model import Conversation, Message, MessageFile
+
+
+class _WordEncoder:
+    """Stands in for a tiktoken encoding, one token per word."""
+
+    def encode_ordinary_batch(self, texts: list[str]) -> list[list[str]]:
+        return [text.split() for text in texts]
+
+
+def _model_count(prompt_messages) -> int:
+    # the model counts differently from the local estimate
+    return sum(2 * len(str(m.content).split()) + 1 for m in prompt_messages) + 5
+
+
+def _prune_one_by_one(prompt_messages, max_token_limit):
+    prompt_messages = list(prompt_messages)
+    while _model_count(prompt_messages) > max_token_limit and len(prompt_messages) > 1:
+        prompt_messages.pop(0)
+    return prompt_messages
+
+
+@pytest.fixture
+def memory(mocker):
+    mocker.patch.object(LocalTokenizer, "get_encoder", return_value=_WordEncoder())
+    model_instance = MagicMock(model="gpt-4o")
+    model_instance.get_llm_num_tokens.side_effect = _model_count
+    return TokenBufferMemory(conversation=Conversation(), model_instance=model_instance)
+
+
+@pytest.mark.parametrize("max_token_limit", [1, 20, 150, 400, 1000])
+def test_pruning_keeps_the_same_messages_with_few_model_counts(memory, max_token_limit):
+    prompt_messages = []
+    for i in range(100):
+        prompt_messages.append(UserPromptMessage(content="question " * (i % 7 + 1)))
+        prompt_messages.append(AssistantPromptMessage(content="answer " * (i % 11 + 1)))
+    curr_message_tokens = _model_count(prompt_messages)
+
+    pruned = memory._prune_prompt_messages(prompt_messages, curr_message_tokens, max_token_limit)
+
+    assert pruned == _prune_one_by_one(prompt_messages, max_token_limit)
+    assert memory.model_instance.get_llm_num_tokens.call_count <= 4
+
+
+class _FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def limit(self, limit):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _FakeSession:
+    """Serves the thread query, the message contents and no message files."""
+
+    def __init__(self):
+        self.thread_rows: list[SimpleNamespace] = []
+        self.content_rows: list[SimpleNamespace] = []
+
+    def add_message(self, message_id, parent_message_id, query, answer):
+        self.thread_rows.insert(
+            0, SimpleNamespace(id=message_id, parent_message_id=parent_message_id, has_answer=bool(answer))
+        )
+        self.content_rows.append(SimpleNamespace(id=message_id, query=query, answer=answer, workflow_run_id=None))
+
+    def query(self, *entities):
+        if entities[0] is MessageFile:
+            return _FakeQuery([])
+        if entities[1] is Message.query:
+            return _FakeQuery(self.content_rows)
+        return _FakeQuery(self.thread_rows)
+
+
+@pytest.fixture
+def session(mocker):
+    session = _FakeSession()
+    mocker.patch("core.memory.token_buffer_memory.db", new=SimpleNamespace(session=session))
+    mocker.patch.object(ConversationHistoryCache, "_cache", TTLLRUCache(capacity=100, ttl=60))
+    return session
+
+
+@pytest.fixture
+def history_memory(memory, session):
+    memory.conversation = MagicMock(id="conversation")
+    memory.model_instance.get_llm_num_tokens.side_effect = lambda prompt_messages: 0
+    return memory
+
+
+def _contents(prompt_messages):
+    return [prompt_message.content for prompt_message in prompt_messages]
+
+
+def test_history_only_builds_new_messages(history_memory, session, mocker):
+    build_history_messages = mocker.spy(TokenBufferMemory, "_build_history_messages")
+    session.add_message("1", UUID_NIL, "hi", "hello")
+    session.add_message("2", "1", "how are you", "fine")
+
+    assert _contents(history_memory.get_history_prompt_messages()) == ["hi", "hello", "how are you", "fine"]
+
+    session.add_message("3", "2", "bye", "")
+    assert _contents(history_memory.get_history_prompt_messages()) == ["hi", "hello", "how are you", "fine"]
+
+    session.thread_rows[0].has_answer = True
+    session.content_rows[-1].answer = "goodbye"
+    assert _contents(history_memory.get_history_prompt_messages())[-2:] == ["bye", "goodbye"]
+
+    built = [[message.id for message in call.args[1]] for call in build_history_messages.call_args_list]
+    assert built == [["1", "2"], ["3"]]
+
+
+def test_regenerated_messages_are_not_served_from_cache(history_memory, session):
+    session.add_message("1", UUID_NIL, "hi", "hello")
+    session.add_message("2", "1", "how are you", "fine")
+    history_memory.get_history_prompt_messages()
+
+    # regenerating the answer of message 2 starts another thread from message 1
+    session.add_message("3", "1", "how are you", "great")
+    assert _contents(history_memory.get_history_prompt_messages()) == ["hi", "hello", "how are you", "great"]
+
+
+def test_messages_without_answer_are_not_cached(history_memory, session):
+    session.add_message("1", UUID_NIL, "hi", "")
+    session.add_message("2", "1", "how are you", "fine")
+    assert _contents(history_memory.get_history_prompt_messages()) == ["hi", "", "how are you", "fine"]
+
+    session.thread_rows[-1].has_answer = True
+    session.content_rows[0].answer = "hello"
+    assert _contents(history_memory.get_history_prompt_messages()) == ["hi", "hello", "how are you", "fine"]
+
+
+def test_history_is_pruned_with_the_cached_token_counts(history_memory, session, mocker):
+    for i in range(10):
+        session.add_message(str(i), str(i - 1) if i else UUID_NIL, "question " * 5, "answer " * 5)
+    history_memory.model_instance.get_llm_num_tokens.side_effect = _model_count
+    history_memory.get_history_prompt_messages(max_token_limit=100)
+
+    get_message_num_tokens = mocker.spy(LocalTokenizer, "get_message_num_tokens")
+    pruned = history_memory.get_history_prompt_messages(max_token_limit=100)
+
+    full_history = [UserPromptMessage(content="question " * 5), AssistantPromptMessage(content="answer " * 5)] * 10
+    assert len(pruned) == len(_prune_one_by_one(full_history, 100))
+    get_message_num_tokens.assert_not_called()
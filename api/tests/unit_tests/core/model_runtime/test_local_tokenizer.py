@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, UserPromptMessage
+from core.model_runtime.model_providers.__base import tokenizers
+from core.model_runtime.model_providers.__base.large_language_model import LargeLanguageModel
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
+
+
+class _WordEncoder:
+    """Stands in for a tiktoken encoding, one token per word."""
+
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    def encode_ordinary_batch(self, texts: list[str]) -> list[list[str]]:
+        self.batches.append(texts)
+        return [text.split() for text in texts]
+
+
+@pytest.fixture
+def encoder(mocker):
+    encoder = _WordEncoder()
+    mocker.patch.object(LocalTokenizer, "get_encoder", return_value=encoder)
+    return encoder
+
+
+def test_encoding_is_selected_by_model():
+    assert LocalTokenizer.get_encoding_name("gpt-4o-mini") == "o200k_base"
+    assert LocalTokenizer.get_encoding_name("gpt-3.5-turbo") == "cl100k_base"
+    assert LocalTokenizer.get_encoding_name("text-embedding-3-small") == "cl100k_base"
+    assert LocalTokenizer.get_encoding_name("claude-3-5-sonnet") == "gpt2"
+
+
+def test_encodings_that_cannot_be_loaded_fall_back_to_gpt2(mocker):
+    gpt2_encoder = object()
+    mocker.patch.object(tokenizers.local_tokenizer, "_encoders", {})
+    mocker.patch.object(tokenizers.local_tokenizer.GPT2Tokenizer, "get_encoder", return_value=gpt2_encoder)
+    get_encoding = mocker.patch("tiktoken.get_encoding", side_effect=OSError("offline"))
+
+    assert LocalTokenizer.get_encoder("gpt-4o") is gpt2_encoder
+    assert LocalTokenizer.get_encoder("gpt-4o") is gpt2_encoder
+    get_encoding.assert_called_once_with("o200k_base")
+
+
+def test_messages_are_counted_in_one_batch(encoder):
+    prompt_messages = [
+        UserPromptMessage(content="what is the weather"),
+        AssistantPromptMessage(content="sunny and warm"),
+    ]
+
+    assert LocalTokenizer.get_message_num_tokens("gpt-4o", prompt_messages) == [3 + 1 + 4, 3 + 1 + 3]
+    assert LocalTokenizer.get_num_tokens("gpt-4o", prompt_messages) == 15 + 3
+    assert len(encoder.batches) == 2
+
+
+def test_llm_counts_locally_for_configured_providers(encoder, mocker):
+    plugin_model_manager = mocker.patch(
+        "core.model_runtime.model_providers.__base.large_language_model.PluginModelManager"
+    ).return_value
+    plugin_model_manager.get_llm_num_tokens.return_value = 100
+    llm = LargeLanguageModel.model_construct(
+        tenant_id="tenant", plugin_id="langgenius/openai", provider_name="openai", plugin_model_provider=MagicMock()
+    )
+    prompt_messages = [UserPromptMessage(content="hello there")]
+
+    mocker.patch("core.model_runtime.model_providers.__base.ai_model.dify_config.MODEL_LOCAL_TOKEN_COUNT_PROVIDERS", "")
+    assert llm.get_num_tokens("gpt-4o", {}, prompt_messages) == 100
+
+    mocker.patch(
+        "core.model_runtime.model_providers.__base.ai_model.dify_config.MODEL_LOCAL_TOKEN_COUNT_PROVIDERS",
+        "langgenius/openai/openai",
+    )
+    assert llm.get_num_tokens("gpt-4o", {}, prompt_messages) == 3 + 1 + 2 + 3
+    plugin_model_manager.get_llm_num_tokens.assert_called_once()
@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from pydantic import BaseModel
+
+from core.plugin.entities.plugin_daemon import PluginDaemonInnerError
+from core.plugin.manager.base import BasePluginManager
+
+
+class _Chunk(BaseModel):
+    text: str
+
+
+@pytest.fixture
+def session(mocker):
+    session = MagicMock()
+    mocker.patch.object(BasePluginManager, "_get_session", return_value=session)
+    return session
+
+
+def _stream_response(*lines: bytes) -> MagicMock:
+    response = MagicMock()
+    response.iter_lines.return_value = iter(lines)
+    return response
+
+
+def test_managers_share_one_pooled_session(mocker):
+    mocker.patch.object(BasePluginManager, "_session", None)
+    mocker.patch("core.plugin.manager.base.dify_config.PLUGIN_DAEMON_MAX_CONNECTIONS", 7)
+
+    session = BasePluginManager._get_session()
+
+    assert BasePluginManager()._get_session() is session
+    assert session.get_adapter("http://localhost:5002")._pool_maxsize == 7
+
+
+def test_requests_use_the_configured_timeouts(session, mocker):
+    mocker.patch("core.plugin.manager.base.dify_config.PLUGIN_DAEMON_CONNECT_TIMEOUT", 3.0)
+    mocker.patch("core.plugin.manager.base.dify_config.PLUGIN_DAEMON_READ_TIMEOUT", 30.0)
+
+    BasePluginManager()._request("GET", "plugin/tenant/management/list")
+
+    assert session.request.call_args.kwargs["timeout"] == (3.0, 30.0)
+
+
+def test_timed_out_requests_raise_inner_error(session):
+    session.request.side_effect = requests.exceptions.ReadTimeout()
+
+    with pytest.raises(PluginDaemonInnerError):
+        BasePluginManager()._request("GET", "plugin/tenant/management/list")
+
+
+def test_stream_lines_are_validated_from_raw_bytes(session):
+    session.request.return_value = _stream_response(
+        b'data: {"code": 0, "message": "", "data": {"text": "Hello"}}',
+        b"",
+        b'data: {"code": 0, "message": "", "data": {"text": " world"}}',
+    )
+
+    chunks = list(BasePluginManager()._request_with_plugin_daemon_response_stream("POST", "dispatch", _Chunk))
+
+    assert [chunk.text for chunk in chunks] == ["Hello", " world"]
+
+
+def test_stream_error_lines_raise_their_error(session):
+    session.request.return_value = _stream_response(b'data: {"error": "plugin crashed"}')
+    with pytest.raises(ValueError, match="plugin crashed"):
+        list(BasePluginManager()._request_with_plugin_daemon_response_stream("POST", "dispatch", _Chunk))
+
+    session.request.return_value = _stream_response(b"data: not json")
+    with pytest.raises(ValueError, match="not json"):
+        list(BasePluginManager()._request_with_plugin_daemon_response_stream("POST", "dispatch", _Chunk))
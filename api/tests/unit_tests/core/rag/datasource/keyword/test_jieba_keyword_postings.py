@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+from core.rag.datasource.keyword.jieba.jieba_keyword_postings import POSTINGS_DATA_SOURCE_TYPE, JiebaKeywordPostings
+from core.rag.models.document import Document
+
+
+def _mock_dataset(data_source_type: str) -> MagicMock:
+    dataset = MagicMock()
+    dataset.id = "dataset_id"
+    dataset.tenant_id = "tenant_id"
+    dataset.dataset_keyword_table.data_source_type = data_source_type
+    return dataset
+
+
+def test_add_inserts_one_row_per_distinct_posting(mocker):
+    mock_db = mocker.patch("core.rag.datasource.keyword.jieba.jieba_keyword_postings.db")
+
+    JiebaKeywordPostings("dataset_id").add({"node-1": ["apple", "pear", "apple"], "node-2": ["apple"]})
+
+    stmt = mock_db.session.execute.call_args.args[0]
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    row_count = len([key for key in params if key.startswith("keyword_m")])
+    rows = {(params[f"keyword_m{i}"], params[f"index_node_id_m{i}"]) for i in range(row_count)}
+    assert rows == {("apple", "node-1"), ("pear", "node-1"), ("apple", "node-2")}
+    assert row_count == 3
+    mock_db.session.commit.assert_called_once()
+
+
+def test_get_postings_groups_node_ids_by_keyword(mocker):
+    mock_db = mocker.patch("core.rag.datasource.keyword.jieba.jieba_keyword_postings.db")
+    mock_db.session.query.return_value.filter.return_value = [
+        ("apple", "node-1"),
+        ("apple", "node-2"),
+        ("pear", "node-1"),
+    ]
+
+    postings = JiebaKeywordPostings("dataset_id").get_postings(["apple", "pear", "apple"])
+
+    assert postings == {"apple": {"node-1", "node-2"}, "pear": {"node-1"}}
+
+
+def test_jieba_add_texts_writes_postings_without_rewriting_table(mocker):
+    mocker.patch("core.rag.datasource.keyword.jieba.jieba.db")
+    mock_redis = mocker.patch("core.rag.datasource.keyword.jieba.jieba.redis_client", new=MagicMock())
+    mock_postings = mocker.patch("core.rag.datasource.keyword.jieba.jieba.JiebaKeywordPostings")
+    jieba = Jieba(_mock_dataset(POSTINGS_DATA_SOURCE_TYPE))
+    save_table = mocker.patch.object(jieba, "_save_dataset_keyword_table")
+
+    jieba.add_texts(
+        [Document(page_content="content", metadata={"doc_id": "node-1"})], keywords_list=[["apple", "pear"]]
+    )
+
+    mock_postings.return_value.add.assert_called_once_with({"node-1": ["apple", "pear"]})
+    save_table.assert_not_called()
+    mock_redis.lock.assert_not_called()
+
+
+def test_jieba_delete_by_ids_only_touches_deleted_nodes(mocker):
+    mock_postings = mocker.patch("core.rag.datasource.keyword.jieba.jieba.JiebaKeywordPostings")
+    jieba = Jieba(_mock_dataset(POSTINGS_DATA_SOURCE_TYPE))
+    get_table = mocker.patch.object(jieba, "_get_dataset_keyword_table")
+
+    jieba.delete_by_ids(["node-1", "node-2"])
+
+    mock_postings.return_value.delete_node_ids.assert_called_once_with(["node-1", "node-2"])
+    get_table.assert_not_called()
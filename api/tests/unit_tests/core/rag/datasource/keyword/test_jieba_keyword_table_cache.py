@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.datasource.keyword.jieba import jieba_keyword_table_cache
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+
+
+@pytest.fixture
+def jieba(mocker):
+    mocker.patch.object(jieba_keyword_table_cache, "redis_client", new=FakeRedis())
+    mocker.patch.object(jieba_keyword_table_cache._keyword_table_cache, "capacity", 10)
+    jieba_keyword_table_cache._keyword_table_cache.clear()
+    mocker.patch("core.rag.datasource.keyword.jieba.jieba.db")
+
+    dataset = MagicMock()
+    dataset.id = "dataset_id"
+    dataset.dataset_keyword_table.data_source_type = "database"
+    jieba = Jieba(dataset)
+    mocker.patch.object(
+        jieba,
+        "_get_dataset_keyword_table",
+        return_value={"apple": {"node-1", "node-2"}, "pear": {"node-2"}, "plum": {"node-3"}},
+    )
+    return jieba
+
+
+def test_search_reuses_parsed_keyword_table_until_invalidated(jieba):
+    jieba._get_search_keyword_table({"apple"})
+    jieba._get_search_keyword_table({"pear"})
+    assert jieba._get_dataset_keyword_table.call_count == 1
+
+    jieba_keyword_table_cache.JiebaKeywordTableCache.invalidate("dataset_id")
+    jieba._get_search_keyword_table({"apple"})
+    assert jieba._get_dataset_keyword_table.call_count == 2
+
+
+def test_retrieve_ids_by_keywords_ranks_by_matching_keyword_count(jieba):
+    keyword_table = jieba._get_search_keyword_table({"apple", "pear"})
+
+    assert jieba._retrieve_ids_by_keywords(keyword_table, {"apple", "pear", "missing"}, 2)[0] == "node-2"
+    assert jieba._retrieve_ids_by_keywords(keyword_table, {"plum"}, 4) == ["node-3"]
+    assert jieba._retrieve_ids_by_keywords(keyword_table, {"missing"}, 4) == []
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from core.rag.datasource.retrieval_executor import RetrievalExecutor
+
+
+def test_executor_is_shared_across_submissions():
+    first = RetrievalExecutor.submit("tenant", threading.get_ident)
+    assert first.result(timeout=5)
+    assert RetrievalExecutor._get_executor() is RetrievalExecutor._get_executor()
+
+
+def test_tenant_in_flight_tasks_are_capped(mocker):
+    mocker.patch("core.rag.datasource.retrieval_executor.dify_config.RETRIEVAL_SERVICE_TENANT_MAX_CONCURRENCY", 2)
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def task():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    futures = [RetrievalExecutor.submit("busy-tenant", task) for _ in range(6)]
+    # other tenants are not blocked by the busy one
+    other = RetrievalExecutor.submit("other-tenant", lambda: "done")
+
+    assert other.result(timeout=5) == "done"
+    for future in futures:
+        future.result(timeout=5)
+    assert max_running <= 2
+
+
+def test_submit_does_not_block_the_caller_when_the_tenant_is_at_its_cap(mocker):
+    mocker.patch("core.rag.datasource.retrieval_executor.dify_config.RETRIEVAL_SERVICE_TENANT_MAX_CONCURRENCY", 1)
+    release = threading.Event()
+
+    started_at = time.monotonic()
+    futures = [RetrievalExecutor.submit("capped-tenant", release.wait, 5) for _ in range(4)]
+    submit_duration = time.monotonic() - started_at
+
+    assert submit_duration < 0.5
+    assert sum(future.running() for future in futures) <= 1
+    release.set()
+    assert all(future.result(timeout=5) for future in futures)
+    assert "capped-tenant" not in RetrievalExecutor._tenant_tasks
+
+
+def test_task_errors_are_set_on_their_future(mocker):
+    mocker.patch("core.rag.datasource.retrieval_executor.dify_config.RETRIEVAL_SERVICE_TENANT_MAX_CONCURRENCY", 1)
+
+    def fail():
+        raise ValueError("search failed")
+
+    failed = RetrievalExecutor.submit("failing-tenant", fail)
+    succeeded = RetrievalExecutor.submit("failing-tenant", lambda: "done")
+
+    with pytest.raises(ValueError, match="search failed"):
+        failed.result(timeout=5)
+    assert succeeded.result(timeout=5) == "done"
@@ -0,0 +1,88 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.models.document import Document
+from core.rag.retrieval.retrieval_methods import RetrievalMethod
+from models.dataset import ChildChunk, DocumentSegment
+from models.dataset import Document as DatasetDocument
+
+
+def test_format_retrieval_documents_hydrates_segments_in_bulk(mocker):
+    mock_db = mocker.patch("core.rag.datasource.retrieval_service.db")
+    dataset_documents = [
+        DatasetDocument(id="doc-normal", doc_form=IndexType.PARAGRAPH_INDEX, dataset_id="dataset"),
+        DatasetDocument(id="doc-parent", doc_form=IndexType.PARENT_CHILD_INDEX, dataset_id="dataset"),
+    ]
+    segments = [
+        DocumentSegment(id="seg-1", dataset_id="dataset", index_node_id="node-1", content="one"),
+        DocumentSegment(id="seg-2", dataset_id="dataset", index_node_id="node-2", content="two"),
+    ]
+    parent_segment = DocumentSegment(id="seg-parent", dataset_id="dataset", content="parent")
+    child_chunks = [
+        ChildChunk(id="child-1", index_node_id="child-node-1", segment_id="seg-parent", content="c1", position=1),
+        ChildChunk(id="child-2", index_node_id="child-node-2", segment_id="seg-parent", content="c2", position=2),
+    ]
+    results = {DatasetDocument: dataset_documents, ChildChunk: child_chunks}
+
+    def query(model):
+        query_mock = MagicMock()
+        chain = query_mock.filter.return_value
+        chain.options.return_value = chain
+        if model is DocumentSegment:
+            # first segment query hydrates parents of child chunks, second the normal segments
+            chain.all.return_value = [parent_segment] if query.segment_calls == 0 else segments
+            query.segment_calls += 1
+        else:
+            chain.all.return_value = results[model]
+        return query_mock
+
+    query.segment_calls = 0
+    mock_db.session.query.side_effect = query
+
+    documents = [
+        Document(page_content="", metadata={"document_id": "doc-normal", "doc_id": "node-2", "score": 0.9}),
+        Document(page_content="", metadata={"document_id": "doc-parent", "doc_id": "child-node-1", "score": 0.5}),
+        Document(page_content="", metadata={"document_id": "doc-normal", "doc_id": "node-1", "score": 0.4}),
+        Document(page_content="", metadata={"document_id": "doc-parent", "doc_id": "child-node-2", "score": 0.7}),
+    ]
+
+    records = RetrievalService.format_retrieval_documents(documents)
+
+    assert mock_db.session.query.call_count == 4
+    assert [record.segment.id for record in records] == ["seg-2", "seg-parent", "seg-1"]
+    assert records[1].score == 0.7
+    assert [child_chunk.id for child_chunk in records[1].child_chunks] == ["child-1", "child-2"]
+
+
+@pytest.fixture
+def hybrid_search(mocker):
+    dataset = MagicMock(id="dataset", tenant_id="tenant", available_document_count=1, available_segment_count=1)
+    mocker.patch.object(RetrievalService, "_get_dataset", return_value=dataset)
+    post_processor = mocker.patch("core.rag.datasource.retrieval_service.DataPostProcessor")
+    post_processor.return_value.invoke.side_effect = lambda query, documents, score_threshold, top_n: documents
+    with Flask(__name__).app_context():
+        yield lambda: RetrievalService.retrieve(RetrievalMethod.HYBRID_SEARCH.value, "dataset", "query", top_k=4)
+
+
+def test_retrieve_merges_the_documents_of_every_search(hybrid_search, mocker):
+    def slow_embedding_search(**kwargs):
+        time.sleep(0.2)
+        return [Document(page_content="semantic")]
+
+    mocker.patch.object(RetrievalService, "embedding_search", side_effect=slow_embedding_search)
+    mocker.patch.object(RetrievalService, "full_text_index_search", return_value=[Document(page_content="full text")])
+
+    assert [document.page_content for document in hybrid_search()] == ["semantic", "full text"]
+
+
+def test_retrieve_raises_the_errors_of_the_searches(hybrid_search, mocker):
+    mocker.patch.object(RetrievalService, "embedding_search", side_effect=ValueError("vector store down"))
+    mocker.patch.object(RetrievalService, "full_text_index_search", return_value=[Document(page_content="full text")])
+
+    with pytest.raises(ValueError, match="vector store down"):
+        hybrid_search()
@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import BaseModel
+
+from core.rag.datasource.vdb.vector_client_pool import VectorClientPool
+
+
+class _Config(BaseModel):
+    endpoint: str
+    api_key: str = "key"
+
+
+@pytest.fixture(autouse=True)
+def _clear_pool():
+    VectorClientPool.clear()
+    yield
+    VectorClientPool.clear()
+
+
+def test_client_is_reused_for_same_config():
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = VectorClientPool.get_client("qdrant", _Config(endpoint="http://a"), factory)
+    second = VectorClientPool.get_client("qdrant", _Config(endpoint="http://a"), factory)
+    other = VectorClientPool.get_client("qdrant", _Config(endpoint="http://b"), factory)
+    other_type = VectorClientPool.get_client("milvus", _Config(endpoint="http://a"), factory)
+
+    assert first is second
+    assert first is not other
+    assert first is not other_type
+    assert factory.call_count == 3
+
+
+def test_unhealthy_client_is_replaced_without_closing_it(mocker):
+    mocker.patch("core.rag.datasource.vdb.vector_client_pool.dify_config.VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL", 0)
+    config = _Config(endpoint="http://a")
+    health_check = MagicMock(return_value=True)
+    close = MagicMock()
+
+    first = VectorClientPool.get_client("qdrant", config, object, health_check, close)
+    assert VectorClientPool.get_client("qdrant", config, object, health_check, close) is first
+    health_check.assert_called_once_with(first)
+
+    health_check.side_effect = ConnectionError("connection reset")
+    replaced = VectorClientPool.get_client("qdrant", config, object, health_check, close)
+    assert replaced is not first
+    assert VectorClientPool.size() == 1
+    # vector instances created before may still be using it
+    close.assert_not_called()
+
+
+def test_health_check_is_throttled(mocker):
+    mocker.patch("core.rag.datasource.vdb.vector_client_pool.dify_config.VECTOR_CLIENT_POOL_HEALTH_CHECK_INTERVAL", 60)
+    config = _Config(endpoint="http://a")
+    health_check = MagicMock(return_value=False)
+
+    first = VectorClientPool.get_client("qdrant", config, object, health_check)
+
+    assert VectorClientPool.get_client("qdrant", config, object, health_check) is first
+    health_check.assert_not_called()
+
+
+def test_idle_clients_are_evicted_without_closing_them(mocker):
+    mocker.patch("core.rag.datasource.vdb.vector_client_pool.dify_config.VECTOR_CLIENT_POOL_IDLE_TIMEOUT", 600)
+    monotonic = mocker.patch("core.rag.datasource.vdb.vector_client_pool.time.monotonic", return_value=1000.0)
+
+    close = MagicMock()
+
+    first = VectorClientPool.get_client("qdrant", _Config(endpoint="http://a"), object, close=close)
+    monotonic.return_value = 1700.0
+    VectorClientPool.get_client("qdrant", _Config(endpoint="http://b"), object, close=close)
+
+    assert VectorClientPool.size() == 1
+    assert VectorClientPool.get_client("qdrant", _Config(endpoint="http://a"), object) is not first
+
+    VectorClientPool.clear()
+    close.assert_not_called()
+
+
+def test_client_that_lost_the_creation_race_is_closed():
+    config = _Config(endpoint="http://a")
+    close = MagicMock()
+    pooled = object()
+    lost = object()
+
+    def factory():
+        # another caller pools its client while this one is connecting
+        VectorClientPool.get_client("qdrant", config, lambda: pooled)
+        return lost
+
+    assert VectorClientPool.get_client("qdrant", config, factory, close=close) is pooled
+    close.assert_called_once_with(lost)
+
+
+def test_pool_can_be_disabled(mocker):
+    mocker.patch("core.rag.datasource.vdb.vector_client_pool.dify_config.VECTOR_CLIENT_POOL_ENABLED", False)
+    config = _Config(endpoint="http://a")
+
+    assert VectorClientPool.get_client("qdrant", config, object) is not VectorClientPool.get_client(
+        "qdrant", config, object
+    )
+    assert VectorClientPool.size() == 0
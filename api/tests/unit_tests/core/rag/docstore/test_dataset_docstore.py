@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.docstore.dataset_docstore import DatasetDocumentStore
+from core.rag.models.document import ChildDocument, Document
+from models.dataset import ChildChunk, DocumentSegment
+
+
+@pytest.fixture
+def mock_db(mocker):
+    mock_db = mocker.patch("core.rag.docstore.dataset_docstore.db", new=MagicMock())
+    mock_db.session.query.return_value.filter.return_value.scalar.return_value = 3
+    mock_db.session.query.return_value.filter.return_value.all.return_value = []
+    return mock_db
+
+
+def _doc_store() -> DatasetDocumentStore:
+    dataset = MagicMock(id="dataset", tenant_id="tenant", indexing_technique="economy")
+    return DatasetDocumentStore(dataset=dataset, user_id="user", document_id="document")
+
+
+def _doc(index: int, children: int = 0) -> Document:
+    return Document(
+        page_content=f"chunk {index}",
+        metadata={"doc_id": f"doc-{index}", "doc_hash": f"hash-{index}"},
+        children=[
+            ChildDocument(page_content=f"child {child}", metadata={"doc_id": f"child-{index}-{child}"})
+            for child in range(children)
+        ],
+    )
+
+
+def _inserted_rows(mock_db, model) -> list[dict]:
+    rows = []
+    for call in mock_db.session.execute.call_args_list:
+        statement, batch = call.args
+        if statement.table.name == model.__tablename__:
+            rows.extend(batch)
+    return rows
+
+
+def test_new_segments_are_inserted_in_batches(mock_db, mocker):
+    mocker.patch("core.rag.docstore.dataset_docstore.dify_config.DATASET_SEGMENT_INSERT_BATCH_SIZE", 4)
+
+    _doc_store().add_documents([_doc(index, children=2) for index in range(10)], save_child=True)
+
+    # one lookup per batch of doc ids instead of one per chunk
+    assert mock_db.session.query.return_value.filter.return_value.all.call_count == 3
+    assert mock_db.session.execute.call_count == 6
+    assert mock_db.session.commit.call_count == 3
+    mock_db.session.flush.assert_not_called()
+
+    segments = _inserted_rows(mock_db, DocumentSegment)
+    assert [segment["position"] for segment in segments] == list(range(4, 14))
+    child_chunks = _inserted_rows(mock_db, ChildChunk)
+    assert len(child_chunks) == 20
+    assert child_chunks[0]["segment_id"] == segments[0]["id"]
+    assert [child["position"] for child in child_chunks[:2]] == [1, 2]
+
+
+def test_existing_segments_are_updated(mock_db):
+    existing = DocumentSegment(id="segment", index_node_id="doc-1", content="old")
+    mock_db.session.query.return_value.filter.return_value.all.return_value = [existing]
+
+    _doc_store().add_documents([_doc(1), _doc(2)])
+
+    assert existing.content == "chunk 1"
+    assert existing.index_node_hash == "hash-1"
+    segments = _inserted_rows(mock_db, DocumentSegment)
+    assert [segment["index_node_id"] for segment in segments] == ["doc-2"]
+
+
+def test_existing_segment_without_update_is_rejected(mock_db):
+    existing = DocumentSegment(id="segment", index_node_id="doc-1", content="old")
+    mock_db.session.query.return_value.filter.return_value.all.return_value = [existing]
+
+    with pytest.raises(ValueError, match="doc_id doc-1 already exists"):
+        _doc_store().add_documents([_doc(1)], allow_update=False)
@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock
+
+from core.rag.embedding.cached_embedding import CacheEmbedding, query_embedding_cache
+from libs import helper
+from models.dataset import Embedding
+
+
+def _mock_model_instance(dimension: int = 3) -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.model = "text-embedding-3-small"
+    model_instance.provider = "openai"
+    model_instance.model_type_instance.get_model_schema.return_value = None
+
+    def invoke_text_embedding(texts, user=None, input_type=None):
+        result = MagicMock()
+        result.embeddings = [[1.0] * dimension for _ in texts]
+        return result
+
+    model_instance.invoke_text_embedding.side_effect = invoke_text_embedding
+    return model_instance
+
+
+def test_embed_documents_uses_batched_cache_lookup(mocker):
+    mocker.patch("core.rag.embedding.cached_embedding.dify_config.EMBEDDING_CACHE_QUERY_BATCH_SIZE", 2)
+    mock_db = mocker.patch("core.rag.embedding.cached_embedding.db")
+
+    cached = Embedding(model_name="text-embedding-3-small", hash=helper.generate_text_hash("a"), provider_name="openai")
+    cached.set_embedding([0.5, 0.5, 0.5])
+    mock_db.session.query.return_value.filter.return_value.all.side_effect = [[cached], []]
+
+    texts = ["a", "b", "c", "b"]
+    embeddings = CacheEmbedding(_mock_model_instance()).embed_documents(texts)
+
+    # three unique hashes looked up in chunks of two
+    assert mock_db.session.query.call_count == 2
+    assert embeddings[0] == [0.5, 0.5, 0.5]
+    assert embeddings[1] == embeddings[3]
+    assert all(embedding is not None for embedding in embeddings)
+
+    # new vectors are written with a single bulk insert per chunk of unique hashes
+    assert mock_db.session.execute.call_count == 1
+    mock_db.session.commit.assert_called_once()
+
+
+def test_embed_documents_all_cached_skips_model_and_insert(mocker):
+    mock_db = mocker.patch("core.rag.embedding.cached_embedding.db")
+
+    cached_rows = []
+    for text in ["a", "b"]:
+        row = Embedding(
+            model_name="text-embedding-3-small", hash=helper.generate_text_hash(text), provider_name="openai"
+        )
+        row.set_embedding([1.0, 0.0])
+        cached_rows.append(row)
+    mock_db.session.query.return_value.filter.return_value.all.return_value = cached_rows
+
+    model_instance = _mock_model_instance()
+    embeddings = CacheEmbedding(model_instance).embed_documents(["a", "b"])
+
+    assert embeddings == [[1.0, 0.0], [1.0, 0.0]]
+    model_instance.invoke_text_embedding.assert_not_called()
+    mock_db.session.execute.assert_not_called()
+
+
+def test_embed_query_serves_repeated_queries_from_local_cache(mocker):
+    mocker.patch.object(query_embedding_cache, "capacity", 10)
+    query_embedding_cache.clear()
+    mock_redis = mocker.patch("core.rag.embedding.cached_embedding.redis_client", new=MagicMock())
+    mock_redis.get.return_value = None
+
+    model_instance = _mock_model_instance()
+    cache_embedding = CacheEmbedding(model_instance)
+    first = cache_embedding.embed_query("hello")
+    second = cache_embedding.embed_query("hello")
+
+    assert first == second
+    model_instance.invoke_text_embedding.assert_called_once()
+    mock_redis.get.assert_called_once()
+    mock_redis.expire.assert_not_called()
+    assert CacheEmbedding.query_cache_stats()["hits"] == 1
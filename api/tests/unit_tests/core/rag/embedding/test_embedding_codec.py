@@ -0,0 +1,48 @@
+import base64
+import pickle
+
+import numpy as np
+import pytest
+
+from core.rag.embedding.embedding_codec import (
+    EmbeddingStorageFormat,
+    decode_embedding,
+    encode_embedding,
+    is_compact_embedding,
+)
+
+EMBEDDING = (np.arange(1, 9, dtype=np.float64) / np.linalg.norm(np.arange(1, 9))).tolist()
+
+
+@pytest.mark.parametrize(
+    ("storage_format", "itemsize", "tolerance"),
+    [
+        (EmbeddingStorageFormat.FLOAT32, 4, 1e-7),
+        (EmbeddingStorageFormat.FLOAT16, 2, 1e-3),
+        (EmbeddingStorageFormat.INT8, 1, 1e-2),
+    ],
+)
+def test_round_trip(storage_format, itemsize, tolerance):
+    data = encode_embedding(EMBEDDING, storage_format)
+
+    assert is_compact_embedding(data)
+    assert len(data) < len(pickle.dumps(EMBEDDING, protocol=pickle.HIGHEST_PROTOCOL))
+    assert len(data) >= len(EMBEDDING) * itemsize
+    assert np.allclose(decode_embedding(data), EMBEDDING, atol=tolerance)
+
+
+def test_decode_legacy_pickled_embedding():
+    data = pickle.dumps(EMBEDDING, protocol=pickle.HIGHEST_PROTOCOL)
+
+    assert not is_compact_embedding(data)
+    assert decode_embedding(data) == EMBEDDING
+
+
+def test_decode_legacy_base64_redis_embedding():
+    data = base64.b64encode(np.array(EMBEDDING).tobytes())
+
+    assert decode_embedding(data) == EMBEDDING
+
+
+def test_encode_zero_vector_int8():
+    assert decode_embedding(encode_embedding([0.0, 0.0], EmbeddingStorageFormat.INT8)) == [0.0, 0.0]
@@ -0,0 +1,114 @@
+import math
+from collections import Counter
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from core.rag.models.document import Document
+from core.rag.rerank.entity.weight import KeywordSetting, VectorSetting, Weights
+from core.rag.rerank.weight_rerank import WeightRerankRunner
+
+
+def _reference_keyword_scores(query_keywords: set[str], documents_keywords: list[set[str]]) -> list[float]:
+    total_documents = len(documents_keywords)
+    all_keywords = set().union(*documents_keywords)
+    keyword_idf = {
+        keyword: math.log((1 + total_documents) / (1 + sum(1 for doc in documents_keywords if keyword in doc))) + 1
+        for keyword in all_keywords
+    }
+    query_tfidf = {keyword: count * keyword_idf.get(keyword, 0) for keyword, count in Counter(query_keywords).items()}
+    scores = []
+    for document_keywords in documents_keywords:
+        document_tfidf = {keyword: keyword_idf[keyword] for keyword in document_keywords}
+        numerator = sum(query_tfidf[x] * document_tfidf[x] for x in set(query_tfidf) & set(document_tfidf))
+        denominator = math.sqrt(sum(v**2 for v in query_tfidf.values())) * math.sqrt(
+            sum(v**2 for v in document_tfidf.values())
+        )
+        scores.append(numerator / denominator if denominator else 0.0)
+    return scores
+
+
+@pytest.fixture
+def runner():
+    return WeightRerankRunner(
+        tenant_id="tenant_id",
+        weights=Weights(
+            vector_setting=VectorSetting(
+                vector_weight=0.7, embedding_provider_name="openai", embedding_model_name="text-embedding-3-small"
+            ),
+            keyword_setting=KeywordSetting(keyword_weight=0.3),
+        ),
+    )
+
+
+def test_keyword_score_matches_reference_tfidf(mocker, runner):
+    documents_keywords = [{"apple", "pear"}, {"apple", "plum", "fig"}, {"kiwi"}, set()]
+    query_keywords = {"apple", "fig", "unknown"}
+    mocker.patch("core.rag.rerank.weight_rerank.JiebaKeywordTableHandler.extract_keywords", return_value=query_keywords)
+    mocker.patch.object(
+        runner,
+        "_get_indexed_keywords",
+        return_value={f"node-{i}": keywords for i, keywords in enumerate(documents_keywords)},
+    )
+    documents = [
+        Document(page_content="", metadata={"doc_id": f"node-{i}", "dataset_id": "dataset"})
+        for i in range(len(documents_keywords))
+    ]
+
+    scores = runner._calculate_keyword_score("query", documents)
+
+    assert np.allclose(scores, _reference_keyword_scores(query_keywords, documents_keywords))
+    assert documents[0].metadata["keywords"] == {"apple", "pear"}
+
+
+def test_keyword_score_falls_back_to_extraction_without_indexed_keywords(mocker, runner):
+    extract_keywords = mocker.patch(
+        "core.rag.rerank.weight_rerank.JiebaKeywordTableHandler.extract_keywords",
+        side_effect=lambda text, max_keywords: set(text.split()),
+    )
+    mocker.patch.object(runner, "_get_indexed_keywords", return_value={})
+    documents = [
+        Document(page_content="apple pear", metadata={"doc_id": "node-1"}),
+        Document(page_content="kiwi", metadata={"doc_id": "node-2"}),
+    ]
+
+    scores = runner._calculate_keyword_score("apple", documents)
+
+    assert extract_keywords.call_count == 3
+    assert scores[0] > 0
+    assert scores[1] == 0
+
+
+def test_keyword_score_extracts_for_all_candidates_when_some_are_not_indexed(mocker, runner):
+    extract_keywords = mocker.patch(
+        "core.rag.rerank.weight_rerank.JiebaKeywordTableHandler.extract_keywords",
+        side_effect=lambda text, max_keywords: set(text.split()),
+    )
+    mocker.patch.object(runner, "_get_indexed_keywords", return_value={"node-1": {"indexed"}})
+    documents = [
+        Document(page_content="apple pear", metadata={"doc_id": "node-1"}),
+        Document(page_content="kiwi", metadata={"doc_id": "node-2"}),
+    ]
+
+    runner._calculate_keyword_score("apple", documents)
+
+    assert extract_keywords.call_count == 3
+    assert documents[0].metadata["keywords"] == {"apple", "pear"}
+
+
+def test_cosine_scores_unscored_documents_in_one_pass(mocker, runner):
+    model_instance = MagicMock()
+    mocker.patch(
+        "core.rag.rerank.weight_rerank.ModelManager"
+    ).return_value.get_model_instance.return_value = model_instance
+    mocker.patch("core.rag.rerank.weight_rerank.CacheEmbedding").return_value.embed_query.return_value = [1.0, 0.0]
+    documents = [
+        Document(page_content="", vector=[0.0, 2.0], metadata={"doc_id": "node-1"}),
+        Document(page_content="", metadata={"doc_id": "node-2", "score": 0.42}),
+        Document(page_content="", vector=[3.0, 3.0], metadata={"doc_id": "node-3"}),
+    ]
+
+    scores = runner._calculate_cosine("tenant_id", "query", documents, runner.weights.vector_setting)
+
+    assert np.allclose(scores, [0.0, 0.42, 1 / math.sqrt(2)])
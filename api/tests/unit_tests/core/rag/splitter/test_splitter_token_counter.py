@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.splitter.fixed_text_splitter import FixedRecursiveCharacterTextSplitter, SplitterTokenCounter
+
+
+class _WordEncoder:
+    """Stands in for the GPT-2 encoder, one token per word."""
+
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    def encode_ordinary_batch(self, texts: list[str]) -> list[list[str]]:
+        self.batches.append(texts)
+        return [text.split() for text in texts]
+
+
+@pytest.fixture
+def encoder(mocker):
+    encoder = _WordEncoder()
+    mocker.patch(
+        "core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier.GPT2Tokenizer.get_encoder",
+        return_value=encoder,
+    )
+    return encoder
+
+
+def test_local_counts_are_calibrated_with_one_model_call(encoder):
+    model_instance = MagicMock()
+    model_instance.get_text_embedding_num_tokens.side_effect = lambda texts: [2 * len(t.split()) for t in texts]
+    counter = SplitterTokenCounter(model_instance)
+
+    assert counter(["one two", "three", ""]) == [4, 2, 0]
+    assert counter(["four five six", "one two"]) == [6, 4]
+
+    model_instance.get_text_embedding_num_tokens.assert_called_once_with(texts=["one two", "three"])
+    assert encoder.batches == [["one two", "three", ""], ["four five six"]]
+
+
+def test_local_counts_are_used_as_they_are_when_the_model_count_fails(encoder):
+    model_instance = MagicMock()
+    model_instance.get_text_embedding_num_tokens.side_effect = RuntimeError("plugin daemon unavailable")
+    counter = SplitterTokenCounter(model_instance)
+
+    assert counter(["one two", "three"]) == [2, 1]
+    assert counter(["four five six"]) == [3]
+    model_instance.get_text_embedding_num_tokens.assert_called_once()
+
+
+def test_model_counts_every_distinct_text_once_without_local_counting(encoder, mocker):
+    mocker.patch("core.rag.splitter.fixed_text_splitter.dify_config.TEXT_SPLITTER_LOCAL_TOKEN_COUNT_ENABLED", False)
+    model_instance = MagicMock()
+    model_instance.get_text_embedding_num_tokens.side_effect = lambda texts: [len(t.split()) for t in texts]
+    counter = SplitterTokenCounter(model_instance)
+
+    assert counter(["a b", "a b", "c"]) == [2, 2, 1]
+    assert counter(["c", "a b"]) == [1, 2]
+
+    model_instance.get_text_embedding_num_tokens.assert_called_once_with(texts=["a b", "c"])
+    assert encoder.batches == []
+
+
+def test_splitting_a_large_document_calls_the_model_once(encoder):
+    model_instance = MagicMock()
+    model_instance.get_text_embedding_num_tokens.side_effect = lambda texts: [len(t.split()) for t in texts]
+    splitter = FixedRecursiveCharacterTextSplitter.from_encoder(
+        embedding_model_instance=model_instance, chunk_size=50, chunk_overlap=10, fixed_separator="\n\n"
+    )
+    text = "\n\n".join(" ".join(f"word{p}_{w}" for w in range(120)) for p in range(20))
+
+    chunks = splitter.split_text(text)
+
+    assert len(chunks) > 20
+    assert all(len(chunk.split()) <= 50 for chunk in chunks)
+    model_instance.get_text_embedding_num_tokens.assert_called_once()
@@ -0,0 +1,127 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.indexing_runner import DocumentIsPausedError, IndexingRunner
+from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.models.document import Document
+
+PARAGRAPH_RULE = {"mode": "custom", "rules": {"segmentation": {"separator": "\n", "max_tokens": 500}}}
+
+
+@pytest.fixture
+def runner(mocker):
+    mocker.patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_ENABLED", True)
+    mocker.patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_BATCH_SIZE", 4)
+    mocker.patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_MAX_WORKERS", 2)
+    mocker.patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_MAX_PENDING_BATCHES", 2)
+    mocker.patch("core.indexing_runner.DatasetDocumentStore")
+    mocker.patch("core.indexing_runner.DocumentSegment")
+    mocker.patch("core.indexing_runner.db")
+    mocker.patch.object(IndexingRunner, "_check_document_paused_status")
+    mocker.patch.object(IndexingRunner, "_update_document_index_status")
+    mocker.patch.object(IndexingRunner, "_process_keyword_index")
+    mocker.patch("core.indexing_runner.ModelManager")
+    runner = IndexingRunner()
+    mocker.patch.object(runner, "_extract", return_value=[Document(page_content=f"page {i}") for i in range(3)])
+    return runner
+
+
+def _index_processor(chunks_per_page: int) -> MagicMock:
+    index_processor = MagicMock()
+    index_processor.transform.side_effect = lambda pages, **kwargs: [
+        Document(page_content=f"{pages[0].page_content} chunk {i}", metadata={"doc_id": f"{pages[0].page_content}-{i}"})
+        for i in range(chunks_per_page)
+    ]
+    return index_processor
+
+
+def _dataset_document(doc_form: str = IndexType.PARAGRAPH_INDEX) -> MagicMock:
+    dataset_document = MagicMock()
+    dataset_document.id = "document"
+    dataset_document.doc_form = doc_form
+    return dataset_document
+
+
+def test_pipeline_saves_and_loads_every_chunk_in_batches(runner, mocker):
+    dataset = MagicMock(indexing_technique="high_quality")
+    process_chunk = mocker.patch.object(IndexingRunner, "_process_chunk", side_effect=lambda *args: len(args[2]))
+
+    runner._run_pipeline(_index_processor(3), dataset, _dataset_document(), PARAGRAPH_RULE)
+
+    loaded = [call.args[2] for call in process_chunk.call_args_list]
+    assert sorted(len(batch) for batch in loaded) == [1, 4, 4]
+    assert sorted(document.metadata["doc_id"] for batch in loaded for document in batch) == sorted(
+        f"page {page}-{chunk}" for page in range(3) for chunk in range(3)
+    )
+    completed = runner._update_document_index_status.call_args_list[-1].kwargs
+    assert completed["after_indexing_status"] == "completed"
+    assert next(value for key, value in completed["extra_update_params"].items() if key.key == "tokens") == 9
+
+
+def test_pipeline_bounds_the_batches_waiting_for_embedding(runner, mocker):
+    mocker.patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_BATCH_SIZE", 1)
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def process_chunk(*args):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return 0
+
+    mocker.patch.object(IndexingRunner, "_process_chunk", side_effect=process_chunk)
+    index_processor = MagicMock()
+    saved_batches = []
+    index_processor.transform.side_effect = lambda pages, **kwargs: [
+        Document(page_content=str(i), metadata={"doc_id": str(i)}) for i in range(10)
+    ]
+    mocker.patch("core.indexing_runner.DatasetDocumentStore").return_value.add_documents.side_effect = (
+        lambda docs, **kwargs: saved_batches.append(in_flight)
+    )
+
+    runner._run_pipeline(index_processor, MagicMock(indexing_technique="high_quality"), _dataset_document(), {})
+
+    assert len(saved_batches) == 30
+    assert max_in_flight <= 2
+    assert max(saved_batches) <= 2
+
+
+def test_pipeline_stops_splitting_when_the_document_is_paused(runner, mocker):
+    mocker.patch.object(IndexingRunner, "_process_chunk", side_effect=DocumentIsPausedError())
+    mocker.patch("core.indexing_runner.dify_config.INDEXING_PIPELINE_MAX_PENDING_BATCHES", 1)
+    index_processor = _index_processor(4)
+
+    with pytest.raises(DocumentIsPausedError):
+        runner._run_pipeline(
+            index_processor, MagicMock(indexing_technique="high_quality"), _dataset_document(), PARAGRAPH_RULE
+        )
+
+    assert index_processor.transform.call_count < 3
+    assert all(
+        call.kwargs["after_indexing_status"] != "completed"
+        for call in runner._update_document_index_status.call_args_list
+    )
+
+
+def test_full_doc_parent_child_documents_are_not_pipelined(runner):
+    full_doc_rule = {
+        "mode": "hierarchical",
+        "rules": {
+            "parent_mode": "full-doc",
+            "segmentation": {"separator": "\n", "max_tokens": 500},
+            "subchunk_segmentation": {"separator": "\n", "max_tokens": 200},
+        },
+    }
+    paragraph_rule = {"mode": "hierarchical", "rules": {**full_doc_rule["rules"], "parent_mode": "paragraph"}}
+
+    assert not runner._can_run_pipeline(_dataset_document(IndexType.PARENT_CHILD_INDEX), full_doc_rule)
+    assert runner._can_run_pipeline(_dataset_document(IndexType.PARENT_CHILD_INDEX), paragraph_rule)
+    assert runner._can_run_pipeline(_dataset_document(), PARAGRAPH_RULE)
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_cache import GraphCache, _graph_cache
+
+GRAPH_CONFIG = {
+    "edges": [
+        {"id": "start-source-iteration-target", "source": "start", "target": "iteration"},
+        {"id": "iteration-source-answer-target", "source": "iteration", "target": "answer"},
+        {"id": "tt-source-answer-2-target", "source": "tt", "target": "answer-2"},
+    ],
+    "nodes": [
+        {"data": {"title": "Start", "type": "start", "variables": []}, "id": "start"},
+        {
+            "data": {"title": "iteration", "type": "iteration", "start_node_id": "tt"},
+            "id": "iteration",
+        },
+        {
+            "data": {"iteration_id": "iteration", "title": "tt", "type": "template-transform"},
+            "id": "tt",
+        },
+        {
+            "data": {"answer": "{{#tt.output#}}", "iteration_id": "iteration", "title": "answer 2", "type": "answer"},
+            "id": "answer-2",
+        },
+        {"data": {"answer": "{{#iteration.output#}}", "title": "answer", "type": "answer"}, "id": "answer"},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    _graph_cache.clear()
+    yield
+    _graph_cache.clear()
+
+
+def test_graph_is_compiled_once_per_version(mocker):
+    init = mocker.spy(Graph, "init")
+    version_hash = GraphCache.version_hash(json.dumps(GRAPH_CONFIG))
+
+    graph = GraphCache.get_graph("workflow", version_hash, GRAPH_CONFIG)
+    assert GraphCache.get_graph("workflow", version_hash, GRAPH_CONFIG) is graph
+    assert graph.version_hash == version_hash
+    assert graph.root_node_id == "start"
+
+    # the whole graph and the iteration sub graph
+    assert init.call_count == 2
+
+    other_version = GraphCache.get_graph("workflow", GraphCache.version_hash("{}"), GRAPH_CONFIG)
+    assert other_version is not graph
+
+
+def test_sub_graph_is_precompiled(mocker):
+    version_hash = GraphCache.version_hash(json.dumps(GRAPH_CONFIG))
+    graph = GraphCache.get_graph("workflow", version_hash, GRAPH_CONFIG)
+    init = mocker.spy(Graph, "init")
+
+    sub_graph = GraphCache.get_sub_graph("workflow", graph, GRAPH_CONFIG, "tt")
+
+    assert sub_graph.root_node_id == "tt"
+    assert sub_graph.node_ids == ["tt", "answer-2"]
+    assert sub_graph.version_hash == version_hash
+    init.assert_not_called()
+
+
+def test_sub_graph_of_uncached_graph_is_not_cached():
+    graph = Graph.init(graph_config=GRAPH_CONFIG)
+
+    first = GraphCache.get_sub_graph("workflow", graph, GRAPH_CONFIG, "tt")
+
+    assert first is not GraphCache.get_sub_graph("workflow", graph, GRAPH_CONFIG, "tt")
+    assert GraphCache.stats()["size"] == 0
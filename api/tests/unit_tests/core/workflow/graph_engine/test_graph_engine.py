@@ -1,3 +1,4 @@
+import threading
 from unittest.mock import patch
 
 import pytest
@@ -844,7 +845,12 @@ def test_condition_parallel_correct_output(mock_close, mock_remove, app):
             )
         )
 
+    # the branches run concurrently and answers are appended as their nodes finish,
+    # let the code branch finish once the VAT answer is out so the answer order is fixed
+    vat_answer_succeeded = threading.Event()
+
     def code_generator(self):
+        vat_answer_succeeded.wait(timeout=5)
         yield RunCompletedEvent(
             run_result=NodeRunResult(
                 status=WorkflowNodeExecutionStatus.SUCCEEDED,
@@ -866,6 +872,8 @@ def test_condition_parallel_correct_output(mock_close, mock_remove, app):
                 stream_content = ""
                 res_content = "VAT:\ndify 123"
                 for item in generator:
+                    if isinstance(item, NodeRunSucceededEvent) and item.node_id == "1742382531085":
+                        vat_answer_succeeded.set()
                     if isinstance(item, NodeRunStreamChunkEvent):
                         stream_content += f"{item.chunk_content}\n"
                     if isinstance(item, GraphRunSucceededEvent):
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from core.workflow.graph_engine.graph_engine import GraphEngineThreadPool
+from core.workflow.graph_engine.worker_pool import GraphEngineWorkerPool
+
+
+def test_run_concurrency_is_capped_by_quota():
+    thread_pool = GraphEngineThreadPool(max_workers=2, max_submit_count=100)
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def task():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    futures = [thread_pool.submit(task) for _ in range(6)]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert max_running <= 2
+
+
+def test_submit_does_not_block_when_the_run_is_at_its_cap():
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=100)
+    release = threading.Event()
+
+    running = thread_pool.submit(release.wait, 5)
+    queued = thread_pool.submit(lambda: "done")
+
+    assert not queued.done()
+    release.set()
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == "done"
+
+
+def test_queued_tasks_can_be_cancelled():
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=100)
+    release = threading.Event()
+    called = threading.Event()
+
+    running = thread_pool.submit(release.wait, 5)
+    queued = thread_pool.submit(called.set)
+
+    assert queued.cancel()
+    release.set()
+    running.result(timeout=5)
+    assert thread_pool.submit(lambda: "next").result(timeout=5) == "next"
+    assert not called.is_set()
+
+
+def test_queued_task_errors_are_set_on_their_future():
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=100)
+    release = threading.Event()
+
+    def fail():
+        raise RuntimeError("branch failed")
+
+    running = thread_pool.submit(release.wait, 5)
+    queued = thread_pool.submit(fail)
+    release.set()
+    running.result(timeout=5)
+
+    with pytest.raises(RuntimeError, match="branch failed"):
+        queued.result(timeout=5)
+
+
+def test_nested_submissions_run_inline_when_quota_is_taken():
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=100)
+
+    def child():
+        return threading.current_thread().name
+
+    def parent():
+        # the parent holds the only slot of the run, waiting on a queued child would dead lock
+        future = thread_pool.submit(child)
+        return threading.current_thread().name, future.result(timeout=5)
+
+    parent_thread, child_thread = thread_pool.submit(parent).result(timeout=5)
+
+    assert parent_thread == child_thread
+    assert GraphEngineWorkerPool.stats()["inline"] >= 1
+
+
+def test_nested_submissions_are_queued_when_inline_runs_are_disabled():
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=100, run_inline_when_full=False)
+
+    def parent():
+        # the child only starts once the parent released the only slot of the pool
+        future = thread_pool.submit(lambda: "child")
+        return future.done(), future
+
+    ran_inline, child = thread_pool.submit(parent).result(timeout=5)
+
+    assert not ran_inline
+    assert child.result(timeout=5) == "child"
+
+
+def test_nested_submissions_run_inline_when_workers_are_exhausted(mocker):
+    mocker.patch("core.workflow.graph_engine.worker_pool.dify_config.GRAPH_ENGINE_MAX_WORKERS", 1)
+    mocker.patch.object(GraphEngineWorkerPool, "_in_flight", 1)
+    mocker.patch.object(GraphEngineWorkerPool._local, "in_worker", True, create=True)
+
+    future = GraphEngineWorkerPool.submit(threading.current_thread)
+
+    assert future.done()
+    assert future.result() is threading.current_thread()
+
+
+def test_submit_count_limit():
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=0)
+
+    with pytest.raises(ValueError, match="Max submit count 0"):
+        thread_pool.submit(lambda: None)
@@ -0,0 +1,111 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.workflow.payload_storage import OFFLOADED_PAYLOAD_KEY, WorkflowPayloadStorage
+from models.workflow import WorkflowNodeExecution
+
+
+@pytest.fixture
+def storage(mocker):
+    files: dict[str, bytes] = {}
+    storage = MagicMock()
+    storage.save.side_effect = files.__setitem__
+    storage.load_once.side_effect = files.__getitem__
+    storage.exists.side_effect = files.__contains__
+    storage.delete.side_effect = files.__delitem__
+    storage.files = files
+    mocker.patch("core.workflow.payload_storage.storage", new=storage)
+    mocker.patch("core.workflow.payload_storage.dify_config.WORKFLOW_PAYLOAD_OFFLOAD_THRESHOLD", 100)
+    mocker.patch("core.workflow.payload_storage.dify_config.WORKFLOW_PAYLOAD_PREVIEW_LENGTH", 20)
+    return storage
+
+
+def test_small_payloads_stay_in_the_row(storage):
+    payload = json.dumps({"text": "short"})
+
+    assert WorkflowPayloadStorage.offload("tenant", "run", "outputs", payload) == payload
+    assert WorkflowPayloadStorage.offload("tenant", "run", "outputs", None) is None
+    storage.save.assert_not_called()
+
+
+def test_large_payloads_are_offloaded(storage):
+    outputs = {"text": "x" * 1000}
+    payload = json.dumps(outputs)
+
+    stored = WorkflowPayloadStorage.offload("tenant", "run", "outputs", payload)
+
+    assert stored is not None
+    assert len(stored) < 300
+    pointer = json.loads(stored)[OFFLOADED_PAYLOAD_KEY]
+    assert pointer["key"] == "workflow_payloads/tenant/run/outputs.json.gz"
+    assert pointer["size"] == len(payload)
+    assert pointer["preview"] == payload[:20]
+    # compressed
+    assert len(storage.files[pointer["key"]]) < len(payload)
+    # offloading the stored value again is a no-op
+    assert WorkflowPayloadStorage.offload("tenant", "run", "outputs", stored) == stored
+
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.outputs = stored
+    assert workflow_node_execution.outputs_dict == outputs
+
+
+def test_rewritten_payloads_reuse_the_key_of_their_column(storage):
+    stored = WorkflowPayloadStorage.offload("tenant", "run", "outputs", json.dumps({"text": "x" * 1000}))
+    assert (
+        WorkflowPayloadStorage.offload("tenant", "run", "outputs", json.dumps({"text": "x" * 1000}), stored) == stored
+    )
+    assert storage.save.call_count == 1
+
+    rewritten = WorkflowPayloadStorage.offload("tenant", "run", "outputs", json.dumps({"text": "y" * 1000}), stored)
+
+    assert storage.save.call_count == 2
+    assert list(storage.files) == ["workflow_payloads/tenant/run/outputs.json.gz"]
+    assert WorkflowPayloadStorage.load(rewritten) == {"text": "y" * 1000}
+
+
+def test_deleted_rows_remove_their_payloads(storage):
+    WorkflowPayloadStorage.offload("tenant", "run", "inputs", json.dumps({"text": "x" * 1000}))
+    WorkflowPayloadStorage.offload("tenant", "run", "outputs", json.dumps({"text": "x" * 1000}))
+    WorkflowPayloadStorage.offload("tenant", "other-run", "outputs", json.dumps({"text": "x" * 1000}))
+
+    WorkflowPayloadStorage.delete("tenant", "run")
+
+    assert list(storage.files) == ["workflow_payloads/tenant/other-run/outputs.json.gz"]
+
+
+def test_missing_offloaded_payload_falls_back_to_the_preview(storage):
+    stored = WorkflowPayloadStorage.offload("tenant", "run", "outputs", json.dumps({"text": "x" * 1000}))
+    storage.files.clear()
+
+    assert WorkflowPayloadStorage.load(stored)[OFFLOADED_PAYLOAD_KEY]["preview"] == '{"text": "' + "x" * 10
+
+
+def test_row_payloads_are_loaded_once_until_rewritten(storage):
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.outputs = WorkflowPayloadStorage.offload(
+        "tenant", "run", "outputs", json.dumps({"text": "x" * 1000})
+    )
+
+    assert workflow_node_execution.outputs_dict == workflow_node_execution.outputs_dict == {"text": "x" * 1000}
+    assert storage.load_once.call_count == 1
+
+    workflow_node_execution.outputs = json.dumps({"text": "short"})
+    assert workflow_node_execution.outputs_dict == {"text": "short"}
+
+
+def test_previews_do_not_load_offloaded_payloads(storage):
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.inputs = json.dumps({"text": "short"})
+    workflow_node_execution.outputs = WorkflowPayloadStorage.offload(
+        "tenant", "run", "outputs", json.dumps({"text": "x" * 1000})
+    )
+
+    assert workflow_node_execution.inputs_preview == {"text": "short"}
+    assert workflow_node_execution.outputs_preview == {
+        OFFLOADED_PAYLOAD_KEY: {"size": 1012, "preview": '{"text": "' + "x" * 10}
+    }
+    assert workflow_node_execution.process_data_preview is None
+    storage.load_once.assert_not_called()
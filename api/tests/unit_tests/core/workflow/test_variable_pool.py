@@ -2,6 +2,7 @@ import pytest
 
 from core.file import File, FileTransferMethod, FileType
 from core.variables import FileSegment, StringSegment
+from core.workflow.entities import variable_pool as variable_pool_module
 from core.workflow.entities.variable_pool import VariablePool
 
 
@@ -44,3 +45,62 @@ def test_use_long_selector(pool):
     result = pool.get(("node_1", "part_1", "part_2"))
     assert result is not None
     assert result.value == "test_value"
+
+
+def test_child_pool_reads_through_to_parent(pool):
+    pool.add(("node_1", "text"), "parent")
+    pool.add(("node_2", "text"), "untouched")
+    child = pool.create_child()
+
+    child.add(("node_1", "text"), "child")
+    child.add(("node_3", "text"), "local")
+
+    assert child.get(("node_1", "text")).value == "child"
+    assert child.get(("node_2", "text")).value == "untouched"
+    assert child.get(("node_3", "text")).value == "local"
+    # the parent never sees the writes of its children
+    assert pool.get(("node_1", "text")).value == "parent"
+    assert pool.get(("node_3", "text")) is None
+    assert "node_2" not in child.variable_dictionary
+
+
+def test_child_pool_removal_hides_parent_values(pool):
+    pool.add(("node_1", "a"), "a")
+    pool.add(("node_1", "b"), "b")
+    pool.add(("node_2", "c"), "c")
+    child = pool.create_child()
+
+    child.remove(("node_2", "c"))
+    assert child.get(("node_2", "c")) is None
+
+    child.remove(("node_1",))
+    child.add(("node_1", "a"), "new a")
+    assert child.get(("node_1", "a")).value == "new a"
+    assert child.get(("node_1", "b")) is None
+
+    child.add(("node_2", "c"), "new c")
+    assert child.get(("node_2", "c")).value == "new c"
+    assert pool.get(("node_1", "b")).value == "b"
+    assert pool.get(("node_2", "c")).value == "c"
+
+
+def test_nested_child_pool(pool, file):
+    pool.add(("node_1", "file_var"), FileSegment(value=file))
+    grandchild = pool.create_child().create_child()
+
+    assert grandchild.get(("node_1", "file_var", "name")).value == file.filename
+    assert grandchild.get(("sys", "user_id")) is None
+
+
+def test_only_short_templates_are_memoized(pool):
+    pool.add(("node_1", "name"), StringSegment(value="dify"))
+    variable_pool_module._split_template_cached.cache_clear()
+
+    short_template = "Hello {{#node_1.name#}}"
+    long_template = "context " * 1000 + short_template
+    for _ in range(2):
+        assert pool.convert_template(short_template).text == "Hello dify"
+        assert pool.convert_template(long_template).text.endswith("Hello dify")
+
+    cache_info = variable_pool_module._split_template_cached.cache_info()
+    assert (cache_info.hits, cache_info.currsize) == (1, 1)
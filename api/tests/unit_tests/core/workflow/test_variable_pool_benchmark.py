@@ -0,0 +1,63 @@
+"""
+Micro-benchmarks of the variable pool paths hit by node-heavy workflows.
+Run them alone with `pytest tests/unit_tests/core/workflow/test_variable_pool_benchmark.py --benchmark-only`.
+"""
+
+import pytest
+
+from core.workflow.entities.variable_pool import VariablePool
+
+# keep the default test run quick, raise max_time when comparing implementations
+pytestmark = pytest.mark.benchmark(group="variable_pool", max_time=0.2)
+
+NODE_COUNT = 40
+VARIABLES_PER_NODE = 10
+
+
+@pytest.fixture
+def pool():
+    pool = VariablePool(system_variables={}, user_inputs={})
+    for node_index in range(NODE_COUNT):
+        for variable_index in range(VARIABLES_PER_NODE):
+            pool.add((f"node_{node_index}", f"var_{variable_index}"), f"value {node_index} {variable_index}")
+    return pool
+
+
+@pytest.fixture
+def selectors():
+    return [
+        [f"node_{node_index}", f"var_{variable_index}"]
+        for node_index in range(NODE_COUNT)
+        for variable_index in range(VARIABLES_PER_NODE)
+    ]
+
+
+def test_get_hits(benchmark, pool, selectors):
+    result = benchmark(lambda: [pool.get(selector) for selector in selectors])
+
+    assert all(segment is not None for segment in result)
+
+
+def test_get_misses(benchmark, pool, selectors):
+    missing = [[node_id, "missing"] for node_id, _ in selectors]
+
+    result = benchmark(lambda: [pool.get(selector) for selector in missing])
+
+    assert all(segment is None for segment in result)
+
+
+def test_get_through_child_scopes(benchmark, pool, selectors):
+    child = pool.create_child().create_child()
+
+    result = benchmark(lambda: [child.get(selector) for selector in selectors])
+
+    assert all(segment is not None for segment in result)
+
+
+def test_convert_template(benchmark, pool):
+    template = "Hello {{#node_1.var_1#}}, " * 10 + "{{#node_39.var_9#}} and {{#node_0.missing#}}."
+
+    result = benchmark(pool.convert_template, template)
+
+    assert result.text.startswith("Hello value 1 1, ")
+    assert result.text.endswith("value 39 9 and node_0.missing.")
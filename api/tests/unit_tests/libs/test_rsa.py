@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock
+
 import rsa as pyrsa
 from Crypto.PublicKey import RSA
 
@@ -27,3 +29,32 @@ def test_gmpy2_pkcs10aep_cipher() -> None:
     encrypted_by_private_key = private_cipher_rsa.encrypt(message=raw_text_bytes)
     decrypted_by_private_key = private_cipher_rsa.decrypt(encrypted_by_private_key)
     assert decrypted_by_private_key == raw_text_bytes
+
+
+def test_decrypt_parses_the_tenant_key_once(mocker) -> None:
+    from libs import rsa
+
+    keys = {"tenant": RSA.generate(2048)}
+    storage = mocker.patch("libs.rsa.storage")
+    storage.save.side_effect = lambda filepath, pem: keys.update(tenant=RSA.import_key(pem))
+    storage.load.side_effect = lambda filepath: keys["tenant"].export_key()
+    redis_client = mocker.patch("libs.rsa.redis_client", new=MagicMock())
+    redis_client.get.return_value = None
+    mocker.patch.object(rsa, "_decoding_cache", rsa.TTLLRUCache(capacity=10, ttl=60))
+
+    public_key = keys["tenant"].publickey().export_key()
+    assert rsa.decrypt(rsa.encrypt("first", public_key), "tenant") == "first"
+    assert rsa.decrypt(rsa.encrypt("second", public_key), "tenant") == "second"
+    assert storage.load.call_count == 1
+
+    # rotated by another process, the cached key cannot decrypt the new ciphertexts
+    keys["tenant"] = RSA.generate(2048)
+    public_key = keys["tenant"].publickey().export_key()
+    assert rsa.decrypt(rsa.encrypt("third", public_key), "tenant") == "third"
+    assert storage.load.call_count == 2
+
+    # rotated by this process
+    public_key = rsa.generate_key_pair("tenant")
+    redis_client.delete.assert_called_once()
+    assert rsa.decrypt(rsa.encrypt("fourth", public_key), "tenant") == "fourth"
+    assert storage.load.call_count == 3